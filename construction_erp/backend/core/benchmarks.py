@@ -0,0 +1,55 @@
+"""
+Shared ``--benchmark N`` mode for the batch commands.
+
+A BenchmarkCommand adds the option, and its handle() hands over to
+run_benchmark() when it is given. The command's benchmark() seeds synthetic
+rows with seed() and times its engine on them with timed(). Everything runs in
+one transaction that is always rolled back, so the data never outlives the
+benchmark and a run can be pointed at a copy of production.
+"""
+import random
+from itertools import islice
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Rollback(Exception):
+    pass
+
+
+class BenchmarkCommand(BaseCommand):
+    benchmark_help = "Seed this many rows, time the run and roll back"
+    batch_size = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument("--benchmark", type=int, default=0, metavar="N", help=self.benchmark_help)
+
+    def benchmark(self, count, *args):
+        raise NotImplementedError("subclasses of BenchmarkCommand must provide a benchmark() method")
+
+    def run_benchmark(self, count, *args):
+        """Call benchmark(count, *args) inside a transaction that is rolled back afterwards"""
+        # Same synthetic data on every run, so timings compare
+        self.rng = random.Random(42)
+        try:
+            with transaction.atomic():
+                self.benchmark(count, *args)
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Benchmark data rolled back")
+
+    def seed(self, model, rows):
+        """bulk_create an iterable of unsaved ``model`` rows batch by batch and return them"""
+        rows = iter(rows)
+        created = []
+        while batch := list(islice(rows, self.batch_size)):
+            created += model.objects.bulk_create(batch)
+        return created
+
+    def timed(self, func, *args, **kwargs):
+        """``(result, seconds)`` of calling ``func(*args, **kwargs)``"""
+        started = perf_counter()
+        result = func(*args, **kwargs)
+        return result, perf_counter() - started
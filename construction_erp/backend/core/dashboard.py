@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from equipment.models import Equipment
+from finance.models import Invoice
+from hr.models import Employee
+from project_management.models import Project
+from site_management.models import SafetyRecord
+
+DASHBOARD_CACHE_KEY = "dashboard:summary"
+
+
+def _breakdown(queryset, field, choices):
+    """Count rows per choice value with a single GROUP BY query"""
+    counts = {value: 0 for value, _ in choices}
+    for row in queryset.order_by().values(field).annotate(total=Count("id")):
+        counts[row[field]] = row["total"]
+    return counts
+
+
+def build_summary():
+    """Collect per-module counts and status breakdowns from grouped aggregates"""
+    today = timezone.now().date()
+
+    projects = _breakdown(Project.objects.all(), "status", Project.STATUS_CHOICES)
+    equipment = _breakdown(Equipment.objects.all(), "status", Equipment.STATUS_CHOICES)
+    safety = _breakdown(SafetyRecord.objects.all(), "severity", SafetyRecord.SEVERITY_CHOICES)
+
+    employees = Employee.objects.aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(is_active=True)),
+    )
+
+    overdue = Q(status="overdue") | Q(status="pending", due_date__lt=today)
+    invoices = Invoice.objects.aggregate(
+        total=Count("id"),
+        overdue=Count("id", filter=overdue),
+        overdue_amount=Sum("amount", filter=overdue),
+    )
+    invoices["overdue_amount"] = invoices["overdue_amount"] or 0
+
+    return {
+        "projects": {"total": sum(projects.values()), "by_status": projects},
+        "employees": employees,
+        "equipment": {"total": sum(equipment.values()), "by_status": equipment},
+        "invoices": invoices,
+        "safety_records": {"total": sum(safety.values()), "by_severity": safety},
+        "generated_at": timezone.now(),
+    }
+
+
+def get_summary():
+    """Return the dashboard summary, serving from cache while it is fresh"""
+    summary = cache.get(DASHBOARD_CACHE_KEY)
+    if summary is None:
+        summary = build_summary()
+        ttl = getattr(settings, "DASHBOARD_CACHE_TTL", 60)
+        cache.set(DASHBOARD_CACHE_KEY, summary, ttl)
+    return summary
+
+
+def invalidate_summary():
+    cache.delete(DASHBOARD_CACHE_KEY)
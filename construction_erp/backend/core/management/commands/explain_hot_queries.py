@@ -0,0 +1,123 @@
+import random
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from equipment.models import Equipment
+from finance.models import Expense, Invoice
+from hr.models import Attendance
+from reports.models import Report
+from site_management.models import DailyLog, SafetyRecord, Site
+
+
+def hot_queries():
+    """The filtered/ordered list queries the API issues most often"""
+    today = timezone.now().date()
+    return {
+        "InvoiceViewSet.overdue": Invoice.objects.filter(status="pending", due_date__lt=today),
+        "AttendanceViewSet.today": Attendance.objects.filter(date=today),
+        "AttendanceViewSet.list": Attendance.objects.order_by("-date", "-id")[:10],
+        "DailyLogViewSet.list": DailyLog.objects.order_by("-date", "-id")[:10],
+        "SafetyRecordViewSet.list": SafetyRecord.objects.all()[:10],
+        "SafetyRecordViewSet.critical": SafetyRecord.objects.filter(severity="critical"),
+        "EquipmentViewSet.available": Equipment.objects.filter(status="available"),
+        "ExpenseViewSet.by_category": Expense.objects.filter(category="materials"),
+        "ReportViewSet.by_type": Report.objects.filter(report_type="safety")[:10],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Print query plans for the hot list queries. Seed a large dataset with "
+        "--seed, then run once at the previous migration and once at the latest "
+        "one to compare plans before and after the indexes."
+    )
+
+    batch_size = 10000
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Insert this many synthetic rows into each benchmarked table first")
+        parser.add_argument("--analyze", action="store_true",
+                            help="Run EXPLAIN ANALYZE (PostgreSQL) to include actual timings")
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self.seed(options["seed"])
+
+        explain_options = {"analyze": True} if options["analyze"] and connection.vendor == "postgresql" else {}
+        for label, queryset in hot_queries().items():
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write("")
+
+    def bulk(self, model, rows):
+        model.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    @transaction.atomic
+    def seed(self, count):
+        rng = random.Random(42)
+        start = date(2020, 1, 1)
+        days = 2000
+        self.stdout.write(f"Seeding {count} rows per table...")
+
+        invoice_statuses = [value for value, _ in Invoice.STATUS_CHOICES]
+        self.bulk(Invoice, (
+            Invoice(
+                invoice_number=f"BENCH-{n}",
+                client=f"Client {n % 500}",
+                amount=rng.randint(100, 100000),
+                due_date=start + timedelta(days=rng.randrange(days)),
+                status=rng.choice(invoice_statuses),
+            )
+            for n in range(count)
+        ))
+
+        attendance_statuses = [value for value, _ in Attendance.STATUS_CHOICES]
+        self.bulk(Attendance, (
+            Attendance(date=start + timedelta(days=rng.randrange(days)), status=rng.choice(attendance_statuses))
+            for _ in range(count)
+        ))
+
+        # DailyLog is unique per (site, date), so spread the rows over enough sites
+        sites = Site.objects.bulk_create(
+            [Site(name=f"Bench site {n}", location="Seed") for n in range(count // days + 1)]
+        )
+        self.bulk(DailyLog, (
+            DailyLog(site=sites[n // days], date=start + timedelta(days=n % days))
+            for n in range(count)
+        ))
+
+        severities = [value for value, _ in SafetyRecord.SEVERITY_CHOICES]
+        self.bulk(SafetyRecord, (
+            SafetyRecord(
+                site=sites[n % len(sites)],
+                date=start + timedelta(days=rng.randrange(days)),
+                severity=rng.choice(severities),
+            )
+            for n in range(count)
+        ))
+
+        equipment_statuses = [value for value, _ in Equipment.STATUS_CHOICES]
+        self.bulk(Equipment, (
+            Equipment(name=f"Bench equipment {n}", status=rng.choice(equipment_statuses))
+            for n in range(count)
+        ))
+
+        categories = ["materials", "labour", "fuel", "transport", "permits", "utilities"]
+        self.bulk(Expense, (
+            Expense(description=f"Bench expense {n}", category=rng.choice(categories), amount=rng.randint(10, 5000))
+            for n in range(count)
+        ))
+
+        report_types = [value for value, _ in Report.REPORT_TYPE_CHOICES]
+        self.bulk(Report, (
+            Report(title=f"Bench report {n}", report_type=rng.choice(report_types))
+            for n in range(count)
+        ))
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
@@ -0,0 +1,46 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import SORT_KEYS, load_dumps, sort_report
+
+
+class Command(BaseCommand):
+    help = "Print the most expensive endpoints recorded by the query profiler"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=getattr(settings, "PERF_PROFILER_DUMP_DIR", None),
+                            help="Directory holding the per-worker perf-*.json dumps")
+        parser.add_argument("--sort", choices=sorted(SORT_KEYS), default="db")
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--json", action="store_true", help="Emit the raw report as JSON")
+
+    def handle(self, *args, **options):
+        if not options["dir"]:
+            raise CommandError("No dump directory; set PERF_PROFILER_DUMP_DIR or pass --dir")
+
+        routes = load_dumps(options["dir"])
+        rows = sort_report(
+            [stats.summary(view) for view, stats in routes.items()],
+            options["sort"],
+            options["limit"],
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write("No profiled requests found.")
+            return
+
+        header = f"{'view':<45} {'reqs':>6} {'q p90':>6} {'db p90':>8} {'ser p90':>8} {'tot p90':>8} {'dup/req':>8}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for row in rows:
+            self.stdout.write(
+                f"{row['view']:<45} {row['requests']:>6} {row['queries']['p90']:>6} "
+                f"{row['db_ms']['p90']:>8} {row['serializer_ms']['p90']:>8} "
+                f"{row['total_ms']['p90']:>8} {row['duplicate_queries_per_request']:>8}"
+            )
+            for signature in row["n_plus_one"]:
+                self.stdout.write(self.style.WARNING(f"    N+1 x{signature['requests']}: {signature['sql'][:120]}"))
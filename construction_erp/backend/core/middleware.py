@@ -0,0 +1,69 @@
+import random
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .profiling import RequestProfile, store
+
+
+def view_label(view_func, method):
+    """Name a resolved view as ``ViewSet.action`` (e.g. ``TaskViewSet.my_tasks``)"""
+    cls = getattr(view_func, "cls", None)
+    actions = getattr(view_func, "actions", None)
+    if cls is not None and actions:
+        return f"{cls.__name__}.{actions.get(method, method)}"
+    if cls is not None:
+        # @api_view functions are wrapped in a class named after the function
+        return f"{cls.__name__}.{method}"
+    return f"{view_func.__module__}.{getattr(view_func, '__name__', type(view_func).__name__)}"
+
+
+class QueryProfilerMiddleware:
+    """
+    Opt-in per-request SQL profiler.
+
+    Enabled with PERF_PROFILER_ENABLED; PERF_PROFILER_SAMPLE_RATE controls the
+    fraction of requests that are measured. Results are aggregated per view
+    action in core.profiling.store and served from /api/_perf/.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PERF_PROFILER_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "PERF_PROFILER_SAMPLE_RATE", 1.0)
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        request._perf_profile = profile
+        start = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        total_time = perf_counter() - start
+
+        if profile.view is not None:
+            size = 0 if response.streaming else len(response.content)
+            store.record(profile.view, profile.sample(total_time, size))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = getattr(request, "_perf_profile", None)
+        if profile is not None:
+            profile.view = view_label(view_func, request.method.lower())
+            profile.mark_view_start()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns, so this hook
+        # separates view work from rendering
+        profile = getattr(request, "_perf_profile", None)
+        if profile is not None:
+            profile.mark_view_end()
+        return response
@@ -0,0 +1,156 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class RelatedQuerysetMixin:
+    """
+    Apply the relations a serializer declares on its ``Meta`` to ``get_queryset()``.
+
+    Serializers list the foreign keys they traverse in ``Meta.select_related``
+    and the reverse/many relations in ``Meta.prefetch_related``, so a list page
+    costs a fixed number of queries regardless of its size.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        meta = getattr(self.get_serializer_class(), 'Meta', None)
+        select_related = getattr(meta, 'select_related', ())
+        prefetch_related = getattr(meta, 'prefetch_related', ())
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+
+class BulkModelMixin:
+    """
+    Accept JSON arrays on a viewset's list route.
+
+    POST with a list validates every item with ``many=True`` and inserts them
+    with one ``bulk_create`` in a single transaction. PATCH with a list of
+    objects carrying ``id`` partially updates those rows with ``bulk_update``,
+    and DELETE with a list of ids removes them in one statement. Invalid
+    batches are rejected as a whole with the errors listed per item. The list
+    route needs core.routers.BulkRouter to expose PATCH and DELETE.
+
+    Bulk writes bypass ``Model.save()`` and save signals; viewsets whose
+    models rely on them override ``perform_bulk_create``/``perform_bulk_update``.
+    """
+    bulk_max_items = 1000
+    bulk_batch_size = 500
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        error = self.check_bulk_size(request.data)
+        if error:
+            return error
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return self.bulk_error_response(serializer.errors)
+        try:
+            with transaction.atomic():
+                instances = self.perform_bulk_create(serializer)
+        except IntegrityError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(instances, many=True).data, status=status.HTTP_201_CREATED)
+
+    def perform_bulk_create(self, serializer):
+        model = self.get_queryset().model
+        instances = [model(**attrs) for attrs in serializer.validated_data]
+        return model.objects.bulk_create(instances, batch_size=self.bulk_batch_size)
+
+    def bulk_update(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return Response({'detail': 'Expected a list of objects with an "id".'}, status=status.HTTP_400_BAD_REQUEST)
+        error = self.check_bulk_size(request.data)
+        if error:
+            return error
+
+        ids = [item.get('id') if isinstance(item, dict) else None for item in request.data]
+        keys = self.clean_ids(ids)
+        instances = self.get_queryset().in_bulk([key for key in keys if key is not None])
+
+        errors, item_serializers = [], []
+        for pk, key, item in zip(ids, keys, request.data):
+            instance = instances.get(key) if key is not None else None
+            if instance is None:
+                if pk is None:
+                    message = 'This field is required.'
+                else:
+                    message = 'Invalid id.' if key is None else 'Object not found.'
+                errors.append({'id': [message]})
+                continue
+            serializer = self.get_serializer(instance, data=item, partial=True)
+            errors.append({} if serializer.is_valid() else serializer.errors)
+            item_serializers.append(serializer)
+        if any(errors):
+            return self.bulk_error_response(errors)
+
+        try:
+            with transaction.atomic():
+                updated = self.perform_bulk_update(item_serializers)
+        except IntegrityError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(updated, many=True).data)
+
+    def perform_bulk_update(self, item_serializers):
+        model = self.get_queryset().model
+        auto_now = [f for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+        fields, updated = set(), []
+        for serializer in item_serializers:
+            instance = serializer.instance
+            for attr, value in serializer.validated_data.items():
+                setattr(instance, attr, value)
+                fields.add(attr)
+            for field in auto_now:
+                field.pre_save(instance, add=False)
+            updated.append(instance)
+        fields.update(field.name for field in auto_now)
+        if fields:
+            model.objects.bulk_update(updated, sorted(fields), batch_size=self.bulk_batch_size)
+        return updated
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else request.data
+        if not isinstance(ids, list) or not ids:
+            return Response({'detail': 'Expected a non-empty list of ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        error = self.check_bulk_size(ids)
+        if error:
+            return error
+        keys = self.clean_ids(ids)
+        invalid = [pk for pk, key in zip(ids, keys) if key is None]
+        if invalid:
+            return Response({'detail': f'Invalid ids: {invalid[:10]!r}.'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            deleted, _ = self.get_queryset().filter(pk__in=keys).delete()
+        return Response({'deleted': deleted})
+
+    def clean_ids(self, ids):
+        """The ids converted to the model's primary key type, with None for any that isn't one"""
+        field = self.get_queryset().model._meta.pk
+        keys = []
+        for pk in ids:
+            try:
+                keys.append(None if isinstance(pk, (bool, float, dict, list)) else field.clean(pk, None))
+            except ValidationError:
+                keys.append(None)
+        return keys
+
+    def check_bulk_size(self, items):
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {'detail': f'At most {self.bulk_max_items} items can be sent in one request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return None
+
+    def bulk_error_response(self, errors):
+        return Response(
+            {'errors': [{'index': index, 'errors': item} for index, item in enumerate(errors) if item]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
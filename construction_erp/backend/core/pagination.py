@@ -1,5 +1,23 @@
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps datetimes and times at full precision; DjangoJSONEncoder cuts them to milliseconds"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
@@ -14,3 +32,118 @@ class StandardResultsSetPagination(PageNumberPagination):
             'previous': self.get_previous_link(),
             'results': data,
         })
+
+
+class KeysetPagination(StandardResultsSetPagination):
+    """
+    Page-number pagination that switches to keyset (cursor) pagination when the
+    request carries a ``cursor`` parameter (``?cursor=`` starts at the first page).
+
+    Keyset pages filter on the last seen ordering values instead of using
+    OFFSET, so deep pages cost the same as the first one. The total count is
+    skipped unless ``?count=true`` is passed. Views set ``cursor_ordering`` to
+    a tuple of non-null fields ending in a unique one, e.g. ``('-date', '-id')``.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    cursor_ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        fields = [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in getattr(view, 'cursor_ordering', self.cursor_ordering)
+        ]
+
+        values, reverse = None, False
+        token = request.query_params[self.cursor_query_param]
+        if token:
+            values, reverse = self.decode_cursor(token, queryset.model, fields)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+
+        # Walking backwards flips every ordering direction, then the page is
+        # reversed again so results always come out in the natural order.
+        scan = [(name, desc != reverse) for name, desc in fields]
+        queryset = queryset.order_by(*[('-' if desc else '') + name for name, desc in scan])
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(scan, values))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_cursor = self.previous_cursor = None
+        if rows:
+            if has_more or reverse:
+                self.next_cursor = self.encode_cursor(rows[-1], fields, reverse=False)
+            if (has_more and reverse) or (values is not None and not reverse):
+                self.previous_cursor = self.encode_cursor(rows[0], fields, reverse=True)
+        return rows
+
+    def keyset_filter(self, fields, values):
+        """Lexicographic "row comes after (values)" predicate for the given ordering"""
+        condition = Q()
+        for index, (name, desc) in enumerate(fields):
+            branch = Q(**{f"{name}__{'lt' if desc else 'gt'}": values[index]})
+            for prev_index in range(index):
+                branch &= Q(**{fields[prev_index][0]: values[prev_index]})
+            condition |= branch
+        return condition
+
+    def encode_cursor(self, instance, fields, reverse):
+        payload = {
+            'v': [getattr(instance, name) for name, _ in fields],
+            'r': reverse,
+        }
+        return urlsafe_b64encode(json.dumps(payload, cls=CursorEncoder).encode()).decode()
+
+    def decode_cursor(self, token, model, fields):
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode()).decode())
+            raw = payload['v']
+            if len(raw) != len(fields):
+                raise ValueError
+            values = [model._meta.get_field(name).to_python(value) for (name, _), value in zip(fields, raw)]
+            return values, bool(payload.get('r'))
+        except (ValueError, KeyError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_cursor_link(self, token):
+        if token is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        payload = {
+            'next': self.get_cursor_link(self.next_cursor),
+            'previous': self.get_cursor_link(self.previous_cursor),
+            'results': data,
+        }
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Opaque keyset cursor; pass an empty value to start keyset paging.',
+            'schema': {'type': 'string'},
+        })
+        return parameters
@@ -0,0 +1,32 @@
+import json
+
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON, parsed lazily.
+
+    ``request.data`` becomes a generator of ``(line_number, value, error)``
+    tuples read from the request stream one line at a time, so a large batch
+    is never held in memory as a whole. Blank lines are skipped; a line that
+    is not valid JSON yields ``value=None`` and the decoding error.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        return self.lines(stream, encoding)
+
+    @staticmethod
+    def lines(stream, encoding):
+        if stream is None:
+            return
+        for number, raw in enumerate(stream, start=1):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                yield number, json.loads(raw.decode(encoding)), None
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                yield number, None, str(e)
@@ -0,0 +1,267 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import suppress
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 1-2-5 bucket bounds; the last bucket is open ended
+MS_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+QUERY_BOUNDS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+BYTES_BOUNDS = (1000, 10000, 50000, 100000, 500000, 1000000, 5000000)
+
+METRICS = {
+    "queries": QUERY_BOUNDS,
+    "db_ms": MS_BOUNDS,
+    "serializer_ms": MS_BOUNDS,
+    "total_ms": MS_BOUNDS,
+    "response_bytes": BYTES_BOUNDS,
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram: O(1) memory per route, percentiles read off the buckets"""
+
+    def __init__(self, bounds, buckets=None, total=0.0, maximum=0.0):
+        self.bounds = bounds
+        self.buckets = list(buckets) if buckets else [0] * (len(bounds) + 1)
+        self.total = total
+        self.maximum = maximum
+
+    @property
+    def count(self):
+        return sum(self.buckets)
+
+    def record(self, value):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples"""
+        target = fraction * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if hits and seen >= target:
+                return self.bounds[index] if index < len(self.bounds) else self.maximum
+        return 0
+
+    def summary(self):
+        count = self.count
+        return {
+            "mean": round(self.total / count, 2) if count else 0,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": round(self.maximum, 2),
+        }
+
+    def to_dict(self):
+        return {"buckets": self.buckets, "total": self.total, "max": self.maximum}
+
+
+class RouteStats:
+    # Only the most frequent repeated statements are kept per route
+    max_signatures = 20
+
+    def __init__(self):
+        self.requests = 0
+        self.duplicate_queries = 0
+        self.histograms = {name: Histogram(bounds) for name, bounds in METRICS.items()}
+        self.n_plus_one = Counter()
+
+    def record(self, sample):
+        self.requests += 1
+        self.duplicate_queries += sample["duplicate_queries"]
+        for name, histogram in self.histograms.items():
+            histogram.record(sample[name])
+        self.n_plus_one.update(sample["n_plus_one"])
+        if len(self.n_plus_one) > self.max_signatures * 2:
+            self.n_plus_one = Counter(dict(self.n_plus_one.most_common(self.max_signatures)))
+
+    def merge(self, other):
+        self.requests += other.requests
+        self.duplicate_queries += other.duplicate_queries
+        for name, histogram in self.histograms.items():
+            histogram.merge(other.histograms[name])
+        self.n_plus_one.update(other.n_plus_one)
+
+    def summary(self, view):
+        return {
+            "view": view,
+            "requests": self.requests,
+            "db_ms_total": round(self.histograms["db_ms"].total, 2),
+            "duplicate_queries_per_request": round(self.duplicate_queries / self.requests, 2) if self.requests else 0,
+            **{name: histogram.summary() for name, histogram in self.histograms.items()},
+            "n_plus_one": [
+                {"sql": sql, "requests": hits} for sql, hits in self.n_plus_one.most_common(3)
+            ],
+        }
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "duplicate_queries": self.duplicate_queries,
+            "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            "n_plus_one": dict(self.n_plus_one.most_common(self.max_signatures)),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.requests = data["requests"]
+        stats.duplicate_queries = data["duplicate_queries"]
+        for name, raw in data["histograms"].items():
+            stats.histograms[name] = Histogram(METRICS[name], raw["buckets"], raw["total"], raw["max"])
+        stats.n_plus_one = Counter(data["n_plus_one"])
+        return stats
+
+
+SORT_KEYS = {
+    "db": lambda row: row["db_ms_total"],
+    "queries": lambda row: row["queries"]["p90"],
+    "latency": lambda row: row["total_ms"]["p90"],
+    "duplicates": lambda row: row["duplicate_queries_per_request"],
+}
+
+
+class PerfStore:
+    """Thread-safe, in-process aggregate of profiled requests keyed by view/action"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.last_flush = time.monotonic()
+
+    def record(self, view, sample):
+        with self.lock:
+            self.routes.setdefault(view, RouteStats()).record(sample)
+        self.maybe_flush()
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+    def report(self, sort="db", limit=None):
+        with self.lock:
+            rows = [stats.summary(view) for view, stats in self.routes.items()]
+        return sort_report(rows, sort, limit)
+
+    def to_dict(self):
+        with self.lock:
+            return {view: stats.to_dict() for view, stats in self.routes.items()}
+
+    def maybe_flush(self):
+        """Write this worker's aggregates to PERF_PROFILER_DUMP_DIR for the perf_report command"""
+        dump_dir = getattr(settings, "PERF_PROFILER_DUMP_DIR", None)
+        interval = getattr(settings, "PERF_PROFILER_FLUSH_INTERVAL", 60)
+        if not dump_dir:
+            return
+        # Claim the interval under the lock so concurrent requests flush once
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_flush < interval:
+                return
+            self.last_flush = now
+        self.flush(dump_dir)
+
+    def flush(self, dump_dir):
+        """Replace this worker's dump file; failures are logged, never raised into the request"""
+        path = Path(dump_dir)
+        target = path / f"perf-{os.getpid()}.json"
+        tmp = path / f"perf-{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(self.to_dict()))
+            tmp.replace(target)
+        except OSError:
+            logger.exception("Could not write profiler dump %s", target)
+            with suppress(OSError):
+                tmp.unlink(missing_ok=True)
+
+
+def sort_report(rows, sort="db", limit=None):
+    rows.sort(key=SORT_KEYS[sort], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def load_dumps(dump_dir):
+    """Merge the per-worker dump files into a single route -> RouteStats mapping"""
+    routes = {}
+    for dump in sorted(Path(dump_dir).glob("perf-*.json")):
+        for view, data in json.loads(dump.read_text()).items():
+            stats = RouteStats.from_dict(data)
+            if view in routes:
+                routes[view].merge(stats)
+            else:
+                routes[view] = stats
+    return routes
+
+
+class RequestProfile:
+    """Database execute wrapper collecting per-request query statistics"""
+
+    # A statement repeated this many times in one request is reported as N+1
+    n_plus_one_threshold = 3
+
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.view_start = None
+        self.view_end = None
+        self.view_db_time = 0.0
+        self.signatures = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries += 1
+            # Parameters are passed separately, so the SQL text is already the
+            # statement's shape and identical text with new params is a repeat
+            self.signatures[sql] += 1
+
+    def mark_view_start(self):
+        self.view_start = perf_counter()
+        self.view_db_time = self.db_time
+
+    def mark_view_end(self):
+        self.view_end = perf_counter()
+        self.view_db_time = self.db_time - self.view_db_time
+
+    def sample(self, total_time, response_bytes):
+        if self.view_start is not None and self.view_end is not None:
+            # Time spent in the view outside the database, which for DRF
+            # views is dominated by serializer work
+            serializer_time = max(self.view_end - self.view_start - self.view_db_time, 0)
+        else:
+            serializer_time = 0
+        return {
+            "queries": self.queries,
+            "db_ms": self.db_time * 1000,
+            "serializer_ms": serializer_time * 1000,
+            "total_ms": total_time * 1000,
+            "response_bytes": response_bytes,
+            "duplicate_queries": sum(hits - 1 for hits in self.signatures.values() if hits > 1),
+            "n_plus_one": [sql for sql, hits in self.signatures.items() if hits >= self.n_plus_one_threshold],
+        }
+
+
+store = PerfStore()
@@ -0,0 +1,14 @@
+from rest_framework.routers import DefaultRouter
+
+
+class BulkRouter(DefaultRouter):
+    """
+    DefaultRouter whose list route also maps PATCH and DELETE to
+    ``bulk_update``/``bulk_destroy`` for viewsets that implement them
+    (see core.mixins.BulkModelMixin). Other viewsets are routed as before.
+    """
+    routes = [
+        route._replace(mapping={**route.mapping, 'patch': 'bulk_update', 'delete': 'bulk_destroy'})
+        if route.name == '{basename}-list' else route
+        for route in DefaultRouter.routes
+    ]
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "equipment",
     "site_management",
     "reports",
+    "core",
     "drf_spectacular",
     "rest_framework_simplejwt",
     "rest_framework_simplejwt.token_blacklist",
@@ -57,6 +58,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.QueryProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -131,7 +133,7 @@ CSRF_TRUSTED_ORIGINS = [
 
 # REST Framework settings
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StandardResultsSetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",  # For development - change to IsAuthenticated in production
@@ -147,6 +149,53 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache used for short-lived aggregates such as the dashboard summary. It lives in
+# the database so every worker sees the same entries and invalidations; create the
+# table with `python manage.py createcachetable` (run on release, see Procfile).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "erp_cache",
+    }
+}
+DASHBOARD_CACHE_TTL = 60  # seconds
+
+# Query profiler (see core/middleware.py); leave on in production with a low sample rate
+PERF_PROFILER_ENABLED = False
+PERF_PROFILER_SAMPLE_RATE = 1.0
+PERF_PROFILER_DUMP_DIR = BASE_DIR / 'perf'
+PERF_PROFILER_FLUSH_INTERVAL = 60  # seconds
+
+# Server-allocated invoice numbers (see finance/numbering.py). Gapless numbering
+# serializes creates per prefix and year; without it each worker reserves
+# blocks of INVOICE_NUMBER_BLOCK_SIZE numbers
+INVOICE_NUMBER_PREFIX = 'INV'
+INVOICE_NUMBER_FORMAT = '{prefix}-{year}-{number:06d}'
+INVOICE_NUMBER_GAPLESS = True
+INVOICE_NUMBER_BLOCK_SIZE = 50
+
+# Payroll runs (see hr/payroll.py): allowance and tax as fractions of pay, penalty per late day
+PAYROLL_ALLOWANCE_RATE = 0
+PAYROLL_TAX_RATE = 0
+PAYROLL_LATE_PENALTY = 0
+
+# Clock-in device ingestion (see hr/attendance.py)
+ATTENDANCE_SHIFT_START = '08:00'
+ATTENDANCE_LATE_GRACE_MINUTES = 10
+ATTENDANCE_HALF_DAY_HOURS = 4
+ATTENDANCE_STANDARD_HOURS = 8  # beyond this a day's hours count as overtime
+ATTENDANCE_INGEST_CHUNK_SIZE = 5000
+
+# Leave entitlements per type in working days a year (see hr/leave.py); days None means uncapped,
+# monthly accrual earns them in twelfths, carry_over caps what unused days move to the next year
+LEAVE_POLICY = {
+    'annual': {'days': 20, 'accrual': 'monthly', 'carry_over': 5},
+    'sick': {'days': 10},
+    'maternity': {'days': 90},
+    'paternity': {'days': 10},
+    'unpaid': {'days': None},
+}
+
 # JWT Settings
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from equipment.models import Equipment
+from finance.models import Invoice
+from hr.models import Employee
+from project_management.models import Project
+from site_management.models import SafetyRecord
+
+from .dashboard import invalidate_summary
+
+DASHBOARD_MODELS = (Project, Equipment, Employee, Invoice, SafetyRecord)
+
+
+def invalidate_dashboard_summary(sender, **kwargs):
+    """Drop the cached dashboard summary whenever a counted model changes
+
+    It is dropped again once the change is committed, so a summary rebuilt from
+    the pre-commit data in the meantime does not outlive the transaction.
+    """
+    invalidate_summary()
+    transaction.on_commit(invalidate_summary)
+
+
+for model in DASHBOARD_MODELS:
+    post_save.connect(invalidate_dashboard_summary, sender=model, dispatch_uid=f"dashboard_save_{model.__name__}")
+    post_delete.connect(invalidate_dashboard_summary, sender=model, dispatch_uid=f"dashboard_delete_{model.__name__}")
@@ -0,0 +1,28 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+    """TestCase helpers for catching N+1 queries on list endpoints"""
+
+    def assertConstantListQueries(self, url, create_row, sizes=(1, 5, 20)):
+        """
+        Grow the table to each of ``sizes`` rows via ``create_row()`` and assert
+        that listing ``url`` with a matching page size always issues the same
+        number of queries.
+        """
+        counts = {}
+        created = 0
+        for size in sizes:
+            while created < size:
+                create_row()
+                created += 1
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, {'page_size': size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['results']), size)
+            counts[size] = len(context.captured_queries)
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f"Query count for {url} grows with page size: {counts}",
+        )
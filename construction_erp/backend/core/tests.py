@@ -0,0 +1,244 @@
+import io
+import tempfile
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from core.dashboard import DASHBOARD_CACHE_KEY
+from core.profiling import RequestProfile, store
+from equipment.models import Equipment
+from finance.models import Invoice
+from hr.models import Attendance, Employee
+from inventory.models import InventoryItem, StockMovement, Warehouse
+from project_management.models import Project, Task
+
+
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_summary_counts(self):
+        Project.objects.create(name="Bridge", status="active")
+        Project.objects.create(name="Tower")
+        Equipment.objects.create(name="Crane", status="in-use")
+        Employee.objects.create(email="a@example.com")
+        Employee.objects.create(email="b@example.com", is_active=False)
+        yesterday = timezone.now().date() - timedelta(days=1)
+        Invoice.objects.create(invoice_number="INV-1", client="Acme", amount=100, due_date=yesterday)
+        Invoice.objects.create(invoice_number="INV-2", client="Acme", amount=50, status="paid", due_date=yesterday)
+
+        response = self.client.get("/api/dashboard/summary/")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["projects"]["total"], 2)
+        self.assertEqual(data["projects"]["by_status"]["active"], 1)
+        self.assertEqual(data["equipment"]["by_status"]["in-use"], 1)
+        self.assertEqual(data["employees"], {"total": 2, "active": 1})
+        self.assertEqual(data["invoices"]["overdue"], 1)
+        self.assertEqual(data["safety_records"]["total"], 0)
+
+    def test_cache_invalidated_on_save(self):
+        self.assertEqual(self.client.get("/api/dashboard/summary/").json()["projects"]["total"], 0)
+        # The cache read itself is the only query
+        with self.assertNumQueries(1):
+            self.client.get("/api/dashboard/summary/")
+
+        Project.objects.create(name="Bridge")
+
+        self.assertEqual(self.client.get("/api/dashboard/summary/").json()["projects"]["total"], 1)
+
+    def test_cache_invalidated_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(name="Bridge")
+            # A summary rebuilt before the commit holds the uncommitted row
+            self.client.get("/api/dashboard/summary/")
+
+        self.assertIsNone(cache.get(DASHBOARD_CACHE_KEY))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        today = timezone.now().date()
+        # Two rows per day so the id tie-breaker is exercised
+        for offset in range(12):
+            Attendance.objects.create(date=today - timedelta(days=offset // 2))
+
+    def test_page_number_mode_unchanged(self):
+        data = self.client.get("/api/attendance/").json()
+        self.assertEqual(data["count"], 12)
+        self.assertEqual(data["total_pages"], 2)
+
+    def test_cursor_walks_forward_and_back(self):
+        expected = list(Attendance.objects.order_by("-date", "-id").values_list("id", flat=True))
+
+        first = self.client.get("/api/attendance/", {"cursor": "", "page_size": 5}).json()
+        self.assertNotIn("count", first)
+        self.assertIsNone(first["previous"])
+        seen = [row["id"] for row in first["results"]]
+
+        page = first
+        while page["next"]:
+            page = self.client.get(page["next"]).json()
+            seen.extend(row["id"] for row in page["results"])
+        self.assertEqual(seen, expected)
+
+        back = self.client.get(page["previous"]).json()
+        self.assertEqual([row["id"] for row in back["results"]], expected[5:10])
+
+    def test_cursor_count_is_opt_in(self):
+        data = self.client.get("/api/attendance/", {"cursor": "", "count": "true"}).json()
+        self.assertEqual(data["count"], 12)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/attendance/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_keeps_microseconds(self):
+        item = InventoryItem.objects.create(name="Bolts", sku="B-1", warehouse=Warehouse.objects.create(name="Main"))
+        movements = StockMovement.objects.bulk_create(
+            StockMovement(item=item, movement_type="in", quantity=1) for _ in range(20)
+        )
+        moment = timezone.now().replace(microsecond=0)
+        # Four rows per millisecond
+        for n, movement in enumerate(movements):
+            StockMovement.objects.filter(pk=movement.pk).update(movement_date=moment + timedelta(microseconds=n * 250))
+
+        page = self.client.get("/api/stock-movements/", {"cursor": "", "page_size": 5}).json()
+        seen = [row["id"] for row in page["results"]]
+        while page["next"]:
+            page = self.client.get(page["next"]).json()
+            seen.extend(row["id"] for row in page["results"])
+        self.assertEqual(seen, [movement.pk for movement in reversed(movements)])
+
+
+
+@override_settings(PERF_PROFILER_ENABLED=True, PERF_PROFILER_SAMPLE_RATE=1.0, PERF_PROFILER_DUMP_DIR=None)
+class QueryProfilerTests(TestCase):
+    def setUp(self):
+        store.reset()
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_superuser(email="admin@example.com", password="x")
+
+    def test_records_view_actions(self):
+        Task.objects.create(title="Pour slab")
+        self.client.get("/api/tasks/")
+        self.client.get("/api/tasks/")
+        self.client.get("/api/projects/")
+
+        self.client.force_authenticate(self.admin)
+        routes = {row["view"]: row for row in self.client.get("/api/_perf/").json()["routes"]}
+
+        self.assertEqual(routes["TaskViewSet.list"]["requests"], 2)
+        self.assertEqual(routes["ProjectViewSet.list"]["requests"], 1)
+        self.assertGreaterEqual(routes["TaskViewSet.list"]["queries"]["max"], 1)
+
+    def test_report_is_admin_only(self):
+        self.assertIn(self.client.get("/api/_perf/").status_code, (401, 403))
+
+    def test_repeated_statements_flagged_as_n_plus_one(self):
+        profile = RequestProfile()
+        for pk in range(4):
+            profile(lambda *args: None, "SELECT * FROM project WHERE id = %s", [pk], False, {})
+        profile(lambda *args: None, "SELECT COUNT(*) FROM project", [], False, {})
+
+        sample = profile.sample(total_time=0.01, response_bytes=10)
+
+        self.assertEqual(sample["queries"], 5)
+        self.assertEqual(sample["duplicate_queries"], 3)
+        self.assertEqual(sample["n_plus_one"], ["SELECT * FROM project WHERE id = %s"])
+
+    def test_perf_report_command_reads_worker_dumps(self):
+        self.client.get("/api/projects/")
+        out = io.StringIO()
+        with tempfile.TemporaryDirectory() as dump_dir:
+            store.flush(dump_dir)
+            call_command("perf_report", dir=dump_dir, stdout=out)
+        self.assertIn("ProjectViewSet.list", out.getvalue())
+
+    def test_failed_flush_is_logged_once_per_interval(self):
+        with tempfile.NamedTemporaryFile() as not_a_dir:
+            with self.settings(PERF_PROFILER_DUMP_DIR=not_a_dir.name, PERF_PROFILER_FLUSH_INTERVAL=60):
+                store.last_flush -= 60
+                with self.assertLogs("core.profiling", "ERROR") as logs:
+                    store.maybe_flush()
+                    store.maybe_flush()
+        self.assertEqual(len(logs.records), 1)
+
+
+class BulkModelMixinTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.employee = Employee.objects.create(email="crew@example.com")
+
+    def test_bulk_create_in_one_insert(self):
+        payload = [{"employee": self.employee.id, "date": f"2025-03-{day:02d}"} for day in range(1, 21)]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post("/api/attendance/", payload, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 20)
+        self.assertEqual(Attendance.objects.count(), 20)
+        inserts = [q for q in context.captured_queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+
+    def test_bulk_create_rejects_whole_batch_with_item_errors(self):
+        payload = [{"employee": self.employee.id}, {"employee": 999999}, {"status": "bogus"}]
+        response = self.client.post("/api/attendance/", payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([item["index"] for item in response.json()["errors"]], [1, 2])
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_single_object_create_still_works(self):
+        response = self.client.post("/api/tasks/", {"title": "Pour slab"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["title"], "Pour slab")
+
+    def test_bulk_patch_and_delete(self):
+        tasks = [Task.objects.create(title=f"Task {n}") for n in range(3)]
+
+        response = self.client.patch(
+            "/api/tasks/",
+            [{"id": task.id, "status": "completed"} for task in tasks[:2]],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.filter(status="completed").count(), 2)
+
+        response = self.client.patch("/api/tasks/", [{"id": 999999, "status": "completed"}], format="json")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.delete("/api/tasks/", [task.id for task in tasks[1:]], format="json")
+        self.assertEqual(response.json(), {"deleted": 2})
+        self.assertEqual(list(Task.objects.values_list("id", flat=True)), [tasks[0].id])
+
+    def test_bulk_rejects_malformed_ids(self):
+        task = Task.objects.create(title="Keep")
+        for ids in (["abc"], [task.id, {"id": task.id}], [10 ** 20], [None], [True]):
+            response = self.client.delete("/api/tasks/", ids, format="json")
+            self.assertEqual(response.status_code, 400, ids)
+        self.assertEqual(self.client.delete("/api/tasks/", [str(task.id)], format="json").json(), {"deleted": 1})
+
+        task = Task.objects.create(title="Keep")
+        response = self.client.patch("/api/tasks/", [{"id": "abc", "status": "completed"}], format="json")
+        self.assertEqual(response.json(), {"errors": [{"index": 0, "errors": {"id": ["Invalid id."]}}]})
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_benchmark_data_is_rolled_back(self):
+        out = io.StringIO()
+        call_command("match_invoices", benchmark=20, stdout=out)
+        self.assertIn("Matched 20 invoices", out.getvalue())
+        self.assertIn("Benchmark data rolled back", out.getvalue())
+        self.assertFalse(Invoice.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
@@ -1,7 +1,6 @@
 from django.contrib import admin
 from django.http import JsonResponse
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
@@ -15,7 +14,7 @@ from drf_spectacular.views import (
 
 # Import viewsets from each module
 from project_management.views import ProjectViewSet, TaskViewSet, MilestoneViewSet, ProjectDocumentViewSet, ProjectTeamViewSet, UserViewSet, UserListView
-from procurement.views import SupplierViewSet, PurchaseOrderViewSet
+from procurement.views import SupplierViewSet, PurchaseOrderViewSet, PurchaseOrderItemViewSet
 from inventory.views import (
     WarehouseViewSet, 
     InventoryItemViewSet,  # For all items
@@ -23,17 +22,21 @@ from inventory.views import (
     StockViewSet, 
     StockMovementViewSet
 )
-from finance.views import InvoiceViewSet, ExpenseViewSet, PaymentViewSet, BudgetViewSet
-from hr.views import EmployeeViewSet, AttendanceViewSet, PayrollViewSet, LeaveViewSet
+from finance.views import InvoiceViewSet, ExpenseViewSet, PaymentViewSet, BudgetViewSet, cashflow, trial_balance
+from hr.views import (
+    DepartmentViewSet, RoleViewSet, EmployeeViewSet, AttendanceViewSet, PayrollViewSet, PayrollRunViewSet, LeaveViewSet,
+)
 from equipment.views import EquipmentViewSet, EquipmentAssignmentViewSet, EquipmentMaintenanceViewSet
 from site_management.views import SiteViewSet, DailyLogViewSet, SiteInspectionViewSet, SafetyRecordViewSet
 from reports.views import ReportViewSet
+from core.routers import BulkRouter
+from core.views import dashboard_summary, perf_report
 
 # Import Materials viewset - ADD THIS
 from inventory.views import MaterialViewSet  # or wherever your MaterialViewSet is located
 
 # Setup DRF router
-router = DefaultRouter()
+router = BulkRouter()
 
 # Project Management
 router.register(r"projects", ProjectViewSet, basename="projects")
@@ -46,9 +49,10 @@ router.register(r'users', UserViewSet, basename='users')
 # Procurement
 router.register(r"suppliers", SupplierViewSet, basename="suppliers")
 router.register(r"purchase-orders", PurchaseOrderViewSet, basename="purchase_orders")
+router.register(r"purchase-order-items", PurchaseOrderItemViewSet, basename="purchase_order_items")
 
 # Inventory - ADD MATERIALS HERE
-router.register(r"inventory-items", MaterialViewSet, basename="inventory_items")
+router.register(r"inventory-items", InventoryItemViewSet, basename="inventory_items")
 router.register(r"stock-movements", StockMovementViewSet, basename="stock_movements")
 router.register(r"materials", MaterialViewSet, basename="materials")  # ADD THIS LINE
 router.register(r"warehouses", WarehouseViewSet, basename="warehouses")
@@ -61,9 +65,12 @@ router.register(r"payments", PaymentViewSet, basename="payments")
 router.register(r"budgets", BudgetViewSet, basename="budgets")
 
 # Human Resources
+router.register(r"departments", DepartmentViewSet, basename="departments")
+router.register(r"roles", RoleViewSet, basename="roles")
 router.register(r"employees", EmployeeViewSet, basename="employees")
 router.register(r"attendance", AttendanceViewSet, basename="attendance")
 router.register(r"payroll", PayrollViewSet, basename="payroll")
+router.register(r"payroll-runs", PayrollRunViewSet, basename="payroll_runs")
 router.register(r"leaves", LeaveViewSet, basename="leaves")
 
 # Equipment
@@ -96,6 +103,7 @@ def api_root(request):
             "documents": "/api/documents/",
             "suppliers": "/api/suppliers/",
             "purchase_orders": "/api/purchase-orders/",
+            "purchase_order_items": "/api/purchase-order-items/",
             "inventory_items": "/api/inventory-items/",
             "stock_movements": "/api/stock-movements/",
             "materials": "/api/materials/",  # ADD THIS LINE
@@ -103,9 +111,15 @@ def api_root(request):
             "expenses": "/api/expenses/",
             "payments": "/api/payments/",
             "budgets": "/api/budgets/",
+            "trial_balance": "/api/finance/trial-balance/",
+            "cashflow": "/api/finance/cashflow/",
+            "departments": "/api/departments/",
+            "roles": "/api/roles/",
             "employees": "/api/employees/",
+            "employees_by_department": "/api/employees/by-department/",
             "attendance": "/api/attendance/",
             "payroll": "/api/payroll/",
+            "payroll_runs": "/api/payroll-runs/",
             "leaves": "/api/leaves/",
             "equipment": "/api/equipment/",
             "equipment_assignments": "/api/equipment-assignments/",
@@ -114,7 +128,8 @@ def api_root(request):
             "daily_logs": "/api/daily-logs/",
             "site_inspections": "/api/site-inspections/",
             "safety_records": "/api/safety-records/",
-            "reports": "/api/reports/"
+            "reports": "/api/reports/",
+            "dashboard_summary": "/api/dashboard/summary/"
         }
     })
 
@@ -123,6 +138,10 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     
     # API routes
+    path("api/dashboard/summary/", dashboard_summary, name="dashboard-summary"),
+    path("api/_perf/", perf_report, name="perf-report"),
+    path("api/finance/trial-balance/", trial_balance, name="trial-balance"),
+    path("api/finance/cashflow/", cashflow, name="cashflow"),
     path("api/", include(router.urls)),
 
     # JWT Authentication
@@ -1,6 +1,9 @@
+from django.conf import settings
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from .dashboard import get_summary
+from .profiling import SORT_KEYS, store
 from .serializers import UserSerializer
 
 @api_view(["GET"])
@@ -8,3 +11,28 @@ from .serializers import UserSerializer
 def get_current_user(request):
     serializer = UserSerializer(request.user)
     return Response(serializer.data)
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def dashboard_summary(request):
+    """Per-module counts and status breakdowns for the dashboard in one call"""
+    return Response(get_summary())
+
+
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def perf_report(request):
+    """Slowest endpoints seen by this worker's query profiler; DELETE resets the counters"""
+    if request.method == "DELETE":
+        store.reset()
+        return Response(status=204)
+    sort = request.query_params.get("sort", "db")
+    if sort not in SORT_KEYS:
+        return Response({"error": f"sort must be one of {', '.join(SORT_KEYS)}"}, status=400)
+    limit = request.query_params.get("limit")
+    return Response({
+        "enabled": getattr(settings, "PERF_PROFILER_ENABLED", False),
+        "sample_rate": getattr(settings, "PERF_PROFILER_SAMPLE_RATE", 1.0),
+        "routes": store.report(sort=sort, limit=int(limit) if limit and limit.isdigit() else None),
+    })
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_remove_equipment_category_remove_equipment_cost_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['status'], name='equipment_status_idx'),
+        ),
+    ]
@@ -28,6 +28,11 @@ class Equipment(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='equipment_status_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -16,6 +16,7 @@ class EquipmentAssignmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = EquipmentAssignment
         fields = "__all__"
+        select_related = ["equipment", "project", "assigned_to"]
 
 
 class MaintenanceRecordSerializer(serializers.ModelSerializer):
@@ -24,6 +25,7 @@ class MaintenanceRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = MaintenanceRecord
         fields = "__all__"
+        select_related = ["equipment"]
 
 
 class EquipmentUsageLogSerializer(serializers.ModelSerializer):
@@ -34,6 +36,7 @@ class EquipmentUsageLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = EquipmentUsageLog
         fields = "__all__"
+        select_related = ["equipment", "user", "project"]
 
 
 class EquipmentMaintenanceSerializer(serializers.ModelSerializer):
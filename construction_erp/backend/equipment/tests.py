@@ -1,3 +1,23 @@
+from itertools import count
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import CustomUser
+from core.testing import QueryCountAssertionsMixin
+from project_management.models import Project
+from .models import Equipment, EquipmentAssignment
+
+
+class ListQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    def test_equipment_assignments(self):
+        sequence = count()
+
+        def create_assignment():
+            n = next(sequence)
+            EquipmentAssignment.objects.create(
+                equipment=Equipment.objects.create(name=f"Excavator {n}"),
+                project=Project.objects.create(name=f"Project {n}"),
+                assigned_to=CustomUser.objects.create_user(email=f"operator{n}@example.com"),
+            )
+
+        self.assertConstantListQueries("/api/equipment-assignments/", create_assignment)
@@ -2,6 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from core.mixins import RelatedQuerysetMixin
 from .models import Equipment, EquipmentAssignment, EquipmentMaintenance
 from .serializers import (
     EquipmentSerializer,
@@ -46,7 +47,7 @@ class EquipmentViewSet(viewsets.ModelViewSet):
         equipment.save()
         return Response({'status': 'equipment marked for maintenance'})
 
-class EquipmentAssignmentViewSet(viewsets.ModelViewSet):
+class EquipmentAssignmentViewSet(RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for Equipment Assignments
     """
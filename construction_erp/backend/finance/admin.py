@@ -1,13 +1,20 @@
 from django.contrib import admin
-from .models import Invoice, Expense, Payment, Budget
+from .models import Invoice, InvoiceMatch, Expense, Payment, Budget, Account, JournalEntry, JournalLine, AccountBalance, NumberSequence
 
 
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
     list_display = ('invoice_number', 'client', 'amount', 'status', 'due_date', 'created_at')
     list_filter = ('status', 'created_at', 'due_date')
-    search_fields = ('invoice_number', 'client', 'description')
-    readonly_fields = ('created_at', 'updated_at')
+    search_fields = ('invoice_number', 'client', 'description', 'purchase_order_reference')
+    readonly_fields = ('invoice_number', 'created_at', 'updated_at')
+
+
+@admin.register(InvoiceMatch)
+class InvoiceMatchAdmin(admin.ModelAdmin):
+    list_display = ('invoice', 'purchase_order', 'status', 'ordered_quantity', 'received_quantity', 'order_amount', 'invoiced_amount', 'checked_at')
+    list_filter = ('status',)
+    search_fields = ('invoice__invoice_number',)
 
 
 @admin.register(Expense)
@@ -35,3 +42,36 @@ class BudgetAdmin(admin.ModelAdmin):
     search_fields = ('project_name', 'description')
     date_hierarchy = 'start_date'
     readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(Account)
+class AccountAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'account_type')
+    list_filter = ('account_type',)
+    search_fields = ('code', 'name')
+
+
+class JournalLineInline(admin.TabularInline):
+    model = JournalLine
+    extra = 0
+
+
+@admin.register(JournalEntry)
+class JournalEntryAdmin(admin.ModelAdmin):
+    list_display = ('date', 'source_type', 'source_id', 'description', 'created_at')
+    list_filter = ('source_type', 'date')
+    search_fields = ('description',)
+    date_hierarchy = 'date'
+    inlines = [JournalLineInline]
+
+
+@admin.register(AccountBalance)
+class AccountBalanceAdmin(admin.ModelAdmin):
+    list_display = ('account', 'period', 'debit', 'credit', 'debit_to_date', 'credit_to_date')
+    list_filter = ('account', 'period')
+
+
+@admin.register(NumberSequence)
+class NumberSequenceAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'year', 'next_value')
+    list_filter = ('year',)
@@ -0,0 +1,78 @@
+"""
+Accounts-receivable aging.
+
+Open balances (invoice amount net of payments made by ``as_of``) are summed
+and counted per client into age buckets by conditional aggregation, so the
+whole report is one grouped SQL statement whatever the ledger size. Age is
+days past the due date; invoices not yet due (or without one) are "current".
+
+The report is reconstructed as it stood on ``as_of``: an invoice counts if it
+was raised by then and still had a balance after the payments made by then,
+whatever its status today. Only cancelled invoices are left out, along with
+supplier invoices, which are payables.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Invoice, Payment
+
+# (key, oldest age in days, youngest age in days); None leaves that side open
+BUCKETS = (
+    ("current", None, 0),
+    ("1_30", 30, 1),
+    ("31_60", 60, 31),
+    ("61_90", 90, 61),
+    ("over_90", None, 91),
+)
+
+
+def bucket_filter(as_of, oldest, youngest):
+    if youngest == 0:
+        return Q(due_date__isnull=True) | Q(due_date__gte=as_of)
+    condition = Q(due_date__lte=as_of - timedelta(days=youngest))
+    if oldest is not None:
+        condition &= Q(due_date__gte=as_of - timedelta(days=oldest))
+    return condition
+
+
+def aging_report(as_of):
+    """Per-client rows with ``<bucket>_amount``/``<bucket>_count`` and totals, ordered by client"""
+    money = DecimalField(max_digits=16, decimal_places=2)
+    paid = (
+        Payment.objects.filter(invoice=OuterRef("pk"), payment_date__lte=as_of)
+        .order_by()
+        .values("invoice")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    aggregates = {}
+    for key, oldest, youngest in BUCKETS:
+        condition = bucket_filter(as_of, oldest, youngest)
+        aggregates[f"{key}_amount"] = Coalesce(Sum("balance", filter=condition), Value(0), output_field=money)
+        aggregates[f"{key}_count"] = Count("id", filter=condition)
+    aggregates["total_amount"] = Sum("balance", output_field=money)
+    aggregates["total_count"] = Count("id")
+
+    # Today's status says nothing about as_of; the payments up to then decide
+    return (
+        Invoice.objects.receivables().exclude(status="cancelled")
+        .filter(created_at__date__lte=as_of)
+        .annotate(balance=ExpressionWrapper(
+            F("amount") - Coalesce(Subquery(paid, output_field=money), Value(0), output_field=money),
+            output_field=money,
+        ))
+        .filter(balance__gt=0)
+        .order_by()
+        .values("client")
+        .annotate(**aggregates)
+        .order_by("client")
+    )
+
+
+def report_columns():
+    columns = ["client"]
+    for key, _, _ in BUCKETS:
+        columns += [f"{key}_amount", f"{key}_count"]
+    return columns + ["total_amount", "total_count"]
@@ -0,0 +1,244 @@
+"""
+Double-entry general ledger.
+
+Invoices, payments and expenses post to the journal from their save/delete
+signals (finance.signals). Each document maps to the lines it should have on
+the ledger; posting compares them with what is already journalled for that
+document and appends one balanced entry per date with the difference, so the
+journal is append-only and a deleted or cancelled document is reversed
+rather than erased.
+
+Every posted line also updates AccountBalance, one row per account and month
+holding that month's debits/credits and the running totals to date. A trial
+balance therefore reads the latest row per account instead of aggregating the
+journal. Posting locks the accounts it touches, in id order, before changing
+their balances, so a month opened with the totals of the month before cannot
+miss a concurrent posting into that earlier month. Revenue and expense accounts are not closed into equity at year end;
+their balances run from the first posting.
+
+Supplier invoices (Invoice.is_payable) are bills: they book the expense against
+accounts payable, and payments against them settle payables out of cash. Every
+other invoice is a receivable.
+
+Bulk writes (bulk_create, QuerySet.update) bypass the signals; run the
+rebuild_ledger command after loading data that way.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .models import Account, AccountBalance, Expense, Invoice, JournalEntry, JournalLine, Payment
+
+CASH = '1000'
+RECEIVABLE = '1100'
+PAYABLE = '2000'
+UNAPPLIED_RECEIPTS = '2100'
+REVENUE = '4000'
+EXPENSES = '5000'
+
+CHART = {
+    CASH: ('Cash at bank', 'asset'),
+    RECEIVABLE: ('Accounts receivable', 'asset'),
+    PAYABLE: ('Accounts payable', 'liability'),
+    UNAPPLIED_RECEIPTS: ('Unapplied customer receipts', 'liability'),
+    REVENUE: ('Revenue', 'revenue'),
+    EXPENSES: ('Operating expenses', 'expense'),
+}
+
+SOURCE_TYPES = {Invoice: 'invoice', Payment: 'payment', Expense: 'expense'}
+
+
+def month_of(day):
+    return day.replace(day=1)
+
+
+def local_day(value):
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def postings(document):
+    """{(date, account code): signed amount} a document should carry; debits are positive"""
+    amount = Decimal(str(document.amount))
+    if isinstance(document, Invoice):
+        if document.status == 'cancelled':
+            return {}
+        day = local_day(document.created_at)
+        if document.is_payable:
+            return {(day, EXPENSES): amount, (day, PAYABLE): -amount}
+        return {(day, RECEIVABLE): amount, (day, REVENUE): -amount}
+    if isinstance(document, Payment):
+        day = document.payment_date
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        elif isinstance(day, datetime):
+            # The field defaults to timezone.now, so unsaved-then-saved instances hold a datetime
+            day = local_day(day)
+        if document.invoice_id and document.invoice.is_payable:
+            return {(day, PAYABLE): amount, (day, CASH): -amount}
+        # Receipts not applied to an invoice are owed back until they are
+        settled = RECEIVABLE if document.invoice_id else UNAPPLIED_RECEIPTS
+        return {(day, CASH): amount, (day, settled): -amount}
+    day = local_day(document.created_at)
+    return {(day, EXPENSES): amount, (day, CASH): -amount}
+
+
+def accounts():
+    """{code: id} for the chart of accounts, creating any account still missing"""
+    ids = dict(Account.objects.filter(code__in=CHART).values_list('code', 'id'))
+    for code, (name, account_type) in CHART.items():
+        if code not in ids:
+            ids[code] = Account.objects.get_or_create(
+                code=code, defaults={'name': name, 'account_type': account_type},
+            )[0].id
+    return ids
+
+
+def apply_balance(account_id, period, debit, credit):
+    """Add a line to the account's balances; the caller holds the account's row lock"""
+    updated = AccountBalance.objects.filter(account_id=account_id, period=period).update(
+        debit=F('debit') + debit, credit=F('credit') + credit,
+    )
+    if not updated:
+        previous = (
+            AccountBalance.objects.filter(account_id=account_id, period__lt=period)
+            .order_by('-period').values('debit_to_date', 'credit_to_date').first()
+        ) or {}
+        AccountBalance.objects.create(
+            account_id=account_id, period=period, debit=debit, credit=credit,
+            debit_to_date=previous.get('debit_to_date', 0), credit_to_date=previous.get('credit_to_date', 0),
+        )
+    # Later periods carry this posting in their running totals too
+    AccountBalance.objects.filter(account_id=account_id, period__gte=period).update(
+        debit_to_date=F('debit_to_date') + debit, credit_to_date=F('credit_to_date') + credit,
+    )
+
+
+@transaction.atomic
+def post(document, deleted=False):
+    """Journal the difference between a document's postings and its ledger; returns the new entries"""
+    source_type = SOURCE_TYPES[type(document)]
+    wanted = {} if deleted else postings(document)
+    posted = (
+        JournalLine.objects.filter(entry__source_type=source_type, entry__source_id=document.pk)
+        .values_list('entry__date', 'account__code')
+        .annotate(debit=Sum('debit'), credit=Sum('credit'))
+    )
+    difference = defaultdict(int, wanted)
+    for day, code, debit, credit in posted:
+        difference[(day, code)] -= debit - credit
+
+    by_day = defaultdict(dict)
+    for (day, code), amount in difference.items():
+        if amount:
+            by_day[day][code] = amount
+    if not by_day:
+        return []
+
+    ids = accounts()
+    # Balances change under the accounts' row locks, taken in id order so postings cannot deadlock
+    touched = sorted({ids[code] for amounts in by_day.values() for code in amounts})
+    list(Account.objects.select_for_update().filter(pk__in=touched).order_by('pk').values_list('pk', flat=True))
+    description = f"{'Reversal of ' if deleted else ''}{document}"[:255]
+    entries = []
+    for day, amounts in sorted(by_day.items()):
+        entry = JournalEntry.objects.create(
+            date=day, source_type=source_type, source_id=document.pk, description=description,
+        )
+        lines = [
+            JournalLine(entry=entry, account_id=ids[code], debit=max(amount, 0), credit=max(-amount, 0))
+            for code, amount in amounts.items()
+        ]
+        JournalLine.objects.bulk_create(lines)
+        for line in lines:
+            apply_balance(line.account_id, month_of(day), line.debit, line.credit)
+        entries.append(entry)
+    return entries
+
+
+@transaction.atomic
+def rebuild_ledger(batch_size=5000):
+    """Discard the journal and balances and post every document again; returns the entry count"""
+    AccountBalance.objects.all().delete()
+    JournalLine.objects.all().delete()
+    JournalEntry.objects.all().delete()
+    ids = accounts()
+
+    totals = defaultdict(lambda: [0, 0])
+    pending = []
+    count = 0
+
+    def flush():
+        JournalEntry.objects.bulk_create([entry for entry, _ in pending], batch_size=batch_size)
+        JournalLine.objects.bulk_create(
+            [JournalLine(entry=entry, **line) for entry, lines in pending for line in lines],
+            batch_size=batch_size,
+        )
+        pending.clear()
+
+    for model, source_type in SOURCE_TYPES.items():
+        documents = model.objects.order_by('pk')
+        if model is Payment:
+            documents = documents.select_related('invoice')
+        for document in documents.iterator(chunk_size=batch_size):
+            by_day = defaultdict(dict)
+            for (day, code), amount in postings(document).items():
+                if amount:
+                    by_day[day][code] = amount
+            for day, amounts in by_day.items():
+                lines = []
+                for code, amount in amounts.items():
+                    debit, credit = max(amount, 0), max(-amount, 0)
+                    lines.append({'account_id': ids[code], 'debit': debit, 'credit': credit})
+                    total = totals[(ids[code], month_of(day))]
+                    total[0] += debit
+                    total[1] += credit
+                entry = JournalEntry(
+                    date=day, source_type=source_type, source_id=document.pk, description=str(document)[:255],
+                )
+                pending.append((entry, lines))
+                count += 1
+            if len(pending) >= batch_size:
+                flush()
+    flush()
+
+    balances = []
+    running = defaultdict(lambda: [0, 0])
+    for (account_id, period), (debit, credit) in sorted(totals.items(), key=lambda item: (item[0][1], item[0][0])):
+        to_date = running[account_id]
+        to_date[0] += debit
+        to_date[1] += credit
+        balances.append(AccountBalance(
+            account_id=account_id, period=period, debit=debit, credit=credit,
+            debit_to_date=to_date[0], credit_to_date=to_date[1],
+        ))
+    AccountBalance.objects.bulk_create(balances, batch_size=batch_size)
+    return count
+
+
+def trial_balance(period):
+    """Rows per account for the month containing ``period``: its activity and the closing balance"""
+    period = month_of(period)
+    latest = AccountBalance.objects.filter(account=OuterRef('pk'), period__lte=period).order_by('-period')
+    current = AccountBalance.objects.filter(account=OuterRef('pk'), period=period)
+    rows = Account.objects.annotate(
+        period_debit=Subquery(current.values('debit')[:1]),
+        period_credit=Subquery(current.values('credit')[:1]),
+        debit_to_date=Subquery(latest.values('debit_to_date')[:1]),
+        credit_to_date=Subquery(latest.values('credit_to_date')[:1]),
+    ).order_by('code').values(
+        'code', 'name', 'account_type', 'period_debit', 'period_credit', 'debit_to_date', 'credit_to_date',
+    )
+
+    report = []
+    for row in rows:
+        balance = (row.pop('debit_to_date') or 0) - (row.pop('credit_to_date') or 0)
+        row['period_debit'] = row['period_debit'] or 0
+        row['period_credit'] = row['period_credit'] or 0
+        row['debit'] = max(balance, 0)
+        row['credit'] = max(-balance, 0)
+        report.append(row)
+    return report
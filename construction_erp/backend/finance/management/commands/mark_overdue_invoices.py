@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from finance.overdue import mark_overdue_invoices
+
+
+class Command(BaseCommand):
+    help = "Flip pending invoices past their due date to overdue (run daily from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", help="Cut-off day (YYYY-MM-DD); invoices due before it become overdue")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options["as_of"]:
+            as_of = parse_date(options["as_of"])
+            if as_of is None:
+                raise CommandError("--as-of must be YYYY-MM-DD")
+        count = mark_overdue_invoices(as_of)
+        self.stdout.write(self.style.SUCCESS(f"Marked {count} invoices overdue"))
@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+from django.core.management.base import CommandError
+from django.utils.dateparse import parse_date
+
+from core.benchmarks import BenchmarkCommand
+from finance.matching import match_invoices, open_supplier_invoices
+from finance.models import Invoice
+from inventory.models import InventoryItem, StockMovement, Warehouse
+from procurement.models import PurchaseOrder, Supplier
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Three-way match open invoices against purchase orders and receipts. "
+        "--benchmark N times a run over N synthetic orders, receipts and invoices "
+        "each, inside a transaction that is rolled back afterwards."
+    )
+
+    benchmark_help = "Seed this many documents of each kind, time the run and roll back"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--since", help="Only invoices created on or after this day (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            return self.run_benchmark(options["benchmark"])
+
+        invoices = open_supplier_invoices()
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("--since must be YYYY-MM-DD")
+            invoices = invoices.filter(created_at__date__gte=since)
+
+        summary = match_invoices(invoices)
+        for match_status, count in sorted(summary.items()):
+            self.stdout.write(f"{match_status}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Matched {sum(summary.values())} invoices"))
+
+    def benchmark(self, count):
+        self.stdout.write(f"Seeding {count} purchase orders, receipts and invoices...")
+        rng = self.rng
+        suppliers = self.seed(Supplier, (Supplier(name=f"Bench supplier {n}") for n in range(200)))
+        warehouse = Warehouse.objects.create(name="Matching benchmark")
+        item = InventoryItem.objects.create(name="Bench item", sku="MATCH-BENCH", warehouse=warehouse)
+
+        orders = self.seed(PurchaseOrder, (
+            PurchaseOrder(
+                title=f"Bench order {n}", supplier=rng.choice(suppliers), status="approved",
+                quantity=rng.randint(1, 100), unit_price=Decimal(rng.randint(100, 10000)) / 100,
+            )
+            for n in range(count)
+        ))
+        # Receipts are inserted directly; only their references matter here
+        self.seed(StockMovement, (
+            StockMovement(
+                item=item, warehouse=warehouse, movement_type="in", reference=order.reference,
+                quantity=order.quantity if rng.random() < 0.95 else max(order.quantity - 1, 1),
+            )
+            for order in orders
+        ))
+        self.seed(Invoice, (
+            Invoice(
+                invoice_number=f"MATCH-BENCH-{n}", client=order.supplier.name, supplier=order.supplier,
+                purchase_order_reference=order.reference if rng.random() < 0.9 else None,
+                amount=order.quantity * order.unit_price * (1 if rng.random() < 0.95 else 2),
+            )
+            for n, order in enumerate(orders)
+        ))
+
+        summary, seconds = self.timed(match_invoices)
+        self.stdout.write(f"Matched {sum(summary.values())} invoices in {seconds:.1f}s: {summary}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from finance.ledger import rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = "Repost every invoice, payment and expense to a fresh journal and account balances (backfill or repair)"
+
+    def handle(self, *args, **options):
+        entries = rebuild_ledger()
+        self.stdout.write(self.style.SUCCESS(f"Posted {entries} journal entries"))
@@ -0,0 +1,168 @@
+"""
+Three-way matching of supplier invoices against purchase orders and receipts.
+
+A batch run loads its documents with one query per kind and joins them in
+memory through hash indexes, so matching costs O(documents) and no query is
+issued per invoice:
+
+- open purchase orders by reference ("PO-<id>") and by (supplier, amount),
+- receipts (incoming StockMovements) summed per purchase order reference,
+- invoiced amounts per purchase order, from this batch plus earlier matches.
+
+Only supplier invoices are matched: those with a supplier or a purchase order
+reference. Client invoices are receivables and never get a match row. Free
+text references must carry the PO prefix ("PO 7", "po#0007"); a bare number
+is left as it is.
+
+Each invoice in scope gets one InvoiceMatch row with the first failing check:
+no purchase order, supplier mismatch, nothing received, short receipt, the
+order over-invoiced, or a sole invoice not matching the order amount.
+Tolerances are fractions of the ordered quantity/amount, configurable with
+THREE_WAY_MATCH_QUANTITY_TOLERANCE and THREE_WAY_MATCH_AMOUNT_TOLERANCE.
+"""
+import re
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from inventory.models import StockMovement
+from procurement.models import PurchaseOrder
+
+from .models import Invoice, InvoiceMatch
+
+OPEN_INVOICE_STATUSES = ('pending', 'overdue')
+REFERENCE_PATTERN = re.compile(r'^PO[\s#-]*0*(\d+)$', re.IGNORECASE)
+
+
+def normalize_reference(value):
+    """Canonical "PO-<id>" for the ways people write a PO reference, else the cleaned text"""
+    if not value:
+        return None
+    value = value.strip()
+    found = REFERENCE_PATTERN.match(value)
+    return f"PO-{int(found.group(1))}" if found else value.upper()
+
+
+def tolerances():
+    return (
+        Decimal(str(getattr(settings, 'THREE_WAY_MATCH_QUANTITY_TOLERANCE', 0))),
+        Decimal(str(getattr(settings, 'THREE_WAY_MATCH_AMOUNT_TOLERANCE', '0.02'))),
+    )
+
+
+class Matcher:
+    batch_size = 5000
+
+    def __init__(self, invoices):
+        self.scope = invoices.values('pk')
+        self.invoices = list(invoices.values('id', 'supplier_id', 'purchase_order_reference', 'amount'))
+        self.quantity_tolerance, self.amount_tolerance = tolerances()
+
+    def load_orders(self):
+        self.orders = {}
+        self.orders_by_amount = defaultdict(list)
+        rows = (
+            PurchaseOrder.objects.exclude(status='cancelled')
+            .with_totals().with_quantities()
+            .values_list('id', 'supplier_id', 'total_amount', 'total_quantity')
+        )
+        for order_id, supplier_id, amount, quantity in rows.iterator(chunk_size=self.batch_size):
+            self.orders[f"PO-{order_id}"] = (order_id, supplier_id, amount, quantity)
+            self.orders_by_amount[(supplier_id, amount)].append(order_id)
+
+    def load_receipts(self):
+        self.received = defaultdict(int)
+        rows = (
+            StockMovement.objects.filter(movement_type='in').exclude(reference__isnull=True).exclude(reference='')
+            .order_by().values('reference').annotate(quantity=Sum('quantity'))
+            .values_list('reference', 'quantity')
+        )
+        for reference, quantity in rows:
+            self.received[normalize_reference(reference)] += quantity
+
+    def find_order(self, invoice):
+        reference = normalize_reference(invoice['purchase_order_reference'])
+        if reference:
+            return self.orders.get(reference)
+        # Without a reference, accept a single open order of the same supplier and amount
+        candidates = self.orders_by_amount.get((invoice['supplier_id'], invoice['amount']), ())
+        if invoice['supplier_id'] is not None and len(candidates) == 1:
+            return self.orders[f"PO-{candidates[0]}"]
+        return None
+
+    def run(self):
+        self.load_orders()
+        self.load_receipts()
+
+        paired = [(invoice, self.find_order(invoice)) for invoice in self.invoices]
+
+        # Earlier matches of invoices outside this batch still count towards each order
+        invoiced = defaultdict(Decimal)
+        invoice_counts = defaultdict(int)
+        earlier = (
+            InvoiceMatch.objects.filter(purchase_order__isnull=False)
+            .exclude(invoice__status='cancelled')
+            .exclude(invoice_id__in=self.scope)
+            .values('purchase_order_id').annotate(total=Sum('invoice__amount'), invoices=Count('id'))
+        )
+        for row in earlier.iterator(chunk_size=self.batch_size):
+            invoiced[row['purchase_order_id']] += row['total']
+            invoice_counts[row['purchase_order_id']] += row['invoices']
+        for invoice, order in paired:
+            if order is not None:
+                invoiced[order[0]] += invoice['amount']
+                invoice_counts[order[0]] += 1
+
+        matches = [self.check(invoice, order, invoiced, invoice_counts) for invoice, order in paired]
+        ids = [invoice['id'] for invoice in self.invoices]
+        for start in range(0, len(ids), self.batch_size):
+            InvoiceMatch.objects.filter(invoice_id__in=ids[start:start + self.batch_size]).delete()
+        InvoiceMatch.objects.bulk_create(matches, batch_size=self.batch_size)
+
+        summary = defaultdict(int)
+        for match in matches:
+            summary[match.status] += 1
+        return dict(summary)
+
+    def check(self, invoice, order, invoiced, invoice_counts):
+        match = InvoiceMatch(invoice_id=invoice['id'], status='matched')
+        if order is None:
+            match.status = 'no_purchase_order'
+            return match
+
+        order_id, supplier_id, amount, quantity = order
+        received = self.received.get(f"PO-{order_id}", 0)
+        match.purchase_order_id = order_id
+        match.ordered_quantity = quantity
+        match.received_quantity = received
+        match.order_amount = amount
+        match.invoiced_amount = invoiced[order_id]
+
+        if invoice['supplier_id'] is not None and invoice['supplier_id'] != supplier_id:
+            match.status = 'supplier_mismatch'
+        elif not received:
+            match.status = 'not_received'
+        elif received < quantity * (1 - self.quantity_tolerance):
+            match.status = 'quantity_mismatch'
+        elif invoiced[order_id] > amount * (1 + self.amount_tolerance):
+            match.status = 'over_invoiced'
+        elif invoice_counts[order_id] == 1 and abs(invoice['amount'] - amount) > amount * self.amount_tolerance:
+            match.status = 'amount_mismatch'
+        return match
+
+
+def open_supplier_invoices():
+    return Invoice.objects.payables().filter(status__in=OPEN_INVOICE_STATUSES)
+
+
+@transaction.atomic
+def match_invoices(invoices=None):
+    """Match open supplier invoices (or the given queryset) and return {status: count}"""
+    if invoices is None:
+        invoices = open_supplier_invoices()
+        # Client invoices matched by earlier runs are not exceptions
+        InvoiceMatch.objects.exclude(invoice__in=Invoice.objects.payables()).delete()
+    return Matcher(invoices).run()
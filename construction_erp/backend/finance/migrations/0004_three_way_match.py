@@ -0,0 +1,42 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_hot_column_indexes'),
+        ('procurement', '0004_supplier_scorecard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='purchase_order_reference',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='supplier',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invoices', to='procurement.supplier'),
+        ),
+        migrations.CreateModel(
+            name='InvoiceMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('matched', 'Matched'), ('no_purchase_order', 'No purchase order'), ('supplier_mismatch', 'Supplier mismatch'), ('not_received', 'Not received'), ('quantity_mismatch', 'Quantity mismatch'), ('over_invoiced', 'Over invoiced'), ('amount_mismatch', 'Amount mismatch')], max_length=30)),
+                ('ordered_quantity', models.PositiveIntegerField(default=0)),
+                ('received_quantity', models.PositiveIntegerField(default=0)),
+                ('order_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('invoiced_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+                ('invoice', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='match', to='finance.invoice')),
+                ('purchase_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invoice_matches', to='procurement.purchaseorder')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status'], name='invoicematch_status_idx')],
+            },
+        ),
+    ]
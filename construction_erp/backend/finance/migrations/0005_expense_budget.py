@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_three_way_match'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='budget',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expenses', to='finance.budget'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:10
+
+import re
+
+from django.db import migrations
+
+# The default INVOICE_NUMBER_FORMAT, '{prefix}-{year}-{number:06d}'
+ISSUED = re.compile(r'^(?P<prefix>.+)-(?P<year>\d{4})-(?P<number>\d+)$')
+
+
+def catch_up(apps, schema_editor):
+    """Move every counter past the numbers already issued
+
+    Block numbering on PostgreSQL used to draw from native sequences that the
+    NumberSequence counters never saw. Both modes now share the counter, so it
+    has to start after the highest issued number of its prefix and year.
+    """
+    Invoice = apps.get_model('finance', 'Invoice')
+    NumberSequence = apps.get_model('finance', 'NumberSequence')
+    highest = {}
+    for number in Invoice.objects.values_list('invoice_number', flat=True).iterator():
+        match = ISSUED.match(number or '')
+        if match:
+            key = (match['prefix'], int(match['year']))
+            highest[key] = max(highest.get(key, 0), int(match['number']))
+    for (prefix, year), number in highest.items():
+        sequence, _ = NumberSequence.objects.get_or_create(prefix=prefix, year=year)
+        if sequence.next_value <= number:
+            NumberSequence.objects.filter(pk=sequence.pk).update(next_value=number + 1)
+
+    if schema_editor.connection.vendor == 'postgresql':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname FROM pg_class WHERE relkind = 'S' AND relname LIKE %s", [r'invoice\_number\_%'],
+            )
+            for name, in cursor.fetchall():
+                cursor.execute(f"DROP SEQUENCE IF EXISTS {schema_editor.quote_name(name)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_invoice_numbering'),
+    ]
+
+    operations = [
+        migrations.RunPython(catch_up, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,27 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from project_management.models import Project
-from procurement.models import Supplier
+from procurement.models import PurchaseOrder, Supplier
 from django.utils import timezone
 
 
+class InvoiceQuerySet(models.QuerySet):
+    # Supplier invoices are payables: they name a supplier or quote the purchase
+    # order they bill. Every other invoice is a client invoice, a receivable.
+    PAYABLE = models.Q(supplier__isnull=False) | (
+        models.Q(purchase_order_reference__isnull=False) & ~models.Q(purchase_order_reference='')
+    )
+    RECEIVABLE = models.Q(supplier__isnull=True) & (
+        models.Q(purchase_order_reference__isnull=True) | models.Q(purchase_order_reference='')
+    )
+
+    def payables(self):
+        return self.filter(self.PAYABLE)
+
+    def receivables(self):
+        return self.filter(self.RECEIVABLE)
+
+
 class Invoice(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -13,26 +30,95 @@ class Invoice(models.Model):
         ('cancelled', 'Cancelled'),
     ]
     
-    invoice_number = models.CharField(max_length=100, unique=True)
+    # Left blank, save() allocates the next number from finance.numbering
+    invoice_number = models.CharField(max_length=100, unique=True, blank=True)
     client = models.CharField(max_length=200)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     due_date = models.DateField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     description = models.TextField(blank=True, null=True)
+    # Supplier invoices quote the purchase order they bill, e.g. "PO-42"
+    supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, blank=True, related_name='invoices')
+    purchase_order_reference = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvoiceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='invoice_status_due_idx'),
+            # Only pending invoices can become overdue, so keep that index small
+            models.Index(fields=['due_date'], name='invoice_pending_due_idx', condition=models.Q(status='pending')),
+        ]
+
     def __str__(self):
         return f"{self.invoice_number} - {self.client}"
 
+    @property
+    def is_payable(self):
+        """InvoiceQuerySet.PAYABLE for a loaded invoice"""
+        return bool(self.supplier_id or self.purchase_order_reference)
+
+    def save(self, *args, **kwargs):
+        if self.invoice_number:
+            return super().save(*args, **kwargs)
+        from .numbering import next_number
+
+        # A gapless number stays locked until this insert commits, and is
+        # released again if it fails
+        with transaction.atomic():
+            self.invoice_number = next_number()
+            super().save(*args, **kwargs)
+
+
+class InvoiceMatch(models.Model):
+    """Latest three-way match result (purchase order, receipts, invoice) for an invoice"""
+    STATUS_CHOICES = [
+        ('matched', 'Matched'),
+        ('no_purchase_order', 'No purchase order'),
+        ('supplier_mismatch', 'Supplier mismatch'),
+        ('not_received', 'Not received'),
+        ('quantity_mismatch', 'Quantity mismatch'),
+        ('over_invoiced', 'Over invoiced'),
+        ('amount_mismatch', 'Amount mismatch'),
+    ]
+
+    invoice = models.OneToOneField(Invoice, on_delete=models.CASCADE, related_name='match')
+    purchase_order = models.ForeignKey(
+        PurchaseOrder, on_delete=models.SET_NULL, null=True, blank=True, related_name='invoice_matches',
+    )
+    status = models.CharField(max_length=30, choices=STATUS_CHOICES)
+    ordered_quantity = models.PositiveIntegerField(default=0)
+    received_quantity = models.PositiveIntegerField(default=0)
+    order_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    # Everything invoiced against the purchase order, this invoice included
+    invoiced_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='invoicematch_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.invoice.invoice_number}: {self.status}"
+
 
 class Expense(models.Model):
     description = models.CharField(max_length=255)
     category = models.CharField(max_length=100, blank=True, null=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
+    # Linked expenses roll up into Budget.spent_amount (see finance.signals)
+    budget = models.ForeignKey('Budget', on_delete=models.SET_NULL, null=True, blank=True, related_name='expenses')
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['category'], name='expense_category_idx'),
+        ]
+
     def __str__(self):
         return f"{self.description} - ${self.amount}"
 
@@ -60,4 +146,99 @@ class Budget(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.project_name} - ${self.allocated_amount}"
\ No newline at end of file
+        return f"{self.project_name} - ${self.allocated_amount}"
+
+    @property
+    def remaining_budget(self):
+        return self.allocated_amount - self.spent_amount
+
+class Account(models.Model):
+    """General ledger account; finance.ledger creates its chart of accounts on first use"""
+    TYPE_CHOICES = [
+        ('asset', 'Asset'),
+        ('liability', 'Liability'),
+        ('equity', 'Equity'),
+        ('revenue', 'Revenue'),
+        ('expense', 'Expense'),
+    ]
+
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=200)
+    account_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+
+    class Meta:
+        ordering = ['code']
+
+    def __str__(self):
+        return f"{self.code} {self.name}"
+
+
+class JournalEntry(models.Model):
+    """Balanced journal entry posted for a change to an invoice, payment or expense"""
+    SOURCE_CHOICES = [
+        ('invoice', 'Invoice'),
+        ('payment', 'Payment'),
+        ('expense', 'Expense'),
+    ]
+
+    date = models.DateField()
+    source_type = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    # Sources may be deleted later; their reversing entries keep the id
+    source_id = models.PositiveIntegerField()
+    description = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['source_type', 'source_id'], name='journalentry_source_idx'),
+            models.Index(fields=['date'], name='journalentry_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.source_type} #{self.source_id}"
+
+
+class JournalLine(models.Model):
+    entry = models.ForeignKey(JournalEntry, on_delete=models.CASCADE, related_name='lines')
+    account = models.ForeignKey(Account, on_delete=models.PROTECT, related_name='journal_lines')
+    debit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    credit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.account.code} Dr {self.debit} Cr {self.credit}"
+
+
+class AccountBalance(models.Model):
+    """Per-account, per-month totals kept up to date as journal lines are posted"""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='balances')
+    # First day of the month
+    period = models.DateField()
+    debit = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    credit = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    # Running totals from the first posting up to and including this period
+    debit_to_date = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    credit_to_date = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'period'], name='accountbalance_account_period_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.account.code} {self.period:%Y-%m}"
+
+
+class NumberSequence(models.Model):
+    """Counter behind server-allocated document numbers, one per prefix and year"""
+    prefix = models.CharField(max_length=20)
+    year = models.PositiveIntegerField()
+    # Next number to hand out
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['prefix', 'year'], name='numbersequence_prefix_year_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.prefix} {self.year}: next {self.next_value}"
@@ -0,0 +1,31 @@
+"""
+Pending -> overdue transition.
+
+One set-based UPDATE flips every pending invoice whose due date has passed,
+so reads can filter on the indexed status instead of comparing due dates on
+every request. Run it daily from cron (the mark_overdue_invoices command) or
+call mark_overdue_invoices() from an in-process scheduler.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Invoice
+from .signals import invoices_marked_overdue
+
+logger = logging.getLogger(__name__)
+
+
+def mark_overdue_invoices(as_of=None):
+    """Flip pending invoices due before ``as_of`` (default today) to overdue; returns the row count"""
+    as_of = as_of or timezone.localdate()
+    with transaction.atomic():
+        # Served by the partial invoice_pending_due_idx index
+        count = Invoice.objects.filter(status="pending", due_date__lt=as_of).update(
+            status="overdue", updated_at=timezone.now(),
+        )
+    logger.info("Marked %d invoices overdue (due before %s)", count, as_of)
+    if count:
+        invoices_marked_overdue.send(sender=Invoice, count=count, as_of=as_of)
+    return count
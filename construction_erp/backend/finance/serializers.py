@@ -1,11 +1,23 @@
 from rest_framework import serializers
-from .models import Invoice, Expense, Payment, Budget
+from .models import Invoice, InvoiceMatch, Expense, Payment, Budget
 
 
 class InvoiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoice
         fields = "__all__"
+        # Allocated by finance.numbering; a client-chosen number could collide with the series
+        read_only_fields = ("invoice_number",)
+
+
+class InvoiceMatchSerializer(serializers.ModelSerializer):
+    invoice_number = serializers.CharField(source="invoice.invoice_number", read_only=True)
+    invoice_amount = serializers.DecimalField(source="invoice.amount", max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = InvoiceMatch
+        fields = "__all__"
+        select_related = ["invoice"]
 
 
 class ExpenseSerializer(serializers.ModelSerializer):
@@ -28,3 +40,5 @@ class BudgetSerializer(serializers.ModelSerializer):
     class Meta:
         model = Budget
         fields = "__all__"
+        # Maintained from linked expenses by finance.signals
+        read_only_fields = ["spent_amount"]
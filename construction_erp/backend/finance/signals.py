@@ -0,0 +1,58 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal
+from django.utils import timezone
+
+from . import ledger
+from .models import Budget, Expense, Invoice, Payment
+
+# Sent by finance.overdue.mark_overdue_invoices after a run that changed rows,
+# with ``count`` (invoices flipped) and ``as_of`` (the cut-off date)
+invoices_marked_overdue = Signal()
+
+
+def add_to_budget(budget_id, delta):
+    if budget_id is not None and delta:
+        Budget.objects.filter(pk=budget_id).update(
+            spent_amount=F('spent_amount') + delta, updated_at=timezone.now(),
+        )
+
+
+def remember_expense(sender, instance, **kwargs):
+    """Capture the stored budget and amount so the save can apply a delta"""
+    stored = None
+    if instance.pk:
+        stored = Expense.objects.filter(pk=instance.pk).values_list('budget_id', 'amount').first()
+    instance._budget_before = stored or (None, 0)
+
+
+def roll_up_expense(sender, instance, **kwargs):
+    budget_id, amount = getattr(instance, '_budget_before', (None, 0))
+    if budget_id == instance.budget_id:
+        add_to_budget(budget_id, instance.amount - amount)
+    else:
+        add_to_budget(budget_id, -amount)
+        add_to_budget(instance.budget_id, instance.amount)
+    instance._budget_before = (instance.budget_id, instance.amount)
+
+
+def remove_expense(sender, instance, **kwargs):
+    add_to_budget(instance.budget_id, -instance.amount)
+
+
+pre_save.connect(remember_expense, sender=Expense, dispatch_uid='budget_expense_pre_save')
+post_save.connect(roll_up_expense, sender=Expense, dispatch_uid='budget_expense_post_save')
+post_delete.connect(remove_expense, sender=Expense, dispatch_uid='budget_expense_post_delete')
+
+
+def post_to_ledger(sender, instance, **kwargs):
+    ledger.post(instance)
+
+
+def reverse_from_ledger(sender, instance, **kwargs):
+    ledger.post(instance, deleted=True)
+
+
+for model in (Invoice, Payment, Expense):
+    post_save.connect(post_to_ledger, sender=model, dispatch_uid=f'ledger_{model._meta.model_name}_post_save')
+    post_delete.connect(reverse_from_ledger, sender=model, dispatch_uid=f'ledger_{model._meta.model_name}_post_delete')
@@ -1,3 +1,520 @@
-from django.test import TestCase
+import io
+import threading
+from unittest import mock
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from hr.models import Employee, Payroll
+from inventory.models import InventoryItem, StockMovement, Warehouse
+from procurement.models import PurchaseOrder, PurchaseOrderItem, Supplier
+
+from .cashflow import forecast, parse_delays
+from .ledger import CASH, EXPENSES, PAYABLE, RECEIVABLE, REVENUE, UNAPPLIED_RECEIPTS
+from .numbering import next_number, reset_blocks
+from .matching import match_invoices, normalize_reference
+from .overdue import mark_overdue_invoices
+from .signals import invoices_marked_overdue
+from .views import BudgetViewSet
+from .models import AccountBalance, Budget, Expense, Invoice, InvoiceMatch, JournalEntry, JournalLine, Payment
+
+
+class ThreeWayMatchTests(TestCase):
+    def setUp(self):
+        self.acme = Supplier.objects.create(name="Acme")
+        self.bolt = Supplier.objects.create(name="Bolt")
+        warehouse = Warehouse.objects.create(name="Main")
+        self.item = InventoryItem.objects.create(name="Steel", sku="ST-1", warehouse=warehouse)
+        self.order = PurchaseOrder.objects.create(supplier=self.acme, status="approved")
+        PurchaseOrderItem.objects.create(purchase_order=self.order, description="Beams", quantity=10, unit_price=50)
+        self.counter = 0
+
+    def receive(self, quantity, reference=None):
+        StockMovement.objects.create(
+            item=self.item, movement_type="in", quantity=quantity, reference=reference or self.order.reference,
+        )
+
+    def invoice(self, amount, reference=None, supplier=None, **fields):
+        self.counter += 1
+        return Invoice.objects.create(
+            invoice_number=f"INV-{self.counter}", client="Acme", amount=amount,
+            supplier=supplier or self.acme, purchase_order_reference=reference, **fields
+        )
+
+    def status(self, invoice):
+        return InvoiceMatch.objects.get(invoice=invoice).status
+
+    def test_normalize_reference(self):
+        for value in ("PO-7", "po 7", "po#0007", " PO#7 "):
+            self.assertEqual(normalize_reference(value), "PO-7")
+        self.assertEqual(normalize_reference("abc-1"), "ABC-1")
+        # Bare numbers are not purchase orders
+        self.assertEqual(normalize_reference("7"), "7")
+        self.assertEqual(normalize_reference("#0007"), "#0007")
+        self.assertIsNone(normalize_reference(""))
+
+    def test_match_by_reference_with_tolerance(self):
+        self.receive(6, reference=f"po {self.order.pk}")
+        self.receive(4)
+        invoice = self.invoice("505.00", reference=f"PO{self.order.pk}")
+        self.assertEqual(match_invoices(), {"matched": 1})
+        match = InvoiceMatch.objects.get(invoice=invoice)
+        self.assertEqual((match.purchase_order, match.received_quantity), (self.order, 10))
+
+    def test_exceptions(self):
+        no_po = self.invoice("10.00", reference="PO-999999")
+        not_received = self.invoice("500.00", reference=self.order.reference)
+        wrong_supplier = self.invoice("500.00", reference=self.order.reference, supplier=self.bolt)
+        match_invoices()
+        self.assertEqual(self.status(no_po), "no_purchase_order")
+        self.assertEqual(self.status(not_received), "not_received")
+        self.assertEqual(self.status(wrong_supplier), "supplier_mismatch")
+
+        wrong_supplier.delete()
+        self.receive(7)
+        match_invoices()
+        self.assertEqual(self.status(not_received), "quantity_mismatch")
+
+        self.receive(3)
+        short = not_received
+        Invoice.objects.filter(pk=short.pk).update(amount="300.00")
+        match_invoices()
+        self.assertEqual(self.status(short), "amount_mismatch")
+
+        # A paid invoice still counts towards what the order has been billed
+        Invoice.objects.filter(pk=short.pk).update(amount="300.00", status="paid")
+        second = self.invoice("300.00", reference=self.order.reference)
+        match_invoices()
+        self.assertEqual(self.status(second), "over_invoiced")
+
+    def test_client_invoices_are_not_matched(self):
+        receivable = Invoice.objects.create(invoice_number="AR-1", client="Acme", amount=100)
+        InvoiceMatch.objects.create(invoice=receivable, status="no_purchase_order")
+        self.invoice("1.00", reference="nope")
+        self.assertEqual(match_invoices(), {"no_purchase_order": 1})
+        self.assertFalse(InvoiceMatch.objects.filter(invoice=receivable).exists())
+
+    def test_match_without_reference_by_supplier_and_amount(self):
+        self.receive(10)
+        invoice = self.invoice("500.00")
+        match_invoices()
+        self.assertEqual(InvoiceMatch.objects.get(invoice=invoice).purchase_order, self.order)
+
+    def test_endpoints_and_command(self):
+        self.invoice("1.00", reference="nope")
+        client = APIClient()
+        self.assertEqual(client.post("/api/invoices/match/").json(), {"results": {"no_purchase_order": 1}})
+        data = client.get("/api/invoices/match-exceptions/", {"status": "no_purchase_order"}).json()
+        self.assertEqual([row["invoice_number"] for row in data["results"]], ["INV-1"])
+
+        out = io.StringIO()
+        call_command("match_invoices", since="2000-01-01", stdout=out)
+        self.assertIn("Matched 1 invoices", out.getvalue())
+
+
+class InvoiceAgingTests(TestCase):
+    as_of = date(2025, 6, 30)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.number = 0
+        self.invoice("Acme", 100, 0)      # due today: current
+        self.invoice("Acme", 200, 15)     # 1-30
+        self.invoice("Acme", 300, 45)     # 31-60
+        partly_paid = self.invoice("Acme", 400, 120)  # over 90, 150 paid
+        Payment.objects.create(invoice=partly_paid, amount=150, payment_date=date(2025, 5, 1))
+        # Paid after as_of, so still open on the report date
+        late = self.invoice("Bolt", 50, 75, status="paid")
+        Payment.objects.create(invoice=late, amount=50, payment_date=date(2025, 7, 5))
+        paid = self.invoice("Bolt", 999, 10, status="paid")
+        Payment.objects.create(invoice=paid, amount=999, payment_date=date(2025, 6, 25))
+        settled = self.invoice("Bolt", 80, 20)
+        Payment.objects.create(invoice=settled, amount=80, payment_date=date(2025, 6, 1))
+        self.invoice("Bolt", 70, 30, status="cancelled")
+        # Payables do not age here
+        self.invoice("Steelworks", 500, 40, supplier=Supplier.objects.create(name="Steelworks"))
+        self.invoice("Rebar Co", 600, 40, purchase_order_reference="PO-7")
+
+    def invoice(self, client, amount, days_overdue, status="pending", **fields):
+        self.number += 1
+        return Invoice.objects.create(
+            invoice_number=f"AR-{self.number}", client=client, amount=amount, status=status, **fields,
+            due_date=self.as_of - timedelta(days=days_overdue), created_at=timezone.make_aware(datetime(2025, 1, 1)),
+        )
+
+    def test_buckets_per_client_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/invoices/aging/", {"as_of": self.as_of.isoformat()})
+        data = response.json()
+        acme, bolt = data["results"]
+        amounts = {key: Decimal(str(acme[f"{key}_amount"])) for key in ("current", "1_30", "31_60", "61_90", "over_90")}
+        self.assertEqual(amounts, {
+            "current": Decimal("100"), "1_30": Decimal("200"), "31_60": Decimal("300"),
+            "61_90": Decimal("0"), "over_90": Decimal("250"),
+        })
+        self.assertEqual((acme["total_count"], Decimal(str(acme["total_amount"]))), (4, Decimal("850")))
+        self.assertEqual((bolt["client"], bolt["61_90_count"], bolt["total_count"]), ("Bolt", 1, 1))
+        self.assertEqual(Decimal(str(data["totals"]["total_amount"])), Decimal("900"))
+
+    def test_csv_export(self):
+        response = self.client.get("/api/invoices/aging/", {"as_of": self.as_of.isoformat(), "export": "csv"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["client", "current_amount", "current_count"])
+        self.assertEqual([line.split(",")[0] for line in lines[1:]], ["Acme", "Bolt"])
+
+    def test_invalid_as_of(self):
+        self.assertEqual(self.client.get("/api/invoices/aging/", {"as_of": "2025-02-30"}).status_code, 400)
+
+
+class OverdueTransitionTests(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        self.late = Invoice.objects.create(
+            invoice_number="OD-1", client="Acme", amount=10, due_date=today - timedelta(days=1),
+        )
+        self.due_today = Invoice.objects.create(invoice_number="OD-2", client="Acme", amount=10, due_date=today)
+        self.paid = Invoice.objects.create(
+            invoice_number="OD-3", client="Acme", amount=10, due_date=today - timedelta(days=9), status="paid",
+        )
+
+    def test_single_update_and_event(self):
+        events = []
+        receiver = lambda sender, **kwargs: events.append(kwargs["count"])  # noqa: E731
+        invoices_marked_overdue.connect(receiver)
+        self.addCleanup(invoices_marked_overdue.disconnect, receiver)
+
+        with self.assertNumQueries(3):  # savepoint, UPDATE, release
+            self.assertEqual(mark_overdue_invoices(), 1)
+        statuses = dict(Invoice.objects.values_list("invoice_number", "status"))
+        self.assertEqual(statuses, {"OD-1": "overdue", "OD-2": "pending", "OD-3": "paid"})
+        self.assertEqual(mark_overdue_invoices(), 0)
+        self.assertEqual(events, [1])
+
+    def test_command_and_overdue_listing(self):
+        out = io.StringIO()
+        call_command("mark_overdue_invoices", as_of=(timezone.localdate() + timedelta(days=1)).isoformat(), stdout=out)
+        self.assertIn("Marked 2 invoices overdue", out.getvalue())
+        data = APIClient().get("/api/invoices/overdue/").json()
+        self.assertEqual([row["invoice_number"] for row in data["results"]], ["OD-1", "OD-2"])
+
+
+class BudgetRollupTests(TestCase):
+    def setUp(self):
+        self.tower = Budget.objects.create(project_name="Tower", allocated_amount=1000, spent_amount=100)
+        self.bridge = Budget.objects.create(project_name="Bridge", allocated_amount=0)
+
+    def spent(self, budget):
+        budget.refresh_from_db()
+        return budget.spent_amount
+
+    def test_expenses_roll_up_as_deltas(self):
+        expense = Expense.objects.create(description="Steel", amount=250, budget=self.tower)
+        Expense.objects.create(description="Unbudgeted", amount=40)
+        self.assertEqual(self.spent(self.tower), Decimal("350"))
+
+        expense.amount = 300
+        expense.save()
+        self.assertEqual(self.spent(self.tower), Decimal("400"))
+
+        expense.budget = self.bridge
+        expense.save()
+        self.assertEqual(self.spent(self.tower), Decimal("100"))
+        self.assertEqual(self.spent(self.bridge), Decimal("300"))
+
+        expense.delete()
+        self.assertEqual(self.spent(self.bridge), Decimal("0"))
+
+    def test_spent_amount_is_read_only(self):
+        client = APIClient()
+        response = client.patch(f"/api/budgets/{self.tower.pk}/", {"spent_amount": "999"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.spent(self.tower), Decimal("100"))
+        self.assertEqual(Decimal(str(response.json()["remaining_budget"])), Decimal("900"))
+
+    def test_update_keeps_concurrent_spend(self):
+        load = BudgetViewSet.get_object
+
+        def load_then_spend(view):
+            budget = load(view)
+            # Another request's expense lands after this one read the budget
+            Expense.objects.create(description="Cement", amount=50, budget=self.tower)
+            return budget
+
+        with mock.patch.object(BudgetViewSet, "get_object", load_then_spend):
+            response = APIClient().patch(f"/api/budgets/{self.tower.pk}/", {"allocated_amount": "2000"}, format="json")
+        self.assertEqual(Decimal(str(response.json()["spent_amount"])), Decimal("150"))
+        self.assertEqual(self.spent(self.tower), Decimal("150"))
+
+    def test_utilization_summary(self):
+        Expense.objects.create(description="Concrete", amount=150, budget=self.tower)
+        with self.assertNumQueries(1):
+            data = APIClient().get("/api/budgets/utilization/").json()
+        rows = {row["project_name"]: row for row in data["budgets"]}
+        self.assertEqual(Decimal(str(rows["Tower"]["utilization_percentage"])), Decimal("25"))
+        self.assertEqual(Decimal(str(rows["Tower"]["remaining"])), Decimal("750"))
+        self.assertEqual(Decimal(str(rows["Bridge"]["utilization_percentage"])), Decimal("0"))
+        self.assertEqual(Decimal(str(data["totals"]["spent"])), Decimal("250"))
+
+
+class GeneralLedgerTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.march = timezone.make_aware(datetime(2026, 3, 10, 12))
+        self.invoice = Invoice.objects.create(invoice_number="GL-1", client="Acme", amount=1000, created_at=self.march)
+        Payment.objects.create(invoice=self.invoice, amount=400, payment_date=date(2026, 3, 20))
+        Payment.objects.create(amount=50, payment_date=date(2026, 4, 2))
+        Expense.objects.create(description="Scaffolding", amount=300, created_at=self.march)
+
+    def report(self, period):
+        data = self.client.get("/api/finance/trial-balance/", {"period": period}).json()
+        rows = {row["code"]: row for row in data["accounts"]}
+        return data, {code: Decimal(str(row["debit"])) - Decimal(str(row["credit"])) for code, row in rows.items()}
+
+    def test_postings_balance(self):
+        data, balances = self.report("2026-03")
+        self.assertTrue(data["totals"]["balanced"])
+        self.assertEqual(balances[RECEIVABLE], Decimal("600"))
+        self.assertEqual(balances[CASH], Decimal("100"))
+        self.assertEqual(balances[REVENUE], Decimal("-1000"))
+        self.assertEqual(balances[EXPENSES], Decimal("300"))
+        self.assertEqual(balances[UNAPPLIED_RECEIPTS], Decimal("0"))
+
+        # April carries March forward and adds its own activity
+        data, balances = self.report("2026-04")
+        self.assertEqual(balances[CASH], Decimal("150"))
+        self.assertEqual(balances[UNAPPLIED_RECEIPTS], Decimal("-50"))
+        cash = next(row for row in data["accounts"] if row["code"] == CASH)
+        self.assertEqual(Decimal(str(cash["period_debit"])), Decimal("50"))
+
+    def test_changes_post_adjusting_entries(self):
+        self.invoice.amount = 1200
+        self.invoice.save()
+        self.assertEqual(self.report("2026-03")[1][REVENUE], Decimal("-1200"))
+
+        self.invoice.status = "cancelled"
+        self.invoice.save()
+        self.assertEqual(self.report("2026-03")[1][REVENUE], Decimal("0"))
+
+        # Deleting cascades to the payment, whose receipt is reversed as well
+        self.invoice.delete()
+        data, balances = self.report("2026-03")
+        self.assertEqual(balances[CASH], Decimal("-300"))
+        self.assertEqual(balances[RECEIVABLE], Decimal("0"))
+        self.assertTrue(data["totals"]["balanced"])
+        # The journal only grows
+        self.assertEqual(JournalEntry.objects.filter(source_type="invoice").count(), 3)
+
+    def test_supplier_bills_post_to_payables(self):
+        bill = Invoice.objects.create(
+            invoice_number="GL-2", client="Steelworks", supplier=Supplier.objects.create(name="Steelworks"),
+            amount=100, created_at=self.march,
+        )
+        Payment.objects.create(invoice=bill, amount=60, payment_date=date(2026, 3, 25))
+        data, balances = self.report("2026-03")
+        self.assertTrue(data["totals"]["balanced"])
+        self.assertEqual(balances[PAYABLE], Decimal("-40"))
+        self.assertEqual(balances[EXPENSES], Decimal("400"))
+        self.assertEqual(balances[RECEIVABLE], Decimal("600"))
+        self.assertEqual(balances[REVENUE], Decimal("-1000"))
+        self.assertEqual(balances[CASH], Decimal("40"))
+
+    def test_purchase_order_references_post_to_payables(self):
+        bill = Invoice.objects.create(
+            invoice_number="GL-2", client="Rebar Co", purchase_order_reference="PO-7", amount=100, created_at=self.march,
+        )
+        Payment.objects.create(invoice=bill, amount=100, payment_date=date(2026, 3, 25))
+        balances = self.report("2026-03")[1]
+        self.assertEqual(balances[PAYABLE], Decimal("0"))
+        self.assertEqual(balances[EXPENSES], Decimal("400"))
+        self.assertEqual(balances[REVENUE], Decimal("-1000"))
+
+    def test_payment_with_default_date(self):
+        payment = Payment.objects.create(amount=10)
+        payment.amount = 12
+        payment.save()
+        entries = JournalEntry.objects.filter(source_type="payment", source_id=payment.pk)
+        self.assertEqual(set(entries.values_list("date", flat=True)), {timezone.localdate()})
+        self.assertEqual(sum(line.debit for line in JournalLine.objects.filter(entry__in=entries)), Decimal("12"))
+
+    def test_report_reads_balance_rows(self):
+        with self.assertNumQueries(1):
+            self.client.get("/api/finance/trial-balance/", {"period": "2026-03"})
+        self.assertEqual(self.client.get("/api/finance/trial-balance/", {"period": "March"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/finance/trial-balance/", {"period": "2026-13"}).status_code, 400)
+
+    def test_rebuild_matches_incremental_balances(self):
+        fields = ("account__code", "period", "debit", "credit", "debit_to_date", "credit_to_date")
+        incremental = sorted(AccountBalance.objects.values_list(*fields))
+        lines = JournalLine.objects.count()
+        out = io.StringIO()
+        call_command("rebuild_ledger", stdout=out)
+        self.assertIn("Posted 4 journal entries", out.getvalue())
+        self.assertEqual(sorted(AccountBalance.objects.values_list(*fields)), incremental)
+        self.assertEqual(JournalLine.objects.count(), lines)
+
+
+class CashFlowForecastTests(TestCase):
+    def setUp(self):
+        self.monday = date(2026, 3, 2)
+        supplier = Supplier.objects.create(name="Steelworks")
+        client_invoice = Invoice.objects.create(
+            invoice_number="CF-1", client="Acme", amount=1000, due_date=self.monday + timedelta(days=8),
+        )
+        Payment.objects.create(invoice=client_invoice, amount=200, payment_date=self.monday)
+        # Already overdue: expected straight away
+        Invoice.objects.create(invoice_number="CF-2", client="Acme", amount=100, due_date=self.monday - timedelta(days=20))
+        Invoice.objects.create(
+            invoice_number="CF-3", client="Steelworks", supplier=supplier, amount=300,
+            due_date=self.monday + timedelta(days=15),
+        )
+        PurchaseOrder.objects.create(supplier=supplier, quantity=2, unit_price=50, delivery_date=self.monday + timedelta(days=2))
+        employee = Employee.objects.create(email="cf@example.com")
+        Payroll.objects.create(
+            employee=employee, period_start=self.monday, period_end=self.monday + timedelta(days=20), basic_salary=500,
+        )
+
+    def test_weekly_buckets(self):
+        result = forecast(weeks=4, start=self.monday + timedelta(days=3), opening_balance=1000)
+        weeks = result["weeks"]
+        self.assertEqual(result["start"], self.monday)
+        self.assertEqual([week["inflows"] for week in weeks], [100, 800, 0, 0])
+        self.assertEqual([week["purchase_orders"] for week in weeks], [100, 0, 0, 0])
+        self.assertEqual([week["payables"] for week in weeks], [0, 0, 300, 0])
+        self.assertEqual([week["payroll"] for week in weeks], [0, 0, 500, 0])
+        self.assertEqual(weeks[-1]["closing_balance"], 1000 + 900 - 900)
+
+    def test_payment_delay_scenario(self):
+        delays = parse_delays("0:1,14:1")
+        self.assertEqual(delays, {0: 0.5, 14: 0.5})
+        weeks = forecast(weeks=4, start=self.monday, delays=delays, collection_rate=0.5)["weeks"]
+        # CF-2 is 20 days overdue, so even a 14-day delay keeps it in the first week
+        self.assertEqual([week["inflows"] for week in weeks], [50, 200, 0, 200])
+
+    def test_endpoint(self):
+        client = APIClient()
+        data = client.get("/api/finance/cashflow/", {"delay": "0:0.5,7:0.5", "payables_delay": 7}).json()
+        self.assertEqual(len(data["weeks"]), 13)
+        self.assertEqual(client.get("/api/finance/cashflow/", {"delay": "soon"}).status_code, 400)
+        self.assertEqual(client.get("/api/finance/cashflow/", {"weeks": 100}).status_code, 400)
+        self.assertEqual(client.get("/api/finance/cashflow/", {"opening": "inf"}).status_code, 400)
+        self.assertEqual(client.get("/api/finance/cashflow/", {"opening": "nan"}).status_code, 400)
+        self.assertEqual(client.get("/api/finance/cashflow/", {"delay": "0:nan"}).status_code, 400)
+
+
+class InvoiceNumberingTests(TestCase):
+    def test_gapless_numbers(self):
+        first = Invoice.objects.create(client="Acme", amount=10)
+        year = timezone.localdate().year
+        self.assertEqual(first.invoice_number, f"INV-{year}-000001")
+        # A failed create gives its number back
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Invoice.objects.create(client="Acme", amount=10)
+            raise RuntimeError
+        self.assertEqual(Invoice.objects.create(client="Acme", amount=10).invoice_number, f"INV-{year}-000002")
+        # Numbers set in code (imports, fixtures) are kept
+        self.assertEqual(Invoice.objects.create(invoice_number="MANUAL-1", client="Acme", amount=10).invoice_number, "MANUAL-1")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(next_number(day=date(year, 6, 1)), f"INV-{year}-000003")
+        self.assertEqual(next_number("CN", date(2025, 1, 1)), "CN-2025-000001")
+
+    def test_api_allocates_number(self):
+        year = timezone.localdate().year
+        client = APIClient()
+        response = client.post(
+            "/api/invoices/", {"invoice_number": f"INV-{year}-000001", "client": "Acme", "amount": "10.00"}, format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        # A client-chosen number is ignored, so it can't collide with the series
+        self.assertEqual(response.json()["invoice_number"], f"INV-{year}-000001")
+        second = client.post("/api/invoices/", {"client": "Acme", "amount": "10.00"}, format="json").json()
+        self.assertEqual(second["invoice_number"], f"INV-{year}-000002")
+        client.patch(f"/api/invoices/{second['id']}/", {"invoice_number": "X-1"}, format="json")
+        self.assertEqual(Invoice.objects.get(pk=second["id"]).invoice_number, f"INV-{year}-000002")
+
+    def test_block_reservation(self):
+        reset_blocks()
+        self.addCleanup(reset_blocks)
+        with self.captureOnCommitCallbacks(execute=True), override_settings(INVOICE_NUMBER_GAPLESS=False, INVOICE_NUMBER_BLOCK_SIZE=5):
+            numbers = [next_number("BLK")]
+        with override_settings(INVOICE_NUMBER_GAPLESS=False, INVOICE_NUMBER_BLOCK_SIZE=5):
+            # The rest of the block comes from memory
+            with self.assertNumQueries(0):
+                numbers += [next_number("BLK") for _ in range(4)]
+            # A block reserved in a transaction that rolls back is never handed out
+            with self.assertRaises(RuntimeError), self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+                next_number("BLK")
+                raise RuntimeError
+        # Gapless numbering continues from the same counter
+        numbers.append(next_number("BLK"))
+        year = timezone.localdate().year
+        self.assertEqual(numbers, [f"BLK-{year}-{n:06d}" for n in (1, 2, 3, 4, 5, 6)])
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class InvoiceNumberingConcurrencyTests(TransactionTestCase):
+    threads = 8
+    invoices_per_thread = 10
+
+    def test_concurrent_creates_get_consecutive_numbers(self):
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(self.invoices_per_thread):
+                    Invoice.objects.create(client="Acme", amount=10)
+            except Exception as e:  # surfaced in the main thread below
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        total = self.threads * self.invoices_per_thread
+        numbers = sorted(int(number.rsplit("-", 1)[1]) for number in Invoice.objects.values_list("invoice_number", flat=True))
+        self.assertEqual(numbers, list(range(1, total + 1)))
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class GeneralLedgerConcurrencyTests(TransactionTestCase):
+    threads = 8
+    expenses_per_thread = 12
+
+    def test_concurrent_postings_keep_running_totals(self):
+        errors = []
+
+        def worker(index):
+            try:
+                for n in range(self.expenses_per_thread):
+                    # Later threads open new months while earlier ones post into the months before
+                    month = (index + n) % 6 + 1
+                    Expense.objects.create(
+                        description="Site costs", amount=10,
+                        created_at=timezone.make_aware(datetime(2026, month, 15, 12)),
+                    )
+            except Exception as e:  # surfaced in the main thread below
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(index,)) for index in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        fields = ("account__code", "period", "debit", "credit", "debit_to_date", "credit_to_date")
+        incremental = sorted(AccountBalance.objects.values_list(*fields))
+        call_command("rebuild_ledger", stdout=io.StringIO())
+        self.assertEqual(incremental, sorted(AccountBalance.objects.values_list(*fields)))
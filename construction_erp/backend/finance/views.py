@@ -1,11 +1,23 @@
+import csv
+import math
+
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Q, Value, When
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, status
 from rest_framework import serializers
 from rest_framework.permissions import AllowAny
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from .models import Invoice, Expense, Payment, Budget
+from .aging import aging_report, report_columns
+from .cashflow import forecast, parse_delays
+from .ledger import month_of, trial_balance as trial_balance_rows
+from .matching import match_invoices
+from .models import Invoice, InvoiceMatch, Expense, Payment, Budget
 from .serializers import (
     InvoiceSerializer,
+    InvoiceMatchSerializer,
     ExpenseSerializer,
     PaymentSerializer,
     BudgetSerializer,
@@ -41,14 +53,77 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         invoice.save()
         return Response({'status': 'invoice marked as paid'})
     
+    @action(detail=False, methods=['post'])
+    def match(self, request):
+        """Three-way match open invoices against purchase orders and receipts"""
+        return Response({'results': match_invoices()})
+
+    @action(detail=False, methods=['get'], url_path='match-exceptions')
+    def match_exceptions(self, request):
+        """Invoices whose last match failed, optionally one ?status="""
+        matches = InvoiceMatch.objects.exclude(status='matched').select_related('invoice').order_by('-id')
+        match_status = request.query_params.get('status')
+        if match_status:
+            matches = matches.filter(status=match_status)
+        page = self.paginate_queryset(matches)
+        if page is not None:
+            return self.get_paginated_response(InvoiceMatchSerializer(page, many=True).data)
+        return Response(InvoiceMatchSerializer(matches, many=True).data)
+
     @action(detail=False, methods=['get'])
     def overdue(self, request):
         """Get overdue invoices"""
-        from django.utils import timezone
-        invoices = Invoice.objects.filter(status='pending', due_date__lt=timezone.now())
+        # Pending invoices past due only linger until the next mark_overdue_invoices run
+        overdue = Q(status='overdue') | Q(status='pending', due_date__lt=timezone.localdate())
+        invoices = Invoice.objects.filter(overdue).order_by('due_date', 'id')
+        page = self.paginate_queryset(invoices)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
         serializer = self.get_serializer(invoices, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def aging(self, request):
+        """Open balances per client in age buckets, ?as_of=YYYY-MM-DD; ?export=csv streams CSV"""
+        as_of = request.query_params.get('as_of')
+        if as_of:
+            try:
+                as_of = parse_date(as_of)
+            except ValueError:
+                as_of = None
+            if as_of is None:
+                return Response({'error': 'as_of must be YYYY-MM-DD'}, status=400)
+        else:
+            as_of = timezone.localdate()
+
+        rows = aging_report(as_of)
+        if request.query_params.get('export') == 'csv':
+            return self.stream_csv(rows, f'invoice-aging-{as_of}.csv')
+
+        results = list(rows)
+        totals = {
+            column: sum(row[column] for row in results)
+            for column in report_columns() if column != 'client'
+        }
+        return Response({'as_of': as_of, 'totals': totals, 'results': results})
+
+    def stream_csv(self, rows, filename):
+        class Echo:
+            def write(self, value):
+                return value
+
+        columns = report_columns()
+        writer = csv.writer(Echo())
+
+        def lines():
+            yield writer.writerow(columns)
+            for row in rows.iterator(chunk_size=2000):
+                yield writer.writerow([row[column] for column in columns])
+
+        response = StreamingHttpResponse(lines(), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 
 class ExpenseViewSet(viewsets.ModelViewSet):
     """
@@ -92,6 +167,16 @@ class BudgetViewSet(viewsets.ModelViewSet):
     queryset = Budget.objects.all()
     serializer_class = BudgetSerializer
     permission_classes = [AllowAny]
+
+    def perform_update(self, serializer):
+        # Write only the submitted columns: spent_amount is rolled up with F()
+        # updates by finance.signals, and saving the copy loaded for this
+        # request would undo increments committed since
+        budget = serializer.instance
+        for attr, value in serializer.validated_data.items():
+            setattr(budget, attr, value)
+        budget.save(update_fields=[*serializer.validated_data, 'updated_at'])
+        budget.refresh_from_db(fields=['spent_amount'])
     
     @action(detail=True, methods=['get'])
     def utilization(self, request, pk=None):
@@ -106,3 +191,83 @@ class BudgetViewSet(viewsets.ModelViewSet):
             'remaining': allocated - spent,
             'utilization_percentage': round(utilization, 2)
         })
+
+    @action(detail=False, methods=['get'], url_path='utilization', url_name='utilization-summary')
+    def utilization_summary(self, request):
+        """Utilization of every budget in one query, with overall totals"""
+        money = DecimalField(max_digits=14, decimal_places=2)
+        budgets = self.filter_queryset(self.get_queryset()).annotate(
+            remaining=ExpressionWrapper(F('allocated_amount') - F('spent_amount'), output_field=money),
+            utilization_percentage=Case(
+                When(allocated_amount__gt=0, then=ExpressionWrapper(
+                    F('spent_amount') * 100 / F('allocated_amount'), output_field=money,
+                )),
+                default=Value(0),
+                output_field=money,
+            ),
+        ).order_by('project_name', 'id')
+        rows = list(budgets.values(
+            'id', 'project_name', 'allocated_amount', 'spent_amount', 'remaining', 'utilization_percentage',
+        ))
+        allocated = sum((row['allocated_amount'] for row in rows), 0)
+        spent = sum((row['spent_amount'] for row in rows), 0)
+        for row in rows:
+            row['utilization_percentage'] = round(row['utilization_percentage'], 2)
+        return Response({
+            'budgets': rows,
+            'totals': {
+                'allocated': allocated,
+                'spent': spent,
+                'remaining': allocated - spent,
+                'utilization_percentage': round(spent / allocated * 100, 2) if allocated > 0 else 0,
+            },
+        })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def trial_balance(request):
+    """Trial balance for ?period=YYYY-MM (default this month), read from the stored account balances"""
+    period = request.query_params.get('period')
+    if period:
+        try:
+            period = parse_date(f"{period}-01") if len(period) == 7 else None
+        except ValueError:
+            period = None
+        if period is None:
+            return Response({'error': 'period must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        period = month_of(timezone.localdate())
+    rows = trial_balance_rows(period)
+    debit = sum((row['debit'] for row in rows), 0)
+    credit = sum((row['credit'] for row in rows), 0)
+    return Response({
+        'period': period.strftime('%Y-%m'),
+        'accounts': rows,
+        'totals': {'debit': debit, 'credit': credit, 'balanced': debit == credit},
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def cashflow(request):
+    """Weekly cash-flow projection; scenario via ?weeks, ?delay=days:probability,..., ?collection_rate, ?payables_delay, ?opening"""
+    params = request.query_params
+    try:
+        weeks = int(params.get('weeks', 13))
+        delays = parse_delays(params['delay']) if params.get('delay') else None
+        collection_rate = float(params.get('collection_rate', 1))
+        payables_delay = int(params.get('payables_delay', 0))
+        opening = float(params['opening']) if params.get('opening') else None
+    except ValueError as exc:
+        return Response({'error': f'Invalid scenario: {exc}'}, status=status.HTTP_400_BAD_REQUEST)
+    if opening is not None and not math.isfinite(opening):
+        return Response({'error': 'opening must be a finite amount'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= weeks <= 52:
+        return Response({'error': 'weeks must be between 1 and 52'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 0 <= collection_rate <= 1:
+        return Response({'error': 'collection_rate must be between 0 and 1'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(forecast(
+        weeks=weeks, delays=delays, collection_rate=collection_rate,
+        payables_delay=payables_delay, opening_balance=opening,
+    ))
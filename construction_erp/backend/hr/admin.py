@@ -1,11 +1,17 @@
 from django.contrib import admin
-from .models import Employee, Attendance, Payroll, Leave
+from .models import Department, Role, Employee, Attendance, Payroll, PayrollRun, Leave, LeaveBalance
+
+
+@admin.register(Department, Role)
+class NamedRowAdmin(admin.ModelAdmin):
+    list_display = ('name', 'description')
+    search_fields = ('name',)
 
 
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'department', 'hire_date')
-    list_filter = ('department', 'hire_date')
+    list_display = ('id', 'department', 'role', 'hire_date')
+    list_filter = ('department', 'role', 'hire_date')
     search_fields = ('id',)
 
 
@@ -18,11 +24,25 @@ class AttendanceAdmin(admin.ModelAdmin):
 
 @admin.register(Payroll)
 class PayrollAdmin(admin.ModelAdmin):
-    list_display = ('employee', 'net_salary')
-    list_filter = ('employee',)
+    list_display = ('employee', 'period_start', 'period_end', 'net_salary', 'status')
+    list_filter = ('status', 'employee')
+
+
+@admin.register(PayrollRun)
+class PayrollRunAdmin(admin.ModelAdmin):
+    list_display = ('period_start', 'period_end', 'status', 'employee_count', 'total_net', 'created_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'updated_at')
 
 
 @admin.register(Leave)
 class LeaveAdmin(admin.ModelAdmin):
     list_display = ('employee', 'leave_type', 'start_date', 'end_date', 'status')
     list_filter = ('leave_type', 'status')
+
+
+@admin.register(LeaveBalance)
+class LeaveBalanceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'leave_type', 'year', 'entitlement', 'carried_over', 'taken')
+    list_filter = ('leave_type', 'year')
+    readonly_fields = ('updated_at',)
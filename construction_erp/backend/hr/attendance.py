@@ -0,0 +1,172 @@
+"""
+Attendance ingestion from clock-in devices.
+
+Devices send newline-delimited JSON events, one per line:
+
+    {"employee": 12, "type": "check_in", "timestamp": "2026-10-18T07:58:00+02:00"}
+
+Events are handled in chunks of ATTENDANCE_INGEST_CHUNK_SIZE. Each chunk is
+folded in memory to one row per (employee, local date), keeping the earliest
+check-in and the latest check-out. The chunk's Employee rows are locked in id
+order, so chunks touching the same people merge one after the other; row
+locks on Attendance alone would miss a day that two chunks both insert. The
+fold is merged with the stored rows for those days and written with a single
+bulk_create(update_conflicts=True) against the (employee, date) unique
+constraint. Every chunk commits on its own, so a bad line only rejects itself.
+Stored timesheets covering the touched days are dropped (hr.timesheets).
+
+Status follows the shift rules. Clocking in more than
+ATTENDANCE_LATE_GRACE_MINUTES after ATTENDANCE_SHIFT_START is "late". A
+finished day shorter than ATTENDANCE_HALF_DAY_HOURS is "half-day". Anything
+else is "present", including days previously marked absent by hand.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Attendance, Employee
+from .timesheets import invalidate
+
+CHECK_IN = {'in', 'check_in', 'check-in'}
+CHECK_OUT = {'out', 'check_out', 'check-out'}
+MAX_REPORTED_ERRORS = 100
+
+
+def shift_rules():
+    return (
+        time.fromisoformat(getattr(settings, 'ATTENDANCE_SHIFT_START', '08:00')),
+        timedelta(minutes=getattr(settings, 'ATTENDANCE_LATE_GRACE_MINUTES', 10)),
+        timedelta(hours=getattr(settings, 'ATTENDANCE_HALF_DAY_HOURS', 4)),
+    )
+
+
+def derive_status(check_in, check_out, rules):
+    shift_start, grace, half_day = rules
+    if check_in and check_out and check_out - check_in < half_day:
+        return 'half-day'
+    if check_in:
+        arrived = timezone.localtime(check_in)
+        if arrived > timezone.make_aware(datetime.combine(arrived.date(), shift_start)) + grace:
+            return 'late'
+    return 'present'
+
+
+def parse_event(value):
+    """(employee id, is check-in, aware timestamp) of one decoded event; raises ValueError"""
+    if not isinstance(value, dict):
+        raise ValueError("Expected a JSON object.")
+    employee = value.get('employee')
+    if not isinstance(employee, int) or isinstance(employee, bool):
+        raise ValueError("'employee' must be an employee id.")
+    kind = str(value.get('type', '')).lower()
+    if kind not in CHECK_IN and kind not in CHECK_OUT:
+        raise ValueError("'type' must be check_in or check_out.")
+    moment = parse_datetime(str(value.get('timestamp', '')))
+    if moment is None:
+        raise ValueError("'timestamp' must be an ISO 8601 date and time.")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return employee, kind in CHECK_IN, moment
+
+
+class Ingestor:
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or getattr(settings, 'ATTENDANCE_INGEST_CHUNK_SIZE', 5000)
+        self.rules = shift_rules()
+        self.pending = []
+        self.received = self.accepted = self.rows = 0
+        self.errors = []
+        self.rejected = 0
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def feed(self, lines):
+        """Consume (line number, decoded value, decode error) tuples, as NDJSONParser yields them"""
+        for line, value, error in lines:
+            self.received += 1
+            if error is None:
+                try:
+                    self.pending.append((line, *parse_event(value)))
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                self.reject(line, error)
+            if len(self.pending) >= self.chunk_size:
+                self.flush()
+        self.flush()
+        return self.summary()
+
+    def flush(self):
+        if not self.pending:
+            return
+        events, self.pending = self.pending, []
+        with transaction.atomic():
+            known = set(
+                Employee.objects.select_for_update().filter(pk__in={event[1] for event in events})
+                .order_by('pk').values_list('pk', flat=True)
+            )
+            days = self.fold(events, known)
+            if not days:
+                return
+            stored = (
+                Attendance.objects
+                .filter(employee_id__in={key[0] for key in days}, date__in={key[1] for key in days})
+                .order_by()
+                .values_list('employee_id', 'date', 'check_in', 'check_out')
+            )
+            for employee, day, check_in, check_out in stored:
+                times = days.get((employee, day))
+                if times is not None:
+                    times[0] = min(filter(None, (times[0], check_in)), default=None)
+                    times[1] = max(filter(None, (times[1], check_out)), default=None)
+            now = timezone.now()
+            Attendance.objects.bulk_create(
+                [
+                    Attendance(
+                        employee_id=employee, date=day, check_in=check_in, check_out=check_out,
+                        status=derive_status(check_in, check_out, self.rules), updated_at=now,
+                    )
+                    for (employee, day), (check_in, check_out) in days.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['employee', 'date'],
+                update_fields=['check_in', 'check_out', 'status', 'updated_at'],
+                batch_size=1000,
+            )
+            invalidate(day for _, day in days)
+        self.rows += len(days)
+
+    def fold(self, events, known):
+        """{(employee, local date): [earliest check-in, latest check-out]} of the known employees' events"""
+        days = {}
+        for line, employee, is_check_in, moment in events:
+            if employee not in known:
+                self.reject(line, f"Unknown employee {employee}.")
+                continue
+            self.accepted += 1
+            times = days.setdefault((employee, timezone.localdate(moment)), [None, None])
+            if is_check_in:
+                times[0] = moment if times[0] is None else min(times[0], moment)
+            else:
+                times[1] = moment if times[1] is None else max(times[1], moment)
+        return days
+
+    def summary(self):
+        return {
+            'received': self.received,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'rows': self.rows,
+            'errors': self.errors,
+        }
+
+
+def ingest_events(lines, chunk_size=None):
+    """Merge decoded NDJSON lines into attendance; returns counts and the first errors"""
+    return Ingestor(chunk_size).feed(lines)
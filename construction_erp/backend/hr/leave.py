@@ -0,0 +1,278 @@
+"""
+Leave balances and approval checks.
+
+Each user has one LeaveBalance row per leave type and calendar year, created
+on first use from LEAVE_POLICY: ``days`` is the yearly entitlement (None for
+uncapped types such as unpaid leave), ``accrual`` is "monthly" when it is
+earned in twelfths through the year, and ``carry_over`` caps how many unused
+days move to the next year's row. Leave is counted in working days (Mon-Fri),
+as payroll counts it, and a leave spanning New Year draws on both years.
+
+Approving a leave locks the user's row, so approvals for one person run one
+at a time, and refuses it when it overlaps another approved leave, when the
+employee has attendance marked as worked on those days, or when the balance
+accrued by the end of the leave cannot cover it. ``taken`` is then increased
+with an F() update; rejecting or deleting an approved leave gives it back.
+
+Approved leaves of one user never overlap, so ordered by end date they are
+ordered by start date too. The only approved leave that can overlap
+start..end is therefore the first one ending on or after ``start``, which is a
+single seek on the (employee, status, end_date) index instead of a scan of
+the user's history. Attendance is only read for the leave's own days.
+
+A year's carry-over is fixed when the next year's row is created (on first use
+or by the roll_leave_balances command) and recomputed whenever leave taken in
+the earlier year changes afterwards, rippling through every later year whose
+row already exists.
+
+Leaves approved before balances existed are charged once by
+``roll_leave_balances --backfill``, which recomputes ``taken`` from every
+approved leave and reports approved leaves that overlap each other. Those
+predate the overlap check, count their shared days twice and break the
+ordering above, so they must be fixed by hand.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import ROUND_DOWN, Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Q
+
+from accounts.models import CustomUser
+
+from .models import Attendance, Leave, LeaveBalance
+from .payroll import working_days
+
+WORKED = ('present', 'late', 'half-day')
+TENTHS = Decimal('0.1')
+
+
+def policy(leave_type):
+    return getattr(settings, 'LEAVE_POLICY', {}).get(leave_type, {})
+
+
+def days_by_year(start, end):
+    """Working days of start..end per calendar year"""
+    days = {}
+    for year in range(start.year, end.year + 1):
+        count = working_days(max(start, date(year, 1, 1)), min(end, date(year, 12, 31)))
+        if count:
+            days[year] = Decimal(count)
+    return days
+
+
+def carry_over(previous):
+    """Days of a finished year's balance that move to the next year"""
+    cap = policy(previous.leave_type).get('carry_over', 0)
+    if previous.entitlement is None or not cap:
+        return Decimal(0)
+    left = previous.entitlement + previous.carried_over - previous.taken
+    return max(min(left, Decimal(cap)), Decimal(0))
+
+
+def new_balance(user_id, leave_type, year, previous=None):
+    days = policy(leave_type).get('days')
+    return LeaveBalance(
+        user_id=user_id, leave_type=leave_type, year=year,
+        entitlement=None if days is None else Decimal(days),
+        carried_over=carry_over(previous) if previous else Decimal(0),
+    )
+
+
+def balance_for(user_id, leave_type, year):
+    """The user's balance row for the year, created from the policy and last year's row"""
+    balance = LeaveBalance.objects.filter(user_id=user_id, leave_type=leave_type, year=year).first()
+    if balance is None:
+        previous = LeaveBalance.objects.filter(user_id=user_id, leave_type=leave_type, year=year - 1).first()
+        balance = new_balance(user_id, leave_type, year, previous)
+        LeaveBalance.objects.bulk_create([balance], ignore_conflicts=True)
+        balance = LeaveBalance.objects.get(user_id=user_id, leave_type=leave_type, year=year)
+    return balance
+
+
+def carry_forward(user_id, leave_type, year):
+    """Recompute what moves into each following year after ``year`` changed"""
+    previous = None
+    for balance in LeaveBalance.objects.filter(user_id=user_id, leave_type=leave_type, year__gte=year).order_by('year'):
+        if previous is not None:
+            # A missing year ends the chain; its row starts from scratch when created
+            if balance.year != previous.year + 1:
+                break
+            carried = carry_over(previous)
+            # Unchanged here means unchanged for every later year too
+            if balance.carried_over == carried:
+                break
+            LeaveBalance.objects.filter(pk=balance.pk).update(carried_over=carried)
+            balance.carried_over = carried
+        elif balance.year != year:
+            break
+        previous = balance
+
+
+def accrued(balance, month=12):
+    """Entitlement earned by the end of ``month``; None when uncapped"""
+    if balance.entitlement is None:
+        return None
+    if policy(balance.leave_type).get('accrual') != 'monthly':
+        return balance.entitlement
+    return (balance.entitlement * month / 12).quantize(TENTHS, rounding=ROUND_DOWN)
+
+
+def available(balance, month=12):
+    earned = accrued(balance, month)
+    return None if earned is None else earned + balance.carried_over - balance.taken
+
+
+def overlapping(user_id, start, end, exclude=None):
+    """The approved leave of the user overlapping start..end, if any"""
+    leaves = Leave.objects.filter(employee_id=user_id, status='approved', end_date__gte=start)
+    if exclude is not None:
+        leaves = leaves.exclude(pk=exclude)
+    first = leaves.order_by('end_date').first()
+    return first if first is not None and first.start_date <= end else None
+
+
+def days_worked(user_id, start, end):
+    """Dates in start..end on which the user's attendance shows them working"""
+    return list(
+        Attendance.objects.filter(
+            Q(employee__user_id=user_id) | Q(user_id=user_id),
+            date__range=(start, end), status__in=WORKED,
+        ).order_by('date').values_list('date', flat=True).distinct()
+    )
+
+
+def check_dates(leave):
+    if leave.end_date < leave.start_date:
+        raise ValidationError("The leave cannot end before it starts.")
+    clash = overlapping(leave.employee_id, leave.start_date, leave.end_date, exclude=leave.pk)
+    if clash is not None:
+        raise ValidationError(
+            f"Overlaps approved {clash.leave_type} leave from {clash.start_date} to {clash.end_date}."
+        )
+
+
+@transaction.atomic
+def approve_leave(leave):
+    """Validate and approve a pending leave, charging it to the user's balances"""
+    CustomUser.objects.select_for_update().only('pk').get(pk=leave.employee_id)
+    leave = Leave.objects.select_for_update().get(pk=leave.pk)
+    if leave.status == 'approved':
+        raise ValidationError("This leave is already approved.")
+    check_dates(leave)
+    worked = days_worked(leave.employee_id, leave.start_date, leave.end_date)
+    if worked:
+        raise ValidationError(f"Attendance shows work on {', '.join(str(day) for day in worked[:5])}.")
+
+    days = days_by_year(leave.start_date, leave.end_date)
+    balances = {year: balance_for(leave.employee_id, leave.leave_type, year) for year in days}
+    for year, needed in days.items():
+        month = leave.end_date.month if year == leave.end_date.year else 12
+        left = available(balances[year], month)
+        if left is not None and needed > left:
+            raise ValidationError(
+                f"Needs {needed} days of {leave.leave_type} leave in {year}, {max(left, 0)} available."
+            )
+    for year, needed in days.items():
+        LeaveBalance.objects.filter(pk=balances[year].pk).update(taken=F('taken') + needed)
+        carry_forward(leave.employee_id, leave.leave_type, year)
+
+    leave.status = 'approved'
+    leave.save(update_fields=['status', 'updated_at'])
+    return leave
+
+
+def release(leave):
+    """Give an approved leave's days back to its balances"""
+    for year, days in days_by_year(leave.start_date, leave.end_date).items():
+        LeaveBalance.objects.filter(
+            user_id=leave.employee_id, leave_type=leave.leave_type, year=year,
+        ).update(taken=F('taken') - days)
+        carry_forward(leave.employee_id, leave.leave_type, year)
+
+
+@transaction.atomic
+def reject_leave(leave):
+    leave = Leave.objects.select_for_update().get(pk=leave.pk)
+    if leave.status == 'approved':
+        release(leave)
+    leave.status = 'rejected'
+    leave.save(update_fields=['status', 'updated_at'])
+    return leave
+
+
+@transaction.atomic
+def roll_balances(year):
+    """Open ``year`` rows for every balance of the previous year; returns how many were created"""
+    previous = LeaveBalance.objects.filter(year=year - 1)
+    existing = set(LeaveBalance.objects.filter(year=year).values_list('user_id', 'leave_type'))
+    created = LeaveBalance.objects.bulk_create(
+        [
+            new_balance(row.user_id, row.leave_type, year, row)
+            for row in previous if (row.user_id, row.leave_type) not in existing
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return len(created)
+
+
+def overlapping_approvals():
+    """Pairs of approved leaves of one user that overlap, earlier leave first"""
+    pairs, latest = [], {}
+    for leave in Leave.objects.filter(status='approved').order_by('employee_id', 'start_date', 'pk').iterator():
+        previous = latest.get(leave.employee_id)
+        if previous is not None and leave.start_date <= previous.end_date:
+            pairs.append((previous, leave))
+        if previous is None or leave.end_date > previous.end_date:
+            latest[leave.employee_id] = leave
+    return pairs
+
+
+@transaction.atomic
+def backfill_taken():
+    """Set every balance's ``taken`` from the approved leaves; returns how many rows changed"""
+    taken = defaultdict(Decimal)
+    for leave in Leave.objects.filter(status='approved').iterator():
+        for year, days in days_by_year(leave.start_date, leave.end_date).items():
+            taken[(leave.employee_id, leave.leave_type, year)] += days
+
+    changed = 0
+    for row in LeaveBalance.objects.select_for_update().order_by('pk'):
+        total = taken.pop((row.user_id, row.leave_type, row.year), Decimal(0))
+        if row.taken != total:
+            LeaveBalance.objects.filter(pk=row.pk).update(taken=total)
+            changed += 1
+    # Years without a row yet, oldest first so each opens from the corrected year before
+    for user_id, leave_type, year in sorted(taken):
+        balance = balance_for(user_id, leave_type, year)
+        LeaveBalance.objects.filter(pk=balance.pk).update(taken=taken[(user_id, leave_type, year)])
+        changed += 1
+    for user_id, leave_type, year in LeaveBalance.objects.order_by('year').values_list('user_id', 'leave_type', 'year'):
+        carry_forward(user_id, leave_type, year)
+    return changed
+
+
+def balances(user_id, year, month=12):
+    """Every leave type's balance for the user and year, as report rows"""
+    stored = {
+        (row.leave_type, row.year): row
+        for row in LeaveBalance.objects.filter(user_id=user_id, year__in=(year - 1, year))
+    }
+    rows = []
+    for leave_type, _ in Leave.LEAVE_TYPES:
+        balance = stored.get((leave_type, year)) or new_balance(
+            user_id, leave_type, year, stored.get((leave_type, year - 1)),
+        )
+        rows.append({
+            'leave_type': leave_type,
+            'year': year,
+            'entitlement': balance.entitlement,
+            'accrued': accrued(balance, month),
+            'carried_over': balance.carried_over,
+            'taken': balance.taken,
+            'available': available(balance, month),
+        })
+    return rows
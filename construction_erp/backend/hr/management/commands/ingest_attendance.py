@@ -0,0 +1,62 @@
+import json
+import sys
+from datetime import datetime, timedelta
+
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from core.benchmarks import BenchmarkCommand
+from core.parsers import NDJSONParser
+from hr.attendance import ingest_events
+from hr.models import Employee
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Merge an NDJSON file of clock-in/clock-out events ('-' for stdin) into attendance. "
+        "--benchmark N times the ingestion of N synthetic events inside a transaction "
+        "that is rolled back afterwards."
+    )
+
+    benchmark_help = "Ingest this many synthetic events, report the rate and roll back"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("path", nargs="?", help="NDJSON file of device events")
+        parser.add_argument("--employees", type=int, default=2000,
+                            help="Number of employees the benchmark events are spread over")
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            return self.run_benchmark(options["benchmark"], options["employees"])
+
+        if not options["path"]:
+            raise CommandError("Give an NDJSON file, '-' for stdin, or --benchmark")
+        if options["path"] == "-":
+            summary = ingest_events(NDJSONParser.lines(sys.stdin.buffer, "utf-8"))
+        else:
+            with open(options["path"], "rb") as stream:
+                summary = ingest_events(NDJSONParser.lines(stream, "utf-8"))
+        for error in summary["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Accepted {summary['accepted']} of {summary['received']} events into {summary['rows']} attendance rows"
+        ))
+
+    def benchmark(self, count, employees):
+        self.stdout.write(f"Generating {count} events for {employees} employees...")
+        people = self.seed(Employee, (Employee(email=f"ingest-bench-{n}@example.com") for n in range(employees)))
+        day = timezone.make_aware(datetime.combine(timezone.localdate(), datetime.min.time()))
+        lines = []
+        for n in range(count):
+            check_in = n % 2 == 0
+            moment = day + timedelta(days=n // (2 * employees), hours=7 if check_in else 16, minutes=self.rng.randint(0, 90))
+            event = {"employee": people[(n // 2) % employees].pk, "type": "check_in" if check_in else "check_out",
+                     "timestamp": moment.isoformat()}
+            lines.append(json.dumps(event).encode() + b"\n")
+
+        summary, elapsed = self.timed(ingest_events, NDJSONParser.lines(lines, "utf-8"))
+        self.stdout.write(
+            f"Ingested {summary['accepted']} events into {summary['rows']} rows in {elapsed:.1f}s "
+            f"({summary['accepted'] / elapsed:.0f} events/s)"
+        )
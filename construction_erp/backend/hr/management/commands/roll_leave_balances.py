@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from core.benchmarks import BenchmarkCommand
+from hr.leave import backfill_taken, overlapping, overlapping_approvals, roll_balances
+from hr.models import Leave
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Open leave balances for a year from the previous year's, carrying unused "
+        "days over as LEAVE_POLICY allows. --backfill first recomputes leave taken "
+        "from every approved leave, for leaves approved before balances existed, "
+        "and lists approved leaves that overlap each other. --benchmark N times overlap checks "
+        "against a user with N approved leaves, inside a transaction that is "
+        "rolled back afterwards."
+    )
+
+    benchmark_help = "Seed this many approved leaves for one user, time overlap checks and roll back"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--year", type=int, help="Year to open (defaults to the current year)")
+        parser.add_argument("--backfill", action="store_true",
+                            help="Recompute leave taken from approved leaves and report overlapping approvals")
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            return self.run_benchmark(options["benchmark"])
+
+        if options["backfill"]:
+            self.backfill()
+
+        year = options["year"] or timezone.localdate().year
+        created = roll_balances(year)
+        self.stdout.write(self.style.SUCCESS(f"Opened {created} leave balances for {year}"))
+
+    def backfill(self):
+        changed = backfill_taken()
+        self.stdout.write(f"Recomputed leave taken on {changed} balances")
+        for first, second in overlapping_approvals():
+            self.stdout.write(self.style.WARNING(
+                f"User {first.employee_id}: approved leave {first.pk} ({first.start_date} to {first.end_date}) "
+                f"overlaps leave {second.pk} ({second.start_date} to {second.end_date})"
+            ))
+
+    def benchmark(self, count):
+        self.stdout.write(f"Seeding {count} approved leaves...")
+        user = CustomUser.objects.create_user(email="leave-bench@example.com", password=None)
+        first = date(2000, 1, 3)
+        # Two-day leaves every week, going back as far as needed
+        self.seed(Leave, (
+            Leave(
+                employee=user, leave_type="unpaid", status="approved", reason="benchmark",
+                start_date=first + timedelta(weeks=n), end_date=first + timedelta(weeks=n, days=1),
+            )
+            for n in range(count)
+        ))
+        checks = 1000
+        _, seconds = self.timed(self.check_overlaps, user, first, count, checks)
+        self.stdout.write(f"{checks} overlap checks in {seconds:.2f}s")
+
+    def check_overlaps(self, user, first, count, checks):
+        for n in range(checks):
+            day = first + timedelta(weeks=n * count // checks, days=3)
+            overlapping(user.pk, day, day + timedelta(days=1))
@@ -0,0 +1,55 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import CommandError
+from django.utils.dateparse import parse_date
+
+from core.benchmarks import BenchmarkCommand
+from hr.models import Attendance, Employee
+from hr.payroll import run_payroll
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Run (or re-run) payroll for all active employees over a period. "
+        "--benchmark N times a run over N synthetic employees with a month of "
+        "attendance each, inside a transaction that is rolled back afterwards."
+    )
+
+    benchmark_help = "Seed this many employees, time the run and roll back"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--start", help="First day of the period (YYYY-MM-DD)")
+        parser.add_argument("--end", help="Last day of the period (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        start, end = parse_date(options["start"] or ""), parse_date(options["end"] or "")
+        if start is None or end is None:
+            raise CommandError("--start and --end must be YYYY-MM-DD")
+
+        if options["benchmark"]:
+            return self.run_benchmark(options["benchmark"], start, end)
+
+        run = run_payroll(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Payroll {start} - {end}: {run.employee_count} employees, net {run.total_net}"
+        ))
+
+    def benchmark(self, count, start, end):
+        self.stdout.write(f"Seeding {count} employees with attendance...")
+        employees = self.seed(Employee, (
+            Employee(email=f"payroll-bench-{n}@example.com", salary=Decimal(self.rng.randint(2000, 9000)))
+            for n in range(count)
+        ))
+        days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+        statuses = ["present"] * 16 + ["late", "late", "half-day", "absent"]
+        self.seed(Attendance, (
+            Attendance(employee=employee, date=day, status=self.rng.choice(statuses))
+            for employee in employees for day in days if day.weekday() < 5
+        ))
+
+        run, seconds = self.timed(run_payroll, start, end)
+        self.stdout.write(f"Ran payroll for {run.employee_count} employees in {seconds:.1f}s")
+        _, seconds = self.timed(run_payroll, start, end)
+        self.stdout.write(f"Re-ran it in {seconds:.1f}s")
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0005_hot_column_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payroll',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('processed', 'Processed')], default='draft', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='PayrollRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('processed', 'Processed')], default='draft', max_length=20)),
+                ('employee_count', models.PositiveIntegerField(default=0)),
+                ('total_basic', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_allowances', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_deductions', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_net', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-period_start'],
+                'constraints': [models.UniqueConstraint(fields=('period_start', 'period_end'), name='payrollrun_period_uniq')],
+            },
+        ),
+        migrations.AddField(
+            model_name='payroll',
+            name='run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='payrolls', to='hr.payrollrun'),
+        ),
+        migrations.AddConstraint(
+            model_name='payroll',
+            constraint=models.UniqueConstraint(condition=models.Q(('run__isnull', False)), fields=('employee', 'period_start', 'period_end'), name='payroll_run_employee_period_uniq'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def merge_duplicate_days(apps, schema_editor):
+    """Keep the newest row per employee and day, widened to the earliest check-in and latest check-out"""
+    Attendance = apps.get_model('hr', 'Attendance')
+    duplicates = (
+        Attendance.objects.filter(employee__isnull=False).order_by().values('employee_id', 'date')
+        .annotate(rows=Count('id'), keep=Max('id'), check_in=Min('check_in'), check_out=Max('check_out'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates.iterator():
+        Attendance.objects.filter(pk=row['keep']).update(check_in=row['check_in'], check_out=row['check_out'])
+        Attendance.objects.filter(employee_id=row['employee_id'], date=row['date']).exclude(pk=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0006_payroll_runs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_days, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('employee', 'date'), name='attendance_employee_date_uniq'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0007_attendance_employee_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimesheetPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start'), name='timesheetperiod_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TimesheetSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('days_worked', models.PositiveIntegerField(default=0)),
+                ('worked', models.DurationField()),
+                ('overtime', models.DurationField()),
+                ('absences', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('half_days', models.PositiveIntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timesheets', to='hr.employee')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start', 'employee'), name='timesheetsummary_uniq')],
+            },
+        ),
+    ]
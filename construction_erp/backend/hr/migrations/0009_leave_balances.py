@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0008_timesheets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leave_type', models.CharField(choices=[('annual', 'Annual Leave'), ('sick', 'Sick Leave'), ('maternity', 'Maternity Leave'), ('paternity', 'Paternity Leave'), ('unpaid', 'Unpaid Leave')], max_length=20)),
+                ('year', models.PositiveIntegerField()),
+                ('entitlement', models.DecimalField(blank=True, decimal_places=1, max_digits=6, null=True)),
+                ('carried_over', models.DecimalField(decimal_places=1, default=0, max_digits=6)),
+                ('taken', models.DecimalField(decimal_places=1, default=0, max_digits=6)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['employee', 'status', 'end_date'], name='leave_employee_status_end_idx'),
+        ),
+        migrations.AddField(
+            model_name='leavebalance',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='leavebalance',
+            constraint=models.UniqueConstraint(fields=('user', 'leave_type', 'year'), name='leavebalance_user_type_year_uniq'),
+        ),
+    ]
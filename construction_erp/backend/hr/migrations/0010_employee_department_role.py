@@ -0,0 +1,120 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:03
+
+import logging
+import re
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(name):
+    return ' '.join(re.sub(r'[^\w\s]', ' ', name or '').casefold().split())
+
+
+def one_edit(a, b):
+    """Whether a and b differ by at most one insertion, deletion, substitution or swap"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    start = 0
+    while start < min(len(a), len(b)) and a[start] == b[start]:
+        start += 1
+    if len(a) == len(b):
+        swapped = a[start + 1:start + 2] + a[start:start + 1] + a[start + 2:]
+        return a[start + 1:] == b[start + 1:] or swapped == b[start:]
+    shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+    return shorter[start:] == longer[start + 1:]
+
+
+def same_name(a, b):
+    """Typo-level variants of one name: same tokens, each at most one edit apart, numbers identical"""
+    left, right = a.split(), b.split()
+    return len(left) == len(right) and all(
+        x == y or (not any(c.isdigit() for c in x + y) and min(len(x), len(y)) >= 4 and one_edit(x, y))
+        for x, y in zip(left, right)
+    )
+
+
+def match_names(model, texts):
+    """Map each free-text name to a row of ``model``: existing rows first, then more common spellings"""
+    rows = {normalize(row.name): row for row in model.objects.all()}
+    matched = defaultdict(list)
+    for text, count in Counter(texts).most_common():
+        key = normalize(text)
+        if not key:
+            continue
+        if key not in rows:
+            close = next((known for known in rows if same_name(key, known)), None)
+            if close is not None:
+                logger.warning(
+                    "Merged %s %r (%d employees) into %r", model.__name__, text, count, rows[close].name,
+                )
+                key = close
+            else:
+                rows[key] = model.objects.create(name=' '.join(text.split())[:100])
+        matched[rows[key].pk].append(text)
+    return matched
+
+
+def link_names(apps, schema_editor):
+    """Point employees at Department and Role rows matching their free-text department and position"""
+    Employee = apps.get_model('hr', 'Employee')
+    for text_field, fk_field, model in (
+        ('department', 'department_ref', apps.get_model('hr', 'Department')),
+        ('position', 'role', apps.get_model('hr', 'Role')),
+    ):
+        # One entry per employee, so the most common spelling names a new row
+        texts = Employee.objects.exclude(**{text_field: None}).values_list(text_field, flat=True)
+        for pk, spellings in match_names(model, texts).items():
+            Employee.objects.filter(**{f'{text_field}__in': spellings}).update(**{f'{fk_field}_id': pk})
+
+
+def unlink_names(apps, schema_editor):
+    Employee = apps.get_model('hr', 'Employee')
+    for employee in Employee.objects.select_related('department_ref', 'role'):
+        employee.department = employee.department_ref.name if employee.department_ref else None
+        employee.position = employee.role.name if employee.role else None
+        employee.save(update_fields=['department', 'position'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0009_leave_balances'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='department_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='hr.department'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='role',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='employees', to='hr.role'),
+        ),
+        migrations.RunPython(link_names, unlink_names),
+        migrations.RemoveField(
+            model_name='employee',
+            name='department',
+        ),
+        migrations.RemoveField(
+            model_name='employee',
+            name='position',
+        ),
+        migrations.RenameField(
+            model_name='employee',
+            old_name='department_ref',
+            new_name='department',
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='employees', to='hr.department'),
+        ),
+    ]
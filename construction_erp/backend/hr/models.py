@@ -25,8 +25,10 @@ class Employee(models.Model):
     last_name = models.CharField(max_length=100, default='User')
     email = models.EmailField(unique=True, default='temp@example.com')
     phone = models.CharField(max_length=20, blank=True, null=True)
-    position = models.CharField(max_length=100, blank=True, null=True)
-    department = models.CharField(max_length=100, blank=True, null=True)
+    role = models.ForeignKey(Role, on_delete=models.SET_NULL, related_name='employees', null=True, blank=True)
+    department = models.ForeignKey(
+        Department, on_delete=models.SET_NULL, related_name='employees', null=True, blank=True,
+    )
     hire_date = models.DateField(blank=True, null=True)
     salary = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
     is_active = models.BooleanField(default=True)
@@ -50,7 +52,7 @@ class Attendance(models.Model):
     
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='attendance_records', blank=True, null=True)
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='attendance', blank=True, null=True)
-    date = models.DateField(default=timezone.now)
+    date = models.DateField(default=timezone.localdate)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='present')
     check_in = models.DateTimeField(blank=True, null=True)
     check_out = models.DateTimeField(blank=True, null=True)
@@ -60,19 +62,111 @@ class Attendance(models.Model):
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='attendance_date_desc_idx'),
+        ]
+        constraints = [
+            # One row per employee and day; device events are merged into it (see hr.attendance)
+            models.UniqueConstraint(fields=['employee', 'date'], name='attendance_employee_date_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.employee or self.user} - {self.date} ({self.status})"
 
 
+class TimesheetPeriod(models.Model):
+    """Marks a closed week or month whose TimesheetSummary rows are stored (see hr.timesheets)"""
+    PERIOD_CHOICES = [
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'period_start'], name='timesheetperiod_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} of {self.period_start}"
+
+
+class TimesheetSummary(models.Model):
+    """Hours and attendance counts of one employee over a closed week or month"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='timesheets')
+    period = models.CharField(max_length=10, choices=TimesheetPeriod.PERIOD_CHOICES)
+    period_start = models.DateField()
+    days_worked = models.PositiveIntegerField(default=0)
+    worked = models.DurationField()
+    overtime = models.DurationField()
+    absences = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    half_days = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'period_start', 'employee'], name='timesheetsummary_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee} {self.period} of {self.period_start}"
+
+
+class PayrollRun(models.Model):
+    """One payroll batch over all active employees for a period (see hr.payroll)"""
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('processed', 'Processed'),
+    ]
+
+    period_start = models.DateField()
+    period_end = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    employee_count = models.PositiveIntegerField(default=0)
+    total_basic = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_allowances = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_deductions = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_net = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['period_start', 'period_end'], name='payrollrun_period_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Payroll {self.period_start} - {self.period_end} ({self.status})"
+
+
 class Payroll(models.Model):
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('processed', 'Processed'),
+    ]
+
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    run = models.ForeignKey(PayrollRun, on_delete=models.CASCADE, related_name='payrolls', null=True, blank=True)
     period_start = models.DateField()
     period_end = models.DateField()
     basic_salary = models.DecimalField(max_digits=12, decimal_places=2)
     allowances = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     deductions = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     net_salary = models.DecimalField(max_digits=12, decimal_places=2)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+
+    class Meta:
+        constraints = [
+            # Manual records may overlap; a run pays each employee once per period
+            models.UniqueConstraint(
+                fields=['employee', 'period_start', 'period_end'], condition=models.Q(run__isnull=False),
+                name='payroll_run_employee_period_uniq',
+            ),
+        ]
 
     def calculate_net_salary(self):
         return self.basic_salary + self.allowances - self.deductions
@@ -105,6 +199,31 @@ class Leave(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Overlap checks range-scan one user's approved leaves by end date (see hr.leave)
+            models.Index(fields=['employee', 'status', 'end_date'], name='leave_employee_status_end_idx'),
+        ]
+
     def __str__(self):
         return f"{self.employee.username} - {self.leave_type} ({self.status})"
 
+
+class LeaveBalance(models.Model):
+    """A user's entitlement and usage of one leave type in one calendar year (see hr.leave)"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='leave_balances')
+    leave_type = models.CharField(max_length=20, choices=Leave.LEAVE_TYPES)
+    year = models.PositiveIntegerField()
+    # Working days for the whole year; null means the type is not capped
+    entitlement = models.DecimalField(max_digits=6, decimal_places=1, null=True, blank=True)
+    carried_over = models.DecimalField(max_digits=6, decimal_places=1, default=0)
+    taken = models.DecimalField(max_digits=6, decimal_places=1, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'leave_type', 'year'], name='leavebalance_user_type_year_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.leave_type} {self.year}"
@@ -0,0 +1,143 @@
+"""
+Departments and roles.
+
+Employees point at Department and Role rows. Names typed by hand still work
+when they match an existing row ignoring case, punctuation and spacing, so
+"site-ops" finds "Site Ops". Anything else is refused with the closest names
+as suggestions rather than guessed at or created; "Plant 2" must never land
+in "Plant 1". Typo-level merging of the old free text was done once, and
+logged, by migration hr 0010.
+
+The org tree (departments -> employees -> users) is built with two queries
+and kept in this process until a department, role, employee or user changes,
+which clears it through hr.signals. A build that overlaps a change is not
+kept. Other worker processes keep their tree until they see a change
+themselves, so it serves lookups and navigation, not figures that must be
+exact; department totals are aggregated in SQL.
+"""
+import difflib
+import re
+import threading
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Avg, Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Department, Employee, Payroll
+
+_tree = None
+_version = 0
+_lock = threading.Lock()
+
+
+def normalize(name):
+    return ' '.join(re.sub(r'[^\w\s]', ' ', name or '').casefold().split())
+
+
+def suggestions(name, candidates, limit=3):
+    """Existing names that look like ``name``, closest first"""
+    keys = {normalize(candidate): candidate for candidate in candidates}
+    return [keys[key] for key in difflib.get_close_matches(normalize(name), keys, n=limit, cutoff=0.6)]
+
+
+def resolve(model, name):
+    """The Department or Role named ``name`` (ignoring case and punctuation); None when blank"""
+    key = normalize(name)
+    if not key:
+        return None
+    names = list(model.objects.values_list('name', flat=True))
+    for candidate in names:
+        if normalize(candidate) == key:
+            return model.objects.get(name=candidate)
+    close = suggestions(name, names)
+    hint = f" Did you mean {', '.join(repr(candidate) for candidate in close)}?" if close else ""
+    raise ValidationError(f"No {model._meta.verbose_name} named {name!r}.{hint}")
+
+
+class OrgTree:
+    """Departments with their employees and users, plus lookups by employee and user id"""
+
+    def __init__(self, departments, employees):
+        nodes = {department['id']: dict(department, employees=[]) for department in departments}
+        unassigned = {'id': None, 'name': None, 'employees': []}
+        self.department_of = {}
+        self.employee_of = {}
+        for employee in employees:
+            node = nodes.get(employee['department_id'], unassigned)
+            node['employees'].append({
+                'id': employee['id'],
+                'name': f"{employee['first_name']} {employee['last_name']}",
+                'email': employee['email'],
+                'role': employee['role__name'],
+                'is_active': employee['is_active'],
+                'user': {'id': employee['user_id'], 'email': employee['user__email']} if employee['user_id'] else None,
+            })
+            self.department_of[employee['id']] = employee['department_id']
+            if employee['user_id']:
+                self.employee_of[employee['user_id']] = employee['id']
+        self.departments = list(nodes.values()) + ([unassigned] if unassigned['employees'] else [])
+        self.names = {pk: node['name'] for pk, node in nodes.items()}
+
+    def department_for_user(self, user_id):
+        """Name of the department of the user's employee record, if any"""
+        return self.names.get(self.department_of.get(self.employee_of.get(user_id)))
+
+
+def build_tree():
+    departments = Department.objects.order_by('name').values('id', 'name')
+    employees = Employee.objects.order_by('last_name', 'first_name', 'pk').values(
+        'id', 'first_name', 'last_name', 'email', 'is_active', 'department_id', 'role__name', 'user_id', 'user__email',
+    )
+    return OrgTree(departments, employees)
+
+
+def org_tree():
+    """The cached org tree, built on first use after a change"""
+    global _tree
+    with _lock:
+        tree, version = _tree, _version
+    if tree is None:
+        tree = build_tree()
+        with _lock:
+            if version == _version:
+                _tree = tree
+    return tree
+
+
+def clear_tree():
+    global _tree, _version
+    with _lock:
+        _tree = None
+        _version += 1
+
+
+def forget_tree(**kwargs):
+    """Signal receiver: drop the tree now and again once the change is committed"""
+    clear_tree()
+    transaction.on_commit(clear_tree)
+
+
+def department_totals(first, last):
+    """Headcount, salary and payroll cost (periods starting first..last) per department"""
+    zero = Value(Decimal(0), output_field=DecimalField(max_digits=14, decimal_places=2))
+    active = Q(is_active=True)
+    rows = list(
+        Employee.objects.order_by().values('department_id', 'department__name').annotate(
+            headcount=Count('id', filter=active),
+            inactive=Count('id', filter=~active),
+            salary_cost=Coalesce(Sum('salary', filter=active), zero),
+            average_salary=Avg('salary', filter=active),
+        )
+    )
+    payroll = dict(
+        Payroll.objects.filter(period_start__range=(first, last)).order_by()
+        .values_list('employee__department_id').annotate(cost=Sum(F('basic_salary') + F('allowances')))
+    )
+    for row in rows:
+        row['department'] = row.pop('department__name')
+        row['payroll_cost'] = payroll.get(row['department_id']) or Decimal(0)
+        if row['average_salary'] is not None:
+            row['average_salary'] = Decimal(row['average_salary']).quantize(Decimal('0.01'))
+    return sorted(rows, key=lambda row: (row['department'] is None, row['department'] or ''))
@@ -1,37 +1,89 @@
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Employee, Attendance, Payroll, Leave
+from rest_framework.validators import UniqueTogetherValidator
+from .models import Department, Employee, Attendance, Payroll, PayrollRun, Leave, Role
 from accounts.models import CustomUser  # ADD THIS IMPORT
+from .leave import check_dates
+from .org import resolve
+
+
+class NamedRowField(serializers.SlugRelatedField):
+    """Department or Role by id or by name, ignoring case and punctuation (see hr.org)"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("slug_field", "name")
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) or (isinstance(data, str) and data.strip().isdigit()):
+            try:
+                return self.get_queryset().get(pk=int(data))
+            except ObjectDoesNotExist:
+                self.fail("does_not_exist", slug_name="id", value=data)
+        if not isinstance(data, str):
+            self.fail("invalid")
+        try:
+            return resolve(self.get_queryset().model, data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+
+class DepartmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Department
+        fields = "__all__"
+
+
+class RoleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Role
+        fields = "__all__"
 
 
 class EmployeeSerializer(serializers.ModelSerializer):
+    department = NamedRowField(queryset=Department.objects.all(), required=False, allow_null=True)
+    # The job title, kept under its old name; "role" is the id
+    position = NamedRowField(source="role", queryset=Role.objects.all(), required=False, allow_null=True)
+
     class Meta:
         model = Employee
         fields = "__all__"
         extra_kwargs = {
             "user": {"required": False, "allow_null": True},
             "phone": {"required": False, "allow_blank": True},
-            "position": {"required": False, "allow_blank": True},
-            "department": {"required": False, "allow_blank": True},
+            "role": {"read_only": True},
             "hire_date": {"required": False, "allow_null": True},
             "salary": {"required": False, "allow_null": True},
         }
 
 
 class AttendanceSerializer(serializers.ModelSerializer):
+    # The defaults let the unique validator pass over records kept against a user only
     employee = serializers.PrimaryKeyRelatedField(
         queryset=Employee.objects.all(),
         required=False,
-        allow_null=True
+        allow_null=True,
+        default=None,
     )
     user = serializers.PrimaryKeyRelatedField(
         queryset=CustomUser.objects.all(),
         required=False,
         allow_null=True
     )
+    date = serializers.DateField(default=timezone.localdate)
 
     class Meta:
         model = Attendance
         fields = '__all__'
+        # DRF does not derive validators from the attendance_employee_date_uniq constraint
+        validators = [
+            UniqueTogetherValidator(
+                queryset=Attendance.objects.all(),
+                fields=['employee', 'date'],
+                message="Attendance for this employee and date already exists.",
+            ),
+        ]
         extra_kwargs = {
             'check_in': {'required': False},
             'check_out': {'required': False},
@@ -43,9 +95,45 @@ class PayrollSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payroll
         fields = "__all__"
+        # Runs create and process their rows; see hr.payroll
+        read_only_fields = ["run", "status"]
+
+
+class PayrollRunSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PayrollRun
+        fields = "__all__"
+        read_only_fields = [
+            "status", "employee_count", "total_basic", "total_allowances", "total_deductions", "total_net",
+        ]
+        # Posting a period that already has a run re-runs it
+        validators = []
+
+    def validate(self, attrs):
+        if attrs["period_end"] < attrs["period_start"]:
+            raise serializers.ValidationError({"period_end": "The period cannot end before it starts."})
+        return attrs
 
 
 class LeaveSerializer(serializers.ModelSerializer):
     class Meta:
         model = Leave
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+        # Changed through the approve and reject actions (see hr.leave)
+        read_only_fields = ["status"]
+
+    def validate(self, attrs):
+        if self.instance is not None and self.instance.status == "approved":
+            raise serializers.ValidationError("Approved leave cannot be changed; reject it first.")
+        current = self.instance
+        leave = Leave(
+            pk=current.pk if current else None,
+            employee=attrs.get("employee", current and current.employee),
+            start_date=attrs.get("start_date", current and current.start_date),
+            end_date=attrs.get("end_date", current and current.end_date),
+        )
+        try:
+            check_dates(leave)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return attrs
\ No newline at end of file
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from accounts.models import CustomUser
+
+from .models import Attendance, Department, Employee, Role
+from .org import forget_tree
+from .timesheets import invalidate
+
+
+def remember_date(sender, instance, **kwargs):
+    """Capture the stored day so moving a record also refreshes its old period"""
+    instance._timesheet_date = (
+        Attendance.objects.filter(pk=instance.pk).values_list("date", flat=True).first() if instance.pk else None
+    )
+
+
+def refresh_timesheets(sender, instance, **kwargs):
+    invalidate(day for day in (instance.date, getattr(instance, "_timesheet_date", None)) if day)
+
+
+pre_save.connect(remember_date, sender=Attendance, dispatch_uid="timesheet_pre_save")
+post_save.connect(refresh_timesheets, sender=Attendance, dispatch_uid="timesheet_post_save")
+post_delete.connect(refresh_timesheets, sender=Attendance, dispatch_uid="timesheet_post_delete")
+
+for model in (Department, Role, Employee, CustomUser):
+    post_save.connect(forget_tree, sender=model, dispatch_uid=f"org_tree_post_save_{model.__name__}")
+    post_delete.connect(forget_tree, sender=model, dispatch_uid=f"org_tree_post_delete_{model.__name__}")
@@ -1,3 +1,477 @@
-from django.test import TestCase
+import io
+import json
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+
+from .leave import approve_leave, backfill_taken, overlapping, reject_leave, roll_balances
+from .models import (
+    Attendance, Department, Employee, Leave, LeaveBalance, Payroll, PayrollRun, Role, TimesheetPeriod,
+    TimesheetSummary,
+)
+from .attendance import ingest_events
+from .org import org_tree
+from .payroll import process_run, run_payroll
+from .timesheets import timesheet
+
+# September 2026 has 22 working days
+START, END = date(2026, 9, 1), date(2026, 9, 30)
+
+
+@override_settings(PAYROLL_ALLOWANCE_RATE=0.1, PAYROLL_TAX_RATE=0.2, PAYROLL_LATE_PENALTY=5)
+class PayrollRunTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(email="mason@example.com", password="x")
+        self.mason = Employee.objects.create(email="mason@example.com", salary=2200, user=user)
+        self.clerk = Employee.objects.create(email="clerk@example.com", salary=1100)
+        Employee.objects.create(email="gone@example.com", salary=5000, is_active=False)
+        Employee.objects.create(email="volunteer@example.com")
+
+        Attendance.objects.create(employee=self.mason, date=date(2026, 9, 1), status="absent")
+        Attendance.objects.create(employee=self.mason, date=date(2026, 9, 2), status="half-day")
+        # Recorded against the user account only
+        Attendance.objects.create(user=user, date=date(2026, 9, 3), status="late")
+        Attendance.objects.create(employee=self.mason, date=date(2026, 10, 1), status="absent")
+        # Thu 24th to Tue 29th: four working days, only approved unpaid leave counts
+        Leave.objects.create(
+            employee=user, leave_type="unpaid", status="approved",
+            start_date=date(2026, 9, 24), end_date=date(2026, 9, 29), reason="Family",
+        )
+        Leave.objects.create(
+            employee=user, leave_type="annual", status="approved",
+            start_date=date(2026, 9, 14), end_date=date(2026, 9, 15), reason="Holiday",
+        )
+
+    def test_run_computes_pay(self):
+        run = run_payroll(START, END)
+        self.assertEqual(run.employee_count, 2)
+        mason = Payroll.objects.get(run=run, employee=self.mason)
+        # 5.5 unpaid days at 100/day, one late day, 20% tax on 2420 - 550
+        self.assertEqual(mason.basic_salary, Decimal("2200.00"))
+        self.assertEqual(mason.allowances, Decimal("220.00"))
+        self.assertEqual(mason.deductions, Decimal("929.00"))
+        self.assertEqual(mason.net_salary, Decimal("1491.00"))
+        clerk = Payroll.objects.get(run=run, employee=self.clerk)
+        self.assertEqual(clerk.net_salary, Decimal("968.00"))
+        self.assertEqual(run.total_net, Decimal("2459.00"))
+
+    def test_rerun_is_idempotent_until_processed(self):
+        first = run_payroll(START, END)
+        self.clerk.salary = 1210
+        self.clerk.save()
+        second = run_payroll(START, END)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Payroll.objects.filter(run=second).count(), 2)
+        self.assertEqual(Payroll.objects.get(employee=self.clerk).basic_salary, Decimal("1210.00"))
+
+        response = APIClient().post(f"/api/payroll-runs/{second.pk}/process/")
+        self.assertEqual(response.json()["status"], "processed")
+        self.assertFalse(Payroll.objects.filter(run=second).exclude(status="processed").exists())
+        with self.assertRaises(ValidationError):
+            run_payroll(START, END)
+        # A stale copy of the run can't process it twice
+        with self.assertRaisesMessage(ValidationError, "already been processed"):
+            process_run(first)
+        self.assertEqual(APIClient().post(f"/api/payroll-runs/{second.pk}/process/").status_code, 400)
+
+    def test_manual_records_are_skipped(self):
+        Payroll.objects.create(employee=self.clerk, period_start=START, period_end=END, basic_salary=1100)
+        run = run_payroll(START, END)
+        self.assertEqual(list(run.payrolls.values_list("employee_id", flat=True)), [self.mason.pk])
+
+    def test_api(self):
+        client = APIClient()
+        response = client.post("/api/payroll-runs/", {"period_start": "2026-09-01", "period_end": "2026-09-30"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["employee_count"], 2)
+        rows = client.get(f"/api/payroll-runs/{response.json()['id']}/payrolls/").json()["results"]
+        self.assertEqual(len(rows), 2)
+        response = client.post("/api/payroll-runs/", {"period_start": "2026-09-30", "period_end": "2026-09-01"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(PayrollRun.objects.count(), 1)
+
+    def test_single_payroll_process(self):
+        payroll = Payroll.objects.create(employee=self.clerk, period_start=START, period_end=END, basic_salary=1100)
+        client = APIClient()
+        client.post(f"/api/payroll/{payroll.pk}/process/")
+        payroll.refresh_from_db()
+        self.assertEqual(payroll.status, "processed")
+        self.assertEqual(client.patch(f"/api/payroll/{payroll.pk}/", {"basic_salary": "1"}).status_code, 400)
+
+    def test_run_rows_change_only_through_the_run(self):
+        run = run_payroll(START, END)
+        row = run.payrolls.get(employee=self.clerk)
+        client = APIClient()
+        for response in (
+            client.patch(f"/api/payroll/{row.pk}/", {"basic_salary": "1"}),
+            client.delete(f"/api/payroll/{row.pk}/"),
+            client.post(f"/api/payroll/{row.pk}/process/"),
+        ):
+            self.assertEqual(response.status_code, 400)
+        row.refresh_from_db()
+        self.assertEqual((row.basic_salary, row.status), (Decimal("1100.00"), "draft"))
+
+        # Manual records can't be attached to a run or marked processed by hand
+        response = client.post("/api/payroll/", {
+            "employee": self.clerk.pk, "run": run.pk, "status": "processed", "period_start": "2026-08-01",
+            "period_end": "2026-08-31", "basic_salary": "10", "net_salary": "10",
+        })
+        self.assertEqual((response.json()["run"], response.json()["status"]), (None, "draft"))
+
+
+def ndjson(*events):
+    return "".join(json.dumps(event) + "\n" for event in events)
+
+
+@override_settings(ATTENDANCE_SHIFT_START="08:00", ATTENDANCE_LATE_GRACE_MINUTES=10, ATTENDANCE_HALF_DAY_HOURS=4)
+class AttendanceIngestionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.mason = Employee.objects.create(email="mason@example.com")
+        self.clerk = Employee.objects.create(email="clerk@example.com")
+
+    def at(self, day, hour, minute=0):
+        return timezone.make_aware(datetime(2025, 10, day, hour, minute)).isoformat()
+
+    def post(self, body):
+        return self.client.post("/api/attendance/ingest/", body, content_type="application/x-ndjson")
+
+    def test_events_merge_into_daily_rows(self):
+        response = self.post(ndjson(
+            {"employee": self.mason.pk, "type": "check_in", "timestamp": self.at(5, 7, 55)},
+            {"employee": self.mason.pk, "type": "check_in", "timestamp": self.at(5, 8, 30)},
+            {"employee": self.clerk.pk, "type": "in", "timestamp": self.at(5, 8, 25)},
+            {"employee": self.clerk.pk, "type": "out", "timestamp": self.at(5, 11, 0)},
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rows"], 2)
+        mason = Attendance.objects.get(employee=self.mason)
+        self.assertEqual(mason.status, "present")
+        self.assertEqual(timezone.localtime(mason.check_in).time().isoformat(), "07:55:00")
+        self.assertEqual(Attendance.objects.get(employee=self.clerk).status, "half-day")
+
+        # A later batch completes the day of an existing row
+        # employees, savepoint, locked read, upsert, dropping stored timesheets (week, month), release
+        with self.assertNumQueries(7):
+            self.post(ndjson({"employee": self.mason.pk, "type": "check_out", "timestamp": self.at(5, 17)}))
+        mason = Attendance.objects.get(employee=self.mason)
+        self.assertEqual(timezone.localtime(mason.check_in).time().isoformat(), "07:55:00")
+        self.assertEqual(timezone.localtime(mason.check_out).hour, 17)
+        self.assertEqual(Attendance.objects.count(), 2)
+
+    def test_duplicate_days_are_rejected(self):
+        day = {"employee": self.mason.pk, "date": "2025-10-08", "status": "present"}
+        self.assertEqual(self.client.post("/api/attendance/", day, format="json").status_code, 201)
+        response = self.client.post("/api/attendance/", day, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("already exists", response.json()["non_field_errors"][0])
+        response = self.client.post("/api/attendance/", [day], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"][0]["index"], 0)
+        # Records without an employee are not constrained
+        user = CustomUser.objects.create_user(email="walkin@example.com", password="x")
+        for _ in range(2):
+            self.assertEqual(self.client.post("/api/attendance/", {"user": user.pk}, format="json").status_code, 201)
+
+    def test_late_arrival_and_manual_rows(self):
+        Attendance.objects.create(employee=self.mason, date=date(2025, 10, 6), status="absent")
+        self.post(ndjson({"employee": self.mason.pk, "type": "check_in", "timestamp": self.at(6, 8, 11)}))
+        row = Attendance.objects.get(employee=self.mason)
+        self.assertEqual(row.status, "late")
+
+    def test_bad_lines_are_reported(self):
+        body = ndjson(
+            {"employee": self.mason.pk, "type": "check_in", "timestamp": self.at(7, 8)},
+            {"employee": 999999, "type": "check_in", "timestamp": self.at(7, 8)},
+            {"employee": self.mason.pk, "type": "lunch", "timestamp": self.at(7, 12)},
+        ) + "\n{not json\n"
+        summary = self.post(body).json()
+        self.assertEqual((summary["received"], summary["accepted"], summary["rejected"]), (4, 1, 3))
+        self.assertEqual([error["line"] for error in summary["errors"]], [3, 5, 2])
+
+
+@override_settings(ATTENDANCE_STANDARD_HOURS=8)
+@skipUnlessDBFeature("has_select_for_update")
+class AttendanceIngestionConcurrencyTests(TransactionTestCase):
+    days = 10
+
+    def test_split_check_in_and_check_out(self):
+        mason = Employee.objects.create(email="mason@example.com")
+        barrier = threading.Barrier(2)
+        errors = []
+
+        def worker(kind, hour):
+            try:
+                for day in range(1, self.days + 1):
+                    moment = timezone.make_aware(datetime(2025, 10, day, hour))
+                    event = {"employee": mason.pk, "type": kind, "timestamp": moment.isoformat()}
+                    # Both devices report the same new day at once
+                    barrier.wait()
+                    ingest_events([(1, event, None)])
+            except Exception as e:  # surfaced in the main thread below
+                errors.append(e)
+                barrier.abort()
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=args) for args in (("check_in", 8), ("check_out", 17))]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        rows = Attendance.objects.filter(employee=mason)
+        self.assertEqual(rows.count(), self.days)
+        self.assertFalse(rows.filter(check_in__isnull=True).exists())
+        self.assertFalse(rows.filter(check_out__isnull=True).exists())
+
+
+class TimesheetTests(TestCase):
+    def setUp(self):
+        site, office = Department.objects.create(name="Site"), Department.objects.create(name="Office")
+        self.mason = Employee.objects.create(email="mason@example.com", first_name="Ada", department=site)
+        self.clerk = Employee.objects.create(email="clerk@example.com", department=office)
+        # Monday 7 and Tuesday 8 September 2026
+        self.day(self.mason, date(2026, 9, 7), 10)
+        self.day(self.mason, date(2026, 9, 8), 6, status="late")
+        self.day(self.clerk, date(2026, 9, 7), 8)
+        Attendance.objects.create(employee=self.clerk, date=date(2026, 9, 8), status="absent")
+
+    def day(self, employee, day, hours, status="present"):
+        check_in = timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=8))
+        return Attendance.objects.create(
+            employee=employee, date=day, status=status, check_in=check_in, check_out=check_in + timedelta(hours=hours),
+        )
+
+    def test_weekly_rows(self):
+        rows = timesheet("week", date(2026, 9, 7), date(2026, 9, 13), today=date(2026, 9, 9))
+        mason = next(row for row in rows if row["employee"] == self.mason.pk)
+        self.assertEqual((mason["hours"], mason["overtime_hours"]), (Decimal("16.00"), Decimal("2.00")))
+        self.assertEqual((mason["days_worked"], mason["late"], mason["closed"]), (2, 1, False))
+        clerk = next(row for row in rows if row["employee"] == self.clerk.pk)
+        self.assertEqual((clerk["hours"], clerk["absences"]), (Decimal("8.00"), 1))
+        # The open week is not stored
+        self.assertFalse(TimesheetPeriod.objects.exists())
+
+    def test_closed_periods_are_stored_and_refreshed(self):
+        later = date(2026, 10, 18)
+        first = timesheet("month", date(2026, 9, 1), date(2026, 9, 30), today=later)
+        self.assertEqual(TimesheetSummary.objects.filter(period="month").count(), 2)
+        with self.assertNumQueries(3):  # marker, stored rows, employee names
+            self.assertEqual(timesheet("month", date(2026, 9, 1), date(2026, 9, 30), today=later), first)
+
+        # Late data for the closed month drops it and the next report recomputes it
+        self.day(self.mason, date(2026, 9, 9), 9)
+        self.assertFalse(TimesheetPeriod.objects.exists())
+        rows = timesheet("month", date(2026, 9, 1), date(2026, 9, 30), employee=self.mason.pk, today=later)
+        self.assertEqual([row["hours"] for row in rows], [Decimal("25.00")])
+
+    def test_datetime_dates_invalidate_their_day(self):
+        Attendance.objects.create(employee=self.clerk)
+        timesheet("month", date(2026, 9, 1), date(2026, 9, 30), today=date(2026, 10, 18))
+        Attendance.objects.create(
+            employee=self.mason, date=timezone.make_aware(datetime(2026, 9, 10, 12)), status="absent",
+        )
+        self.assertFalse(TimesheetPeriod.objects.filter(period="month", period_start=date(2026, 9, 1)).exists())
+
+    def test_department_and_endpoint(self):
+        rows = timesheet("department", date(2026, 9, 1), date(2026, 9, 30), today=date(2026, 10, 1))
+        self.assertEqual(
+            [(row["department"], row["employees"], row["hours"]) for row in rows],
+            [("Office", 1, Decimal("8.00")), ("Site", 1, Decimal("16.00"))],
+        )
+        client = APIClient()
+        response = client.get("/api/attendance/timesheet/", {
+            "from": "2026-09-01", "to": "2026-09-30", "group": "month", "employee": self.clerk.pk,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["employee"] for row in response.json()["rows"]], [self.clerk.pk])
+        self.assertEqual(client.get("/api/attendance/timesheet/", {"group": "year"}).status_code, 400)
+        self.assertEqual(client.get("/api/attendance/timesheet/", {"from": "2026-09-30", "to": "2026-09-01"}).status_code, 400)
+        self.assertEqual(client.get("/api/attendance/timesheet/", {"from": "2026-02-30"}).status_code, 400)
+
+
+@override_settings(LEAVE_POLICY={
+    "annual": {"days": 24, "accrual": "monthly", "carry_over": 5},
+    "sick": {"days": 3},
+    "unpaid": {"days": None},
+})
+class LeaveBalanceTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="mason@example.com", password="x")
+        self.employee = Employee.objects.create(email="mason@example.com", user=self.user)
+
+    def leave(self, start, end, leave_type="annual", status="pending"):
+        return Leave.objects.create(
+            employee=self.user, leave_type=leave_type, status=status, start_date=start, end_date=end, reason="Rest",
+        )
+
+    def balance(self, leave_type="annual", year=2026):
+        return LeaveBalance.objects.get(user=self.user, leave_type=leave_type, year=year)
+
+    def test_approval_charges_accrued_balance(self):
+        # Mon 2 to Fri 13 March: ten working days of the six accrued by the end of March
+        with self.assertRaisesMessage(ValidationError, "6.0 available"):
+            approve_leave(self.leave(date(2026, 3, 2), date(2026, 3, 13)))
+        approve_leave(self.leave(date(2026, 6, 1), date(2026, 6, 5)))
+        self.assertEqual(self.balance().taken, Decimal("5"))
+
+        leave = self.leave(date(2026, 7, 6), date(2026, 7, 7), leave_type="sick")
+        approve_leave(leave)
+        reject_leave(leave)
+        self.assertEqual(self.balance("sick").taken, Decimal("0"))
+        # Uncapped types only get overlap checks
+        approve_leave(self.leave(date(2026, 8, 3), date(2026, 8, 28), leave_type="unpaid"))
+
+    def test_overlaps_and_attendance_are_refused(self):
+        approve_leave(self.leave(date(2026, 6, 1), date(2026, 6, 5)))
+        self.assertEqual(overlapping(self.user.pk, date(2026, 6, 5), date(2026, 6, 9)).start_date, date(2026, 6, 1))
+        self.assertIsNone(overlapping(self.user.pk, date(2026, 6, 6), date(2026, 6, 9)))
+        with self.assertRaisesMessage(ValidationError, "Overlaps approved annual leave"):
+            approve_leave(self.leave(date(2026, 6, 5), date(2026, 6, 9), leave_type="unpaid"))
+
+        Attendance.objects.create(employee=self.employee, date=date(2026, 6, 16), status="present")
+        with self.assertRaisesMessage(ValidationError, "2026-06-16"):
+            approve_leave(self.leave(date(2026, 6, 15), date(2026, 6, 17)))
+
+    def test_carry_over_and_year_spanning_leave(self):
+        approve_leave(self.leave(date(2026, 12, 1), date(2026, 12, 4)))
+        # Mon 28 December to Fri 1 January: four days in 2026, one in 2027
+        approve_leave(self.leave(date(2026, 12, 28), date(2027, 1, 1)))
+        self.assertEqual(self.balance().taken, Decimal("8"))
+        # 16 unused days, capped at five
+        self.assertEqual((self.balance(year=2027).taken, self.balance(year=2027).carried_over), (1, 5))
+
+        # 24 more days in 2027 leave four to carry into 2028
+        self.assertEqual(roll_balances(2028), 1)
+        approve_leave(self.leave(date(2027, 11, 1), date(2027, 12, 2)))
+        self.assertEqual(self.balance(year=2028).carried_over, 4)
+        # Twelve more days in 2026 carry one less into 2027, and so one less into 2028
+        november = approve_leave(self.leave(date(2026, 11, 2), date(2026, 11, 17)))
+        self.assertEqual(self.balance(year=2027).carried_over, 4)
+        self.assertEqual(self.balance(year=2028).carried_over, 3)
+        reject_leave(november)
+        self.assertEqual(self.balance(year=2028).carried_over, 4)
+
+        self.leave(date(2026, 3, 2), date(2026, 3, 3), leave_type="sick", status="approved")
+        LeaveBalance.objects.create(user=self.user, leave_type="sick", year=2026, taken=2)
+        self.assertEqual(roll_balances(2027), 1)
+        self.assertEqual(self.balance("sick", 2027).carried_over, 0)
+
+    def test_backfill_charges_legacy_approvals(self):
+        # Approved before balances existed, so nothing was charged
+        first = self.leave(date(2025, 12, 29), date(2026, 1, 2), status="approved")
+        second = self.leave(date(2026, 1, 2), date(2026, 1, 6), status="approved")
+        self.leave(date(2026, 2, 2), date(2026, 2, 6))
+        LeaveBalance.objects.create(user=self.user, leave_type="annual", year=2026, taken=9)
+
+        out = io.StringIO()
+        call_command("roll_leave_balances", backfill=True, year=2026, stdout=out)
+        # Three days of 2025; 2026 counts Fri 2 January twice until the overlap is fixed
+        self.assertEqual(self.balance(year=2025).taken, 3)
+        self.assertEqual((self.balance().taken, self.balance().carried_over), (5, 5))
+        self.assertIn(f"approved leave {first.pk} (2025-12-29 to 2026-01-02) overlaps leave {second.pk}", out.getvalue())
+
+        second.status = "rejected"
+        second.save()
+        self.assertEqual(backfill_taken(), 1)
+        self.assertEqual(self.balance().taken, 2)
+
+    def test_api(self):
+        client = APIClient()
+        response = client.post("/api/leaves/", {
+            "employee": self.user.pk, "leave_type": "annual", "status": "approved",
+            "start_date": "2026-06-01", "end_date": "2026-06-02", "reason": "Rest",
+        })
+        self.assertEqual(response.json()["status"], "pending")
+        leave_id = response.json()["id"]
+        self.assertEqual(client.post(f"/api/leaves/{leave_id}/approve/").status_code, 200)
+        self.assertEqual(client.post(f"/api/leaves/{leave_id}/approve/").status_code, 400)
+        response = client.post("/api/leaves/", {
+            "employee": self.user.pk, "leave_type": "sick",
+            "start_date": "2026-06-02", "end_date": "2026-06-03", "reason": "Flu",
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(client.patch(f"/api/leaves/{leave_id}/", {"end_date": "2026-06-05"}).status_code, 400)
+
+        rows = client.get("/api/leaves/balances/", {"user": self.user.pk, "year": 2026}).json()["balances"]
+        annual = next(row for row in rows if row["leave_type"] == "annual")
+        # Accrued so far this year, less the two days taken
+        self.assertEqual(Decimal(annual["taken"]), 2)
+        self.assertEqual(Decimal(annual["available"]), Decimal(annual["accrued"]) - 2)
+        client.delete(f"/api/leaves/{leave_id}/")
+        self.assertEqual(self.balance().taken, 0)
+
+
+class OrgTests(TestCase):
+    def setUp(self):
+        self.site = Department.objects.create(name="Site Operations")
+        self.user = CustomUser.objects.create_user(email="mason@example.com", password="x")
+        self.mason = Employee.objects.create(
+            email="mason@example.com", user=self.user, department=self.site, salary=3000,
+        )
+
+    def test_names_must_match_exactly(self):
+        Department.objects.create(name="Plant 1")
+        Role.objects.create(name="Site clerk")
+        client = APIClient()
+        response = client.post("/api/employees/", {
+            "email": "clerk@example.com", "department": "site-operations ", "position": "SITE CLERK", "salary": "1000",
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()["department"], response.json()["position"]), ("Site Operations", "Site clerk"))
+
+        # Near misses are refused with suggestions, never guessed or created
+        response = client.patch(f"/api/employees/{self.mason.pk}/", {"department": "Plant 2"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("'Plant 1'", response.json()["department"][0])
+        response = client.patch(f"/api/employees/{self.mason.pk}/", {"department": "Site Operatons"}, format="json")
+        self.assertIn("Did you mean 'Site Operations'", response.json()["department"][0])
+        self.assertEqual(Department.objects.count(), 2)
+
+        response = client.patch(f"/api/employees/{self.mason.pk}/", {"department": self.site.pk}, format="json")
+        self.assertEqual(response.json()["department"], "Site Operations")
+
+    def test_tree_is_cached_until_a_change(self):
+        tree = org_tree()
+        with self.assertNumQueries(0):
+            self.assertIs(org_tree(), tree)
+        self.assertEqual(tree.employee_of[self.user.pk], self.mason.pk)
+        self.assertEqual(tree.department_for_user(self.user.pk), "Site Operations")
+
+        Employee.objects.create(email="clerk@example.com")
+        tree = org_tree()
+        self.assertEqual(
+            [(node["name"], len(node["employees"])) for node in tree.departments], [("Site Operations", 1), (None, 1)],
+        )
+        self.site.name = "Site"
+        self.site.save()
+        self.assertEqual(org_tree().departments[0]["name"], "Site")
+
+    def test_department_totals(self):
+        Employee.objects.create(email="gone@example.com", department=self.site, salary=9000, is_active=False)
+        Employee.objects.create(email="clerk@example.com", salary=1000)
+        Payroll.objects.create(
+            employee=self.mason, period_start=date(2026, 9, 1), period_end=date(2026, 9, 30),
+            basic_salary=3000, allowances=300,
+        )
+        client = APIClient()
+        self.assertEqual(client.get("/api/employees/by-department/", {"from": "2026-02-30"}).status_code, 400)
+        self.assertEqual(client.get("/api/employees/by-department/", {"to": "soon"}).status_code, 400)
+        response = client.get("/api/employees/by-department/", {"from": "2026-01-01", "to": "2026-12-31"})
+        rows = response.json()["departments"]
+        self.assertEqual(
+            [(row["department"], row["headcount"], row["inactive"], Decimal(row["salary_cost"]), Decimal(row["payroll_cost"]))
+             for row in rows],
+            [("Site Operations", 1, 1, 3000, 3300), (None, 1, 0, 1000, 0)],
+        )
@@ -0,0 +1,206 @@
+"""
+Timesheets: hours worked, overtime and attendance counts per week or month.
+
+Everything is aggregated in SQL with one grouped query. A day's worked time
+is check_out - check_in, and anything beyond ATTENDANCE_STANDARD_HOURS counts
+as overtime for that day. Days worked are present, late and half-day records.
+
+Closed periods (ended before today) are computed once for every employee and
+stored as TimesheetSummary rows with a TimesheetPeriod marker. Later reports
+read those rows, and only the open period is aggregated live. Changing the
+attendance of a day drops the stored week and month containing it, and they
+are recomputed on the next report. Device ingestion and bulk writes call
+invalidate() directly; single saves do so through hr.signals.
+
+Report ranges are widened to whole periods. Grouping by department sums each
+employee's months under the department the employee is in now.
+"""
+import calendar
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, DurationField, ExpressionWrapper, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import Attendance, Employee, TimesheetPeriod, TimesheetSummary
+
+GROUPS = ('week', 'month', 'department')
+COUNTS = ('days_worked', 'absences', 'late', 'half_days')
+HOURS = Decimal('0.01')
+
+
+def period_start(kind, day):
+    return day - timedelta(days=day.weekday()) if kind == 'week' else day.replace(day=1)
+
+
+def period_end(kind, start):
+    if kind == 'week':
+        return start + timedelta(days=6)
+    return start.replace(day=calendar.monthrange(start.year, start.month)[1])
+
+
+def period_starts(kind, first, last):
+    start = period_start(kind, first)
+    while start <= last:
+        yield start
+        start = period_end(kind, start) + timedelta(days=1)
+
+
+def aggregate(kind, first, last, employee=None):
+    """Rows of per-employee totals per period over attendance dated first..last"""
+    zero = Value(timedelta(0), output_field=DurationField())
+    standard = Value(timedelta(hours=getattr(settings, 'ATTENDANCE_STANDARD_HOURS', 8)), output_field=DurationField())
+    worked = Case(
+        When(check_in__isnull=False, check_out__gt=F('check_in'), then=ExpressionWrapper(
+            F('check_out') - F('check_in'), output_field=DurationField(),
+        )),
+        default=zero,
+        output_field=DurationField(),
+    )
+    overtime = Greatest(ExpressionWrapper(worked - standard, output_field=DurationField()), zero)
+
+    rows = Attendance.objects.filter(date__range=(first, last)).annotate(
+        person=Coalesce('employee_id', 'user__employee_profile__id'),
+        period_start=TruncWeek('date') if kind == 'week' else TruncMonth('date'),
+    ).filter(person__isnull=False)
+    if employee is not None:
+        rows = rows.filter(person=employee)
+    return rows.order_by().values('person', 'period_start').annotate(
+        days_worked=Count('id', filter=Q(status__in=('present', 'late', 'half-day'))),
+        worked=Coalesce(Sum(worked), zero),
+        overtime=Coalesce(Sum(overtime), zero),
+        absences=Count('id', filter=Q(status='absent')),
+        late=Count('id', filter=Q(status='late')),
+        half_days=Count('id', filter=Q(status='half-day')),
+    )
+
+
+def as_date(value):
+    """The day of ``value``; aware datetimes count in the local time zone, as DateField stores them"""
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value
+
+
+@transaction.atomic
+def materialize(kind, starts):
+    """Store summaries of the given closed periods for every employee"""
+    starts = set(starts)
+    rows = aggregate(kind, min(starts), period_end(kind, max(starts)))
+    TimesheetSummary.objects.bulk_create(
+        [
+            TimesheetSummary(
+                employee_id=row['person'], period=kind, period_start=as_date(row['period_start']),
+                worked=row['worked'], overtime=row['overtime'], **{name: row[name] for name in COUNTS},
+            )
+            for row in rows if as_date(row['period_start']) in starts
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    TimesheetPeriod.objects.bulk_create(
+        [TimesheetPeriod(period=kind, period_start=start) for start in starts], ignore_conflicts=True,
+    )
+
+
+def invalidate(days):
+    """Forget stored weeks and months containing any of ``days``"""
+    today = timezone.localdate()
+    days = {as_date(day) for day in days}
+    keys = {(kind, period_start(kind, day)) for day in days for kind in ('week', 'month')}
+    # Open periods are never stored
+    keys = {(kind, start) for kind, start in keys if period_end(kind, start) < today}
+    if not keys:
+        return
+    condition = Q()
+    for kind, start in keys:
+        condition |= Q(period=kind, period_start=start)
+    TimesheetSummary.objects.filter(condition).delete()
+    TimesheetPeriod.objects.filter(condition).delete()
+
+
+def hours(duration):
+    return (Decimal(duration.total_seconds()) / 3600).quantize(HOURS)
+
+
+def timesheet(group, first, last, employee=None, today=None):
+    """Report rows for ``group`` (week, month or department) covering first..last"""
+    kind = 'month' if group == 'department' else group
+    today = today or timezone.localdate()
+    starts = list(period_starts(kind, first, last))
+    closed = [start for start in starts if period_end(kind, start) < today]
+    open_starts = [start for start in starts if period_end(kind, start) >= today]
+
+    if closed:
+        stored = set(
+            TimesheetPeriod.objects.filter(period=kind, period_start__in=closed).values_list('period_start', flat=True)
+        )
+        missing = [start for start in closed if start not in stored]
+        if missing:
+            materialize(kind, missing)
+
+    fields = ('period_start', 'worked', 'overtime') + COUNTS
+    rows = []
+    if closed:
+        summaries = TimesheetSummary.objects.filter(period=kind, period_start__in=closed)
+        if employee is not None:
+            summaries = summaries.filter(employee_id=employee)
+        rows += [
+            dict(row, person=row.pop('employee_id'), closed=True)
+            for row in summaries.values('employee_id', *fields)
+        ]
+    if open_starts:
+        live = aggregate(kind, open_starts[0], period_end(kind, open_starts[-1]), employee)
+        rows += [dict(row, period_start=as_date(row['period_start']), closed=False) for row in live]
+
+    people = {}
+    if rows:
+        employees = Employee.objects.filter(pk__in={row['person'] for row in rows})
+        for pk, first_name, last_name, department in employees.values_list('pk', 'first_name', 'last_name', 'department__name'):
+            people[pk] = (f"{first_name} {last_name}", department)
+    return by_department(rows, people) if group == 'department' else report(rows, people)
+
+
+def report(rows, people):
+    result = []
+    for row in sorted(rows, key=lambda row: (row['period_start'], row['person'])):
+        result.append({
+            'employee': row['person'],
+            'employee_name': people.get(row['person'], ('', None))[0],
+            'department': people.get(row['person'], ('', None))[1],
+            'period_start': row['period_start'],
+            'hours': hours(row['worked']),
+            'overtime_hours': hours(row['overtime']),
+            **{name: row[name] for name in COUNTS},
+            'closed': row['closed'],
+        })
+    return result
+
+
+def by_department(rows, people):
+    totals = defaultdict(lambda: {'employees': set(), 'worked': timedelta(0), 'overtime': timedelta(0),
+                                  'closed': True, **{name: 0 for name in COUNTS}})
+    for row in rows:
+        total = totals[(row['period_start'], people.get(row['person'], ('', None))[1])]
+        total['employees'].add(row['person'])
+        total['worked'] += row['worked']
+        total['overtime'] += row['overtime']
+        total['closed'] &= row['closed']
+        for name in COUNTS:
+            total[name] += row[name]
+    return [
+        {
+            'department': department,
+            'period_start': start,
+            'employees': len(total['employees']),
+            'hours': hours(total['worked']),
+            'overtime_hours': hours(total['overtime']),
+            **{name: total[name] for name in COUNTS},
+            'closed': total['closed'],
+        }
+        for (start, department), total in sorted(totals.items(), key=lambda item: (item[0][0], item[0][1] or ''))
+    ]
@@ -1,22 +1,51 @@
-from rest_framework import viewsets, status
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework import mixins, viewsets, status
 from rest_framework import serializers
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
-from .models import Employee, Attendance, Payroll, Leave
+from django.utils.dateparse import parse_date
+from core.mixins import BulkModelMixin
+from core.parsers import NDJSONParser
+from .attendance import ingest_events
+from .leave import approve_leave, balances, reject_leave, release
+from .org import department_totals, org_tree as cached_org_tree
+from .timesheets import GROUPS, invalidate, timesheet
+from .models import Department, Employee, Attendance, Payroll, PayrollRun, Leave, Role
+from .payroll import process_run, run_payroll
 from .serializers import (
+    DepartmentSerializer,
+    RoleSerializer,
     EmployeeSerializer,
     AttendanceSerializer,
     PayrollSerializer,
+    PayrollRunSerializer,
     LeaveSerializer,
 )
 
+class DepartmentViewSet(viewsets.ModelViewSet):
+    """
+    CRUD operations for Departments
+    """
+    queryset = Department.objects.order_by('name')
+    serializer_class = DepartmentSerializer
+    permission_classes = [AllowAny]
+
+class RoleViewSet(viewsets.ModelViewSet):
+    """
+    CRUD operations for Roles
+    """
+    queryset = Role.objects.order_by('name')
+    serializer_class = RoleSerializer
+    permission_classes = [AllowAny]
+
 class EmployeeViewSet(viewsets.ModelViewSet):
     """
     CRUD operations for Employees
     """
-    queryset = Employee.objects.all()
+    queryset = Employee.objects.select_related('department', 'role')
     serializer_class = EmployeeSerializer
     permission_classes = [AllowAny]
     
@@ -48,26 +77,33 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         employee.save()
         return Response({'status': 'employee deactivated'})
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], url_path='by-department')
+    def by_department(self, request):
+        """Headcount, salary and payroll cost per department; payroll periods ?from=&to= (this year)"""
+        params = request.query_params
+        today = timezone.localdate()
+        try:
+            first = parse_date(params['from']) if params.get('from') else today.replace(month=1, day=1)
+            last = parse_date(params['to']) if params.get('to') else today
+        except ValueError:
+            first = last = None
+        if first is None or last is None or last < first:
+            return Response({'error': 'from and to must be dates (YYYY-MM-DD), from first'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'from': first, 'to': last, 'departments': department_totals(first, last)})
+
+    @action(detail=False, methods=['get'], url_path='org-tree')
+    def org_tree(self, request):
+        """Departments with their employees and linked users"""
+        return Response(cached_org_tree().departments)
+
+class AttendanceViewSet(BulkModelMixin, viewsets.ModelViewSet):
     """
     CRUD operations for Attendance
     """
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
     permission_classes = [AllowAny]
-    
-    def create(self, request, *args, **kwargs):
-        """Override create to add better error handling"""
-        print(f"Attendance create data: {request.data}")
-        serializer = self.get_serializer(data=request.data)
-        try:
-            serializer.is_valid(raise_exception=True)
-            self.perform_create(serializer)
-            headers = self.get_success_headers(serializer.data)
-            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
-        except serializers.ValidationError as e:
-            print(f"Validation error: {e.detail}")
-            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+    cursor_ordering = ('-date', '-id')
     
     @action(detail=False, methods=['get'])
     def today(self, request):
@@ -78,22 +114,117 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(attendance, many=True)
         return Response(serializer.data)
 
+    def perform_bulk_create(self, serializer):
+        instances = super().perform_bulk_create(serializer)
+        invalidate(instance.date for instance in instances)
+        return instances
+
+    def perform_bulk_update(self, item_serializers):
+        # Both the stored and the new day of each record may change
+        days = [serializer.instance.date for serializer in item_serializers]
+        updated = super().perform_bulk_update(item_serializers)
+        invalidate(days + [instance.date for instance in updated])
+        return updated
+
+    @action(detail=False, methods=['get'])
+    def timesheet(self, request):
+        """Hours, overtime and attendance counts; ?employee=&from=&to=&group=week|month|department"""
+        params = request.query_params
+        group = params.get('group', 'week')
+        if group not in GROUPS:
+            return Response({'error': f"group must be one of {', '.join(GROUPS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        today = timezone.localdate()
+        try:
+            first = parse_date(params['from']) if params.get('from') else today.replace(day=1)
+            last = parse_date(params['to']) if params.get('to') else today
+        except ValueError:
+            first = last = None
+        if first is None or last is None or last < first:
+            return Response({'error': 'from and to must be dates (YYYY-MM-DD), from first'}, status=status.HTTP_400_BAD_REQUEST)
+        employee = params.get('employee')
+        if employee is not None and not employee.isdigit():
+            return Response({'error': 'employee must be an id'}, status=status.HTTP_400_BAD_REQUEST)
+        rows = timesheet(group, first, last, int(employee) if employee else None, today)
+        return Response({'group': group, 'from': first, 'to': last, 'rows': rows})
+
+    @action(detail=False, methods=['post'], parser_classes=[NDJSONParser])
+    def ingest(self, request):
+        """Merge an NDJSON batch of device check-in/check-out events into daily attendance"""
+        return Response(ingest_events(request.data))
+
 class PayrollViewSet(viewsets.ModelViewSet):
     """
-    CRUD operations for Payroll
+    CRUD operations for Payroll; rows of a payroll run change only through the run
     """
     queryset = Payroll.objects.all()
     serializer_class = PayrollSerializer
     permission_classes = [AllowAny]
-    
+
+    def locked(self, payroll):
+        """Why the row can't be changed here, if it can't"""
+        if payroll.run_id is not None:
+            return 'Payroll run rows change only by re-running or processing the run.'
+        if payroll.status == 'processed':
+            return 'Processed payroll cannot be changed.'
+        return None
+
+    def update(self, request, *args, **kwargs):
+        reason = self.locked(self.get_object())
+        if reason:
+            return Response({'error': reason}, status=status.HTTP_400_BAD_REQUEST)
+        return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        reason = self.locked(self.get_object())
+        if reason:
+            return Response({'error': reason}, status=status.HTTP_400_BAD_REQUEST)
+        return super().destroy(request, *args, **kwargs)
+
     @action(detail=True, methods=['post'])
     def process(self, request, pk=None):
-        """Process payroll"""
-        payroll = self.get_object()
-        payroll.status = 'processed'
-        payroll.save()
+        """Process a manual payroll record; run rows are processed with their run"""
+        with transaction.atomic():
+            payroll = Payroll.objects.select_for_update().get(pk=self.get_object().pk)
+            reason = self.locked(payroll)
+            if reason:
+                return Response({'error': reason}, status=status.HTTP_400_BAD_REQUEST)
+            payroll.status = 'processed'
+            payroll.save(update_fields=['status'])
         return Response({'status': 'payroll processed'})
 
+
+class PayrollRunViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Batch payroll runs; POSTing a period runs (or re-runs) it for all active employees
+    """
+    queryset = PayrollRun.objects.all()
+    serializer_class = PayrollRunSerializer
+    permission_classes = [AllowAny]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            run = run_payroll(serializer.validated_data['period_start'], serializer.validated_data['period_end'])
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(run).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def process(self, request, pk=None):
+        """Mark the run and its payrolls processed"""
+        try:
+            run = process_run(self.get_object())
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(run).data)
+
+    @action(detail=True, methods=['get'])
+    def payrolls(self, request, pk=None):
+        """Payroll rows of this run"""
+        page = self.paginate_queryset(Payroll.objects.filter(run_id=pk).order_by('id'))
+        return self.get_paginated_response(PayrollSerializer(page, many=True).data)
+
 class LeaveViewSet(viewsets.ModelViewSet):
     """
     CRUD operations for Leave
@@ -102,18 +233,37 @@ class LeaveViewSet(viewsets.ModelViewSet):
     serializer_class = LeaveSerializer
     permission_classes = [AllowAny]
     
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            if instance.status == 'approved':
+                release(instance)
+            instance.delete()
+
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
-        """Approve leave request"""
-        leave = self.get_object()
-        leave.status = 'approved'
-        leave.save()
+        """Approve leave request after checking overlaps, attendance and balance"""
+        try:
+            approve_leave(self.get_object())
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
         return Response({'status': 'leave approved'})
     
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
-        """Reject leave request"""
-        leave = self.get_object()
-        leave.status = 'rejected'
-        leave.save()
+        """Reject leave request, returning approved days to the balance"""
+        reject_leave(self.get_object())
         return Response({'status': 'leave rejected'})
+
+    @action(detail=False, methods=['get'])
+    def balances(self, request):
+        """Leave balances per type; ?user=&year="""
+        user, year = request.query_params.get('user', ''), request.query_params.get('year', '')
+        if not user.isdigit():
+            return Response({'error': 'user must be an id'}, status=status.HTTP_400_BAD_REQUEST)
+        if year and not year.isdigit():
+            return Response({'error': 'year must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        today = timezone.localdate()
+        year = int(year) if year else today.year
+        # Accrued up to the current month for this year, in full for others
+        month = today.month if year == today.year else 12
+        return Response({'user': int(user), 'year': year, 'balances': balances(int(user), year, month)})
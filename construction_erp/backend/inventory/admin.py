@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Warehouse, InventoryItem, Material, Stock, StockMovement
+from .models import CostLayer, ItemValuation, Warehouse, InventoryItem, Material, Stock, StockMovement, StockSnapshot
 
 
 @admin.register(Warehouse)
@@ -30,11 +30,35 @@ class StockAdmin(admin.ModelAdmin):
     list_display = ("item", "warehouse", "quantity", "reorder_level")
     list_filter = ("warehouse",)
     search_fields = ("item__name", "warehouse__name")
+    # Changed only by posting StockMovements
+    readonly_fields = ("quantity",)
 
 
 @admin.register(StockMovement)
 class StockMovementAdmin(admin.ModelAdmin):
-    list_display = ("item", "movement_type", "quantity", "movement_date", "reference")
-    list_filter = ("movement_type", "movement_date")
+    list_display = ("item", "movement_type", "quantity", "unit_cost", "warehouse", "destination_warehouse", "movement_date", "reference")
+    list_filter = ("movement_type", "warehouse", "movement_date", "valued")
     search_fields = ("item__name", "reference")
     date_hierarchy = "movement_date"
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("snapshot_date", "item", "warehouse", "quantity")
+    list_filter = ("snapshot_date", "warehouse")
+    search_fields = ("item__name",)
+    date_hierarchy = "snapshot_date"
+
+
+@admin.register(CostLayer)
+class CostLayerAdmin(admin.ModelAdmin):
+    list_display = ("item", "received_at", "unit_cost", "quantity", "remaining_quantity")
+    search_fields = ("item__name", "item__sku")
+    readonly_fields = ("item", "movement", "received_at", "unit_cost", "quantity", "remaining_quantity")
+
+
+@admin.register(ItemValuation)
+class ItemValuationAdmin(admin.ModelAdmin):
+    list_display = ("item", "quantity", "fifo_value", "average_unit_cost", "average_value", "updated_at")
+    search_fields = ("item__name", "item__sku")
+    readonly_fields = ("updated_at",)
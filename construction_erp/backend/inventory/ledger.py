@@ -0,0 +1,112 @@
+"""
+Stock ledger posting.
+
+Every StockMovement changes Stock.quantity for the (item, warehouse) rows it
+touches, plus the running totals on InventoryItem.quantity and
+Warehouse.current_stock. Posting locks the affected Stock rows with
+select_for_update in (item, warehouse) order, then updates items and
+warehouses in id order. Because every transaction takes its locks in the same
+order, concurrent receipts and issues serialize instead of racing or
+deadlocking.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import InventoryItem, Stock, Warehouse
+
+
+def prepare_movements(movements):
+    """Default missing warehouses to the item's warehouse and check transfer targets"""
+    missing = {m.item_id for m in movements if m.warehouse_id is None}
+    if missing:
+        homes = dict(InventoryItem.objects.filter(pk__in=missing).values_list("id", "warehouse_id"))
+        for movement in movements:
+            if movement.warehouse_id is None:
+                movement.warehouse_id = homes.get(movement.item_id)
+    for movement in movements:
+        if movement.movement_type == "transfer":
+            if movement.destination_warehouse_id is None:
+                raise ValidationError("Transfers require a destination warehouse.")
+            if movement.destination_warehouse_id == movement.warehouse_id:
+                raise ValidationError("Transfer source and destination must differ.")
+        elif movement.destination_warehouse_id is not None:
+            raise ValidationError("Only transfers can have a destination warehouse.")
+
+
+def _legs(movement):
+    if movement.movement_type == "transfer":
+        return [(movement.item_id, movement.warehouse_id), (movement.item_id, movement.destination_warehouse_id)]
+    return [(movement.item_id, movement.warehouse_id)]
+
+
+def apply_movement(balances, item_id, movement_type, quantity, warehouse_id, destination_warehouse_id=None):
+    """Apply one movement to an in-memory {(item_id, warehouse_id): quantity} mapping"""
+    source = (item_id, warehouse_id)
+    if movement_type == "in":
+        balances[source] += quantity
+    elif movement_type == "adjustment":
+        balances[source] = quantity
+    else:
+        balances[source] -= quantity
+        if movement_type == "transfer":
+            balances[(item_id, destination_warehouse_id)] += quantity
+
+
+@transaction.atomic
+def post_movements(movements):
+    """Apply saved movements, in order, to Stock, InventoryItem and Warehouse totals"""
+    keys = sorted({key for movement in movements for key in _legs(movement)})
+    if not keys:
+        return
+
+    # Make sure every touched row exists before locking; concurrent inserts of
+    # the same (item, warehouse) are absorbed by the unique constraint
+    Stock.objects.bulk_create(
+        [Stock(item_id=item_id, warehouse_id=warehouse_id) for item_id, warehouse_id in keys],
+        ignore_conflicts=True,
+    )
+    match = Q()
+    for item_id, warehouse_id in keys:
+        match |= Q(item_id=item_id, warehouse_id=warehouse_id)
+    locked = (
+        Stock.objects.select_for_update()
+        .filter(match)
+        .order_by("item_id", "warehouse_id")
+        .values_list("item_id", "warehouse_id", "id", "quantity")
+    )
+    stock_ids, opening = {}, {}
+    for item_id, warehouse_id, pk, quantity in locked:
+        stock_ids[(item_id, warehouse_id)] = pk
+        opening[(item_id, warehouse_id)] = quantity
+
+    balances = dict(opening)
+    for movement in movements:
+        source = (movement.item_id, movement.warehouse_id)
+        if movement.movement_type in ("out", "transfer") and balances[source] < movement.quantity:
+            raise ValidationError(
+                f"Insufficient stock for item {movement.item_id} in warehouse "
+                f"{movement.warehouse_id}: {balances[source]} available, {movement.quantity} requested."
+            )
+        apply_movement(
+            balances, movement.item_id, movement.movement_type, movement.quantity,
+            movement.warehouse_id, movement.destination_warehouse_id,
+        )
+
+    item_deltas, warehouse_deltas = defaultdict(int), defaultdict(int)
+    for key in keys:
+        delta = balances[key] - opening[key]
+        if not delta:
+            continue
+        Stock.objects.filter(pk=stock_ids[key]).update(quantity=F("quantity") + delta)
+        item_deltas[key[0]] += delta
+        warehouse_deltas[key[1]] += delta
+
+    for item_id in sorted(item_deltas):
+        if item_deltas[item_id]:
+            InventoryItem.objects.filter(pk=item_id).update(quantity=F("quantity") + item_deltas[item_id])
+    for warehouse_id in sorted(warehouse_deltas):
+        if warehouse_deltas[warehouse_id]:
+            Warehouse.objects.filter(pk=warehouse_id).update(current_stock=F("current_stock") + warehouse_deltas[warehouse_id])
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from inventory.snapshots import take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Materialize end-of-day stock levels per item and warehouse (run daily from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Day to snapshot (YYYY-MM-DD); defaults to yesterday")
+
+    def handle(self, *args, **options):
+        if options["date"]:
+            day = parse_date(options["date"])
+            if day is None:
+                raise CommandError("--date must be YYYY-MM-DD")
+        else:
+            day = timezone.localdate() - timedelta(days=1)
+        if day >= timezone.localdate():
+            raise CommandError("Only days that have ended can be snapshotted")
+
+        rows = take_snapshot(day)
+        self.stdout.write(self.style.SUCCESS(f"Snapshot for {day}: {rows} stock rows"))
@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+from core.benchmarks import BenchmarkCommand
+from inventory.models import InventoryItem, StockMovement, Warehouse
+from inventory.valuation import value_inventory
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Cost new stock movements under FIFO and weighted average (run from cron). "
+        "--benchmark N times a full and an incremental run over N synthetic "
+        "movements inside a transaction that is rolled back afterwards."
+    )
+
+    benchmark_help = "Seed this many movements, time the runs and roll everything back"
+    batch_size = 10000
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--rebuild", action="store_true",
+                            help="Discard stored cost layers and value the full history again")
+        parser.add_argument("--items", type=int, default=1000,
+                            help="Number of items the benchmark movements are spread over")
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            return self.run_benchmark(options["benchmark"], options["items"])
+
+        stats, seconds = self.timed(value_inventory, rebuild=options["rebuild"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Valued {stats['movements']} movements across {stats['items']} items "
+            f"({stats['rebuilt_items']} rebuilt) in {seconds:.1f}s"
+        ))
+
+    def benchmark(self, count, items):
+        self.stdout.write(f"Seeding {count} movements over {items} items...")
+        warehouse = Warehouse.objects.create(name="Valuation benchmark")
+        stock = self.seed(InventoryItem, (
+            InventoryItem(name=f"Bench item {n}", sku=f"VAL-BENCH-{n}", unit_price=10, warehouse=warehouse)
+            for n in range(items)
+        ))
+        # Movements are inserted directly; the benchmark measures valuation, not posting
+        self.seed(StockMovement, self.movements(stock, warehouse, count))
+
+        stats, seconds = self.timed(value_inventory, rebuild=True)
+        self.stdout.write(f"Full run: {stats['movements']} movements in {seconds:.1f}s")
+
+        self.seed(StockMovement, self.movements(stock, warehouse, max(count // 100, 1)))
+        stats, seconds = self.timed(value_inventory)
+        self.stdout.write(f"Incremental run: {stats['movements']} movements in {seconds:.1f}s")
+
+    def movements(self, items, warehouse, count):
+        for _ in range(count):
+            movement_type = "in" if self.rng.random() < 0.5 else "out"
+            yield StockMovement(
+                item=items[self.rng.randrange(len(items))],
+                movement_type=movement_type,
+                quantity=self.rng.randint(1, 50),
+                unit_cost=Decimal(self.rng.randint(500, 1500)) / 100 if movement_type == "in" else None,
+                warehouse=warehouse,
+            )
+
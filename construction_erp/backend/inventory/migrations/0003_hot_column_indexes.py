@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stock_reorder_level_warehouse_capacity_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['-movement_date', '-id'], name='movement_date_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_hot_column_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='destination_warehouse',
+            field=models.ForeignKey(blank=True, help_text='Target warehouse for transfers', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='incoming_transfers', to='inventory.warehouse'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='warehouse',
+            field=models.ForeignKey(blank=True, help_text="Defaults to the item's warehouse", null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movements', to='inventory.warehouse'),
+        ),
+    ]
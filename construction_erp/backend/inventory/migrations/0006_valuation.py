@@ -0,0 +1,76 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_stocksnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('received_at', models.DateTimeField()),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('quantity', models.PositiveIntegerField()),
+                ('remaining_quantity', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['item', 'received_at', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=0)),
+                ('average_unit_cost', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('fifo_value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('average_value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('fifo_cogs', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('average_cogs', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('warehouse_balances', models.JSONField(default=dict)),
+                ('last_movement_date', models.DateTimeField(blank=True, null=True)),
+                ('last_movement_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text="Purchase cost per unit for receipts; defaults to the item's unit price", max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='valued',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('valued', False)), fields=['item', 'movement_date', 'id'], name='movement_unvalued_idx'),
+        ),
+        migrations.AddField(
+            model_name='costlayer',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.inventoryitem'),
+        ),
+        migrations.AddField(
+            model_name='costlayer',
+            name='movement',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.stockmovement'),
+        ),
+        migrations.AddField(
+            model_name='itemvaluation',
+            name='item',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='valuation', to='inventory.inventoryitem'),
+        ),
+        migrations.AddIndex(
+            model_name='costlayer',
+            index=models.Index(condition=models.Q(('remaining_quantity__gt', 0)), fields=['item', 'received_at', 'id'], name='costlayer_open_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_valuation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(condition=models.Q(('quantity__lte', models.F('reorder_level'))), fields=['warehouse', 'item'], name='stock_reorder_candidate_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:05
+
+import logging
+
+from django.db import migrations
+from django.db.models import Sum
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile_totals(apps, schema_editor):
+    """Rebuild InventoryItem.quantity and Warehouse.current_stock from the Stock rows
+
+    Movements now post deltas onto these totals, so they have to start out equal
+    to the Stock sums. Items that only ever had a quantity on the item itself get
+    a Stock row for it in their own warehouse first, so no stock is lost.
+    """
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    Stock = apps.get_model('inventory', 'Stock')
+    Warehouse = apps.get_model('inventory', 'Warehouse')
+
+    Stock.objects.bulk_create(
+        [
+            Stock(item_id=item.pk, warehouse_id=item.warehouse_id, quantity=item.quantity)
+            for item in InventoryItem.objects.filter(quantity__gt=0, stocks__isnull=True)
+        ],
+        batch_size=1000,
+    )
+
+    item_totals = dict(Stock.objects.order_by().values_list('item_id').annotate(total=Sum('quantity')))
+    for item in InventoryItem.objects.only('pk', 'quantity').iterator():
+        total = item_totals.get(item.pk) or 0
+        if item.quantity != total:
+            logger.warning("Inventory item %s quantity %s reset to its stock total %s", item.pk, item.quantity, total)
+            InventoryItem.objects.filter(pk=item.pk).update(quantity=total)
+
+    warehouse_totals = dict(Stock.objects.order_by().values_list('warehouse_id').annotate(total=Sum('quantity')))
+    for warehouse in Warehouse.objects.only('pk', 'current_stock').iterator():
+        total = warehouse_totals.get(warehouse.pk) or 0
+        if warehouse.current_stock != total:
+            logger.warning(
+                "Warehouse %s current stock %s reset to its stock total %s", warehouse.pk, warehouse.current_stock, total,
+            )
+            Warehouse.objects.filter(pk=warehouse.pk).update(current_stock=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_stock_reorder_candidate_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(reconcile_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.1.3 on 2026-10-18 21:40
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Min
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+OPENING_REFERENCE = 'OPENING'
+
+
+def record_openings(apps, schema_editor):
+    """Record stock that no movement explains as an opening receipt
+
+    Valuation replays movements only, so stock loaded before movements were
+    posted had no cost layer: issues against it ran negative and an adjustment
+    was costed as a gain of the whole counted quantity. Each Stock row gets an
+    "in" movement for the difference between its quantity and what its
+    movements add up to, dated before the first movement so it opens the FIFO
+    queue at the item's unit price. The next valuation run rebuilds the items
+    it touches. Rows whose balance an adjustment already reset cannot be told
+    apart from their movements and are left alone.
+    """
+    Stock = apps.get_model('inventory', 'Stock')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+
+    balances = defaultdict(int)
+    adjusted = set()
+    rows = (
+        StockMovement.objects.order_by('movement_date', 'id')
+        .values_list('item_id', 'movement_type', 'quantity', Coalesce('warehouse_id', 'item__warehouse_id'),
+                     'destination_warehouse_id')
+    )
+    for item_id, movement_type, quantity, warehouse_id, destination_id in rows.iterator(chunk_size=5000):
+        source = (item_id, warehouse_id)
+        if movement_type == 'in':
+            balances[source] += quantity
+        elif movement_type == 'adjustment':
+            balances[source] = quantity
+            adjusted.add(source)
+        else:
+            balances[source] -= quantity
+            if movement_type == 'transfer':
+                balances[(item_id, destination_id)] += quantity
+
+    openings = []
+    for item_id, warehouse_id, quantity in Stock.objects.values_list('item_id', 'warehouse_id', 'quantity').iterator():
+        key = (item_id, warehouse_id)
+        opening = quantity - balances[key]
+        if not opening or key in adjusted:
+            continue
+        if opening < 0:
+            logger.warning(
+                "Stock of item %s in warehouse %s is %s below its movements; no opening recorded",
+                item_id, warehouse_id, -opening,
+            )
+            continue
+        openings.append(StockMovement(
+            item_id=item_id, warehouse_id=warehouse_id, movement_type='in', quantity=opening,
+            reference=OPENING_REFERENCE, notes='Opening balance',
+        ))
+
+    earliest = StockMovement.objects.aggregate(first=Min('movement_date'))['first']
+    opened_at = earliest - timedelta(seconds=1) if earliest else timezone.now()
+    # Inserted directly: the stock already holds these quantities. movement_date
+    # is auto_now_add, so the date is set afterwards
+    created = StockMovement.objects.bulk_create(openings, batch_size=1000)
+    ids = [movement.pk for movement in created]
+    for start in range(0, len(ids), 1000):
+        StockMovement.objects.filter(pk__in=ids[start:start + 1000]).update(movement_date=opened_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_reconcile_stock_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(record_openings, migrations.RunPython.noop),
+    ]
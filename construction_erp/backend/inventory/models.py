@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 
 class Warehouse(models.Model):
@@ -54,6 +54,14 @@ class Stock(models.Model):
 
     class Meta:
         unique_together = ("item", "warehouse")
+        indexes = [
+            # Only rows at or below their reorder level are indexed, so low-stock
+            # lookups cost O(candidates) instead of scanning every stock row
+            models.Index(
+                fields=["warehouse", "item"], name="stock_reorder_candidate_idx",
+                condition=models.Q(quantity__lte=models.F("reorder_level")),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.item.name} - {self.warehouse.name} ({self.quantity})"
@@ -68,10 +76,102 @@ class StockMovement(models.Model):
     ]
     item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="movements")
     movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPES)
+    # For adjustments this is the counted quantity the stock is set to
     quantity = models.PositiveIntegerField()
+    warehouse = models.ForeignKey(
+        Warehouse, on_delete=models.PROTECT, related_name="movements", null=True, blank=True,
+        help_text="Defaults to the item's warehouse",
+    )
+    destination_warehouse = models.ForeignKey(
+        Warehouse, on_delete=models.PROTECT, related_name="incoming_transfers", null=True, blank=True,
+        help_text="Target warehouse for transfers",
+    )
+    unit_cost = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True,
+        help_text="Purchase cost per unit for receipts; defaults to the item's unit price",
+    )
     movement_date = models.DateTimeField(auto_now_add=True)
     reference = models.CharField(max_length=100, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
+    # Set once the valuation engine has costed this movement
+    valued = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-movement_date", "-id"], name="movement_date_desc_idx"),
+            models.Index(
+                fields=["item", "movement_date", "id"], name="movement_unvalued_idx",
+                condition=models.Q(valued=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.movement_type} - {self.item.name} ({self.quantity})"
+
+    def save(self, *args, **kwargs):
+        """Post new movements to the stock ledger in the same transaction"""
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        from .ledger import post_movements, prepare_movements
+        with transaction.atomic():
+            prepare_movements([self])
+            super().save(*args, **kwargs)
+            post_movements([self])
+
+
+class StockSnapshot(models.Model):
+    """Stock level per (item, warehouse) at the end of ``snapshot_date``"""
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="snapshots")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="snapshots")
+    snapshot_date = models.DateField()
+    quantity = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("snapshot_date", "item", "warehouse")
+        ordering = ["-snapshot_date"]
+
+    def __str__(self):
+        return f"{self.item.name} - {self.warehouse.name} @ {self.snapshot_date} ({self.quantity})"
+
+
+class CostLayer(models.Model):
+    """A FIFO cost layer opened by a receipt and drawn down by later issues"""
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="cost_layers")
+    movement = models.ForeignKey(StockMovement, on_delete=models.CASCADE, related_name="cost_layers")
+    received_at = models.DateTimeField()
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4)
+    quantity = models.PositiveIntegerField()
+    remaining_quantity = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ["item", "received_at", "id"]
+        indexes = [
+            models.Index(
+                fields=["item", "received_at", "id"], name="costlayer_open_idx",
+                condition=models.Q(remaining_quantity__gt=0),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item.name} {self.remaining_quantity}/{self.quantity} @ {self.unit_cost}"
+
+
+class ItemValuation(models.Model):
+    """Running FIFO and moving-average valuation state per item"""
+    item = models.OneToOneField(InventoryItem, on_delete=models.CASCADE, related_name="valuation")
+    quantity = models.IntegerField(default=0)
+    average_unit_cost = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    fifo_value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    average_value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    fifo_cogs = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    average_cogs = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    # Per-warehouse quantities, needed to turn "set to" adjustments into deltas
+    warehouse_balances = models.JSONField(default=dict)
+    # Position of the last costed movement; anything earlier arriving later forces a rebuild
+    last_movement_date = models.DateTimeField(null=True, blank=True)
+    last_movement_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.item.name}: {self.quantity} (FIFO {self.fifo_value})"
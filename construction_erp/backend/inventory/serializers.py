@@ -1,17 +1,36 @@
 from rest_framework import serializers
-from .models import Warehouse, InventoryItem, Material, Stock, StockMovement
+from .models import Warehouse, InventoryItem, ItemValuation, Material, Stock, StockMovement
+
+
+# Stock levels and their running totals only change through posted StockMovements
+# (inventory.ledger), so they are read-only everywhere else
 
 
 class WarehouseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Warehouse
         fields = "__all__"
+        read_only_fields = ("current_stock",)
 
 
 class InventoryItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = InventoryItem
         fields = "__all__"
+        read_only_fields = ("quantity",)
+
+
+class ItemValuationSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source="item.name", read_only=True)
+    sku = serializers.CharField(source="item.sku", read_only=True)
+
+    class Meta:
+        model = ItemValuation
+        fields = (
+            "item", "name", "sku", "quantity", "fifo_value", "average_unit_cost", "average_value",
+            "fifo_cogs", "average_cogs", "updated_at",
+        )
+        select_related = ["item"]
 
 
 class MaterialSerializer(serializers.ModelSerializer):
@@ -24,9 +43,25 @@ class StockSerializer(serializers.ModelSerializer):
     class Meta:
         model = Stock
         fields = "__all__"
+        read_only_fields = ("quantity",)
 
 
 class StockMovementSerializer(serializers.ModelSerializer):
+    # Posted movements are part of the stock ledger; corrections are new adjustments
+    ledger_fields = ("item", "movement_type", "quantity", "warehouse", "destination_warehouse", "unit_cost")
+
     class Meta:
         model = StockMovement
         fields = "__all__"
+
+    def validate(self, attrs):
+        if self.instance is not None:
+            changed = [
+                name for name in self.ledger_fields
+                if name in attrs and attrs[name] != getattr(self.instance, name)
+            ]
+            if changed:
+                raise serializers.ValidationError(
+                    {name: "Posted movements cannot be changed; record an adjustment instead." for name in changed}
+                )
+        return attrs
@@ -1,3 +1,316 @@
-from django.test import TestCase
+import io
+import threading
+from importlib import import_module
+from unittest import mock
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import CostLayer, InventoryItem, ItemValuation, Stock, StockMovement, StockSnapshot, Warehouse
+from .valuation import Valuator, value_inventory
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.main = Warehouse.objects.create(name="Main")
+        self.site = Warehouse.objects.create(name="Site")
+        self.item = InventoryItem.objects.create(name="Cement", sku="CEM-1", warehouse=self.main)
+
+    def assertLevels(self, main, site):
+        stock = dict(Stock.objects.filter(item=self.item).values_list("warehouse_id", "quantity"))
+        self.assertEqual(stock.get(self.main.id, 0), main)
+        self.assertEqual(stock.get(self.site.id, 0), site)
+        self.item.refresh_from_db()
+        self.main.refresh_from_db()
+        self.site.refresh_from_db()
+        self.assertEqual(self.item.quantity, main + site)
+        self.assertEqual((self.main.current_stock, self.site.current_stock), (main, site))
+
+    def test_in_out_transfer_adjustment(self):
+        StockMovement.objects.create(item=self.item, movement_type="in", quantity=100)
+        StockMovement.objects.create(item=self.item, movement_type="out", quantity=30)
+        StockMovement.objects.create(
+            item=self.item, movement_type="transfer", quantity=20, destination_warehouse=self.site,
+        )
+        StockMovement.objects.create(item=self.item, movement_type="adjustment", quantity=45)
+
+        self.assertLevels(main=45, site=20)
+
+    def test_issue_beyond_stock_is_rejected(self):
+        StockMovement.objects.create(item=self.item, movement_type="in", quantity=5)
+        with self.assertRaises(ValidationError):
+            StockMovement.objects.create(item=self.item, movement_type="out", quantity=6)
+        self.assertEqual(StockMovement.objects.count(), 1)
+        self.assertLevels(main=5, site=0)
+
+    def test_api_bulk_post_and_ledger_fields_are_locked(self):
+        client = APIClient()
+        payload = [{"item": self.item.id, "movement_type": "in", "quantity": 10} for _ in range(5)]
+        payload.append({"item": self.item.id, "movement_type": "out", "quantity": 15})
+        self.assertEqual(client.post("/api/stock-movements/", payload, format="json").status_code, 201)
+        self.assertLevels(main=35, site=0)
+
+        response = client.post(
+            "/api/stock-movements/", {"item": self.item.id, "movement_type": "out", "quantity": 99}, format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        movement = StockMovement.objects.first()
+        response = client.patch(f"/api/stock-movements/{movement.id}/", {"quantity": 1}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(client.delete(f"/api/stock-movements/{movement.id}/").status_code, 405)
+
+    def test_levels_only_change_through_movements(self):
+        StockMovement.objects.create(item=self.item, movement_type="in", quantity=10)
+        stock = Stock.objects.get(item=self.item)
+        client = APIClient()
+        client.patch(f"/api/stocks/{stock.id}/", {"quantity": 99, "reorder_level": 3}, format="json")
+        client.patch(f"/api/inventory-items/{self.item.id}/", {"quantity": 99}, format="json")
+        client.patch(f"/api/warehouses/{self.main.id}/", {"current_stock": 99}, format="json")
+        response = client.post("/api/stocks/", {"item": self.item.id, "warehouse": self.site.id, "quantity": 5})
+        self.assertEqual(response.json()["quantity"], 0)
+        self.assertEqual(Stock.objects.get(pk=stock.pk).reorder_level, 3)
+        self.assertLevels(main=10, site=0)
+
+
+
+class StockAsOfTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.main = Warehouse.objects.create(name="Main")
+        self.item = InventoryItem.objects.create(name="Sand", sku="SND-1", warehouse=self.main)
+        self.receipt = self.move("in", 100, date(2025, 1, 1))
+        self.move("out", 30, date(2025, 1, 2))
+        self.move("in", 10, date(2025, 1, 3))
+
+    def move(self, kind, quantity, day):
+        movement = StockMovement.objects.create(item=self.item, movement_type=kind, quantity=quantity)
+        moment = timezone.make_aware(datetime(day.year, day.month, day.day, 12))
+        StockMovement.objects.filter(pk=movement.pk).update(movement_date=moment)
+        return movement
+
+    def as_of(self, value):
+        return self.client.get("/api/stocks/", {"as_of": value}).json()
+
+    def test_as_of_replays_history(self):
+        data = self.as_of("2025-01-02")
+        self.assertIsNone(data["snapshot_date"])
+        self.assertEqual(data["results"], [{"item": self.item.id, "warehouse": self.main.id, "quantity": 70}])
+
+    def test_as_of_starts_from_nearest_snapshot(self):
+        call_command("snapshot_stock", date="2025-01-01", stdout=io.StringIO())
+        self.assertEqual(StockSnapshot.objects.get().quantity, 100)
+        # Rewriting pre-snapshot history must not affect lookups served from the snapshot
+        StockMovement.objects.filter(pk=self.receipt.pk).update(quantity=1)
+
+        data = self.as_of("2025-01-03")
+        self.assertEqual(data["snapshot_date"], "2025-01-01")
+        self.assertEqual(data["results"][0]["quantity"], 80)
+        self.assertEqual(self.as_of("2025-01-02T00:00:00")["results"][0]["quantity"], 100)
+
+    def test_snapshot_rerun_replaces_the_day(self):
+        call_command("snapshot_stock", date="2025-01-01", stdout=io.StringIO())
+        call_command("snapshot_stock", date="2025-01-02", stdout=io.StringIO())
+        self.assertEqual(StockSnapshot.objects.get(snapshot_date=date(2025, 1, 2)).quantity, 70)
+
+        # A corrected movement of that day shows up when the snapshot is taken again
+        StockMovement.objects.filter(movement_type="out").update(quantity=20)
+        call_command("snapshot_stock", date="2025-01-02", stdout=io.StringIO())
+        self.assertEqual(StockSnapshot.objects.get(snapshot_date=date(2025, 1, 2)).quantity, 80)
+
+    def test_invalid_as_of(self):
+        self.assertEqual(self.client.get("/api/stocks/", {"as_of": "soon"}).status_code, 400)
+
+
+class LowStockTests(TestCase):
+    def test_low_stock_endpoint(self):
+        main = Warehouse.objects.create(name="Main")
+        site = Warehouse.objects.create(name="Site")
+        item = InventoryItem.objects.create(name="Gravel", sku="GRV-1", warehouse=main)
+        low = Stock.objects.create(item=item, warehouse=main, quantity=3, reorder_level=5)
+        Stock.objects.create(item=item, warehouse=site, quantity=5, reorder_level=4)
+        client = APIClient()
+
+        data = client.get("/api/stocks/low/").json()
+        self.assertEqual([row["id"] for row in data["results"]], [low.id])
+        self.assertEqual(client.get("/api/stocks/low/", {"warehouse": site.id}).json()["results"], [])
+        self.assertEqual(client.get("/api/stocks/low/", {"warehouse": "x"}).status_code, 400)
+
+
+class InventoryValuationTests(TestCase):
+    def setUp(self):
+        self.main = Warehouse.objects.create(name="Main")
+        self.site = Warehouse.objects.create(name="Site")
+        self.item = InventoryItem.objects.create(name="Rebar", sku="RB-1", unit_price=7, warehouse=self.main)
+        self.move("in", 10, unit_cost=5)
+        self.move("in", 10, unit_cost=8)
+        self.move("out", 15)
+
+    def move(self, kind, quantity, **extra):
+        return StockMovement.objects.create(item=self.item, movement_type=kind, quantity=quantity, **extra)
+
+    def valuation(self):
+        return ItemValuation.objects.get(item=self.item)
+
+    def test_fifo_and_weighted_average(self):
+        stats = value_inventory()
+        self.assertEqual((stats["movements"], stats["items"]), (3, 1))
+        valuation = self.valuation()
+        self.assertEqual(valuation.quantity, 5)
+        self.assertEqual(valuation.fifo_cogs, Decimal("90.00"))
+        self.assertEqual(valuation.fifo_value, Decimal("40.00"))
+        self.assertEqual(valuation.average_unit_cost, Decimal("6.5000"))
+        self.assertEqual(valuation.average_cogs, Decimal("97.50"))
+        self.assertEqual(valuation.average_value, Decimal("32.50"))
+        self.assertFalse(StockMovement.objects.filter(valued=False).exists())
+
+    def test_incremental_run_extends_stored_layers(self):
+        value_inventory()
+        self.move("out", 3)
+        self.move("in", 4)  # no unit cost: falls back to the item's unit price
+
+        self.assertEqual(value_inventory()["movements"], 2)
+        valuation = self.valuation()
+        self.assertEqual(valuation.quantity, 6)
+        self.assertEqual(valuation.fifo_value, Decimal("44.00"))
+        self.assertEqual(
+            list(CostLayer.objects.filter(remaining_quantity__gt=0).values_list("remaining_quantity", "unit_cost")),
+            [(2, Decimal("8.0000")), (4, Decimal("7.0000"))],
+        )
+
+    def test_transfers_keep_value_and_adjustments_cost_the_delta(self):
+        self.move("transfer", 5, destination_warehouse=self.site)
+        self.move("adjustment", 0)  # main is counted empty: nothing is lost, it was all transferred
+        self.move("adjustment", 7, warehouse=self.site)  # two found on site at the average cost
+        value_inventory()
+        valuation = self.valuation()
+        self.assertEqual(valuation.quantity, 7)
+        self.assertEqual(valuation.fifo_value, Decimal("53.00"))
+        self.assertEqual(valuation.average_value, Decimal("45.50"))
+        self.assertEqual(valuation.warehouse_balances, {str(self.site.id): 7})
+
+    def test_late_movement_rebuilds_the_item(self):
+        value_inventory()
+        early = self.move("in", 10, unit_cost=1)
+        # A movement committed late sorts before everything already costed
+        first = StockMovement.objects.order_by("movement_date").first().movement_date
+        StockMovement.objects.filter(pk=early.pk).update(movement_date=first - timedelta(seconds=1))
+
+        self.assertEqual(value_inventory()["rebuilt_items"], 1)
+        incremental = self.valuation()
+        value_inventory(rebuild=True)
+        rebuilt = self.valuation()
+        self.assertEqual(incremental.fifo_cogs, Decimal("35.00"))
+        for field in ("quantity", "fifo_value", "fifo_cogs", "average_value", "average_cogs"):
+            self.assertEqual(getattr(incremental, field), getattr(rebuilt, field))
+
+    def test_movements_are_marked_valued_in_batches(self):
+        for _ in range(4):
+            self.move("out", 1)
+        with mock.patch.object(Valuator, "batch_size", 2), CaptureQueriesContext(connection) as queries:
+            value_inventory()
+        marks = [q for q in queries.captured_queries if q["sql"].startswith('UPDATE "inventory_stockmovement"')]
+        self.assertEqual(len(marks), 4)
+        self.assertFalse(StockMovement.objects.filter(valued=False).exists())
+        self.assertEqual(self.valuation().quantity, 1)
+
+    def test_opening_stock_gets_a_cost_layer(self):
+        # 20 units were loaded straight into the stock before movements were posted
+        Stock.objects.filter(item=self.item, warehouse=self.main).update(quantity=25)
+        import_module("inventory.migrations.0009_opening_stock_movements").record_openings(apps, None)
+
+        value_inventory()
+        valuation = self.valuation()
+        self.assertEqual(valuation.quantity, 25)
+        self.assertEqual(valuation.fifo_cogs, Decimal("105.00"))  # the 15 issued come out of the opening 20 at 7
+        self.assertEqual(valuation.fifo_value, Decimal("165.00"))
+
+        # A count of 20 is a loss of 5, not a gain of 20
+        self.move("adjustment", 20)
+        value_inventory()
+        valuation = self.valuation()
+        self.assertEqual(valuation.quantity, 20)
+        self.assertEqual(valuation.fifo_value, Decimal("130.00"))
+
+    def test_valuation_endpoint(self):
+        client = APIClient()
+        # Reads never run the valuation
+        self.assertEqual(client.get("/api/inventory-items/valuation/", {"refresh": "true"}).json()["results"], [])
+        self.assertEqual(client.post("/api/inventory-items/valuation/refresh/").json()["movements"], 3)
+        response = client.get("/api/inventory-items/valuation/")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(Decimal(str(data["totals"]["fifo_value"])), Decimal("40"))
+        self.assertEqual(data["results"][0]["sku"], "RB-1")
+
+    def test_management_command(self):
+        out = io.StringIO()
+        call_command("value_inventory", stdout=out)
+        self.assertIn("Valued 3 movements across 1 items", out.getvalue())
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class StockLedgerConcurrencyTests(TransactionTestCase):
+    threads = 8
+    movements_per_thread = 25
+
+    def test_concurrent_receipts_and_issues_keep_totals(self):
+        main = Warehouse.objects.create(name="Main")
+        site = Warehouse.objects.create(name="Site")
+        item = InventoryItem.objects.create(name="Rebar", sku="REB-1", warehouse=main)
+        StockMovement.objects.create(item=item, movement_type="in", quantity=1000)
+        StockMovement.objects.create(item=item, movement_type="in", quantity=100, warehouse=site)
+
+        errors = []
+
+        def worker(index):
+            try:
+                for n in range(self.movements_per_thread):
+                    # Alternate receipts, issues and transfers in both directions
+                    kind = (index + n) % 4
+                    if kind == 0:
+                        StockMovement.objects.create(item=item, movement_type="in", quantity=3)
+                    elif kind == 1:
+                        StockMovement.objects.create(item=item, movement_type="out", quantity=2)
+                    elif kind == 2:
+                        StockMovement.objects.create(
+                            item=item, movement_type="transfer", quantity=1,
+                            warehouse=main, destination_warehouse=site,
+                        )
+                    else:
+                        StockMovement.objects.create(
+                            item=item, movement_type="transfer", quantity=1,
+                            warehouse=site, destination_warehouse=main,
+                        )
+            except Exception as e:  # surfaced in the main thread below
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        receipts = sum(1 for i in range(self.threads) for n in range(self.movements_per_thread) if (i + n) % 4 == 0)
+        issues = sum(1 for i in range(self.threads) for n in range(self.movements_per_thread) if (i + n) % 4 == 1)
+        expected = 1100 + 3 * receipts - 2 * issues
+
+        stock = dict(Stock.objects.filter(item=item).values_list("warehouse_id", "quantity"))
+        item.refresh_from_db()
+        main.refresh_from_db()
+        site.refresh_from_db()
+        self.assertEqual(sum(stock.values()), expected)
+        self.assertEqual(item.quantity, expected)
+        self.assertEqual(main.current_stock, stock[main.id])
+        self.assertEqual(site.current_stock, stock[site.id])
@@ -0,0 +1,225 @@
+"""
+Inventory valuation.
+
+Values every item under FIFO and moving weighted average in a single pass
+over StockMovement ordered by (item, movement_date, id). FIFO cost layers and
+the running per-item state are persisted, so later runs only cost movements
+not yet marked ``valued`` and extend the stored layers. A movement that lands
+before an item's last costed movement (a late commit) invalidates that item,
+which is then rebuilt from its full history in the same pass.
+
+Transfers move quantity between warehouses without changing value. An
+adjustment is costed by its delta against the warehouse balance: gains are
+received at the current average cost, losses are issued like "out". Stock
+loaded before movements were posted is explained by an opening "in" movement
+(migration 0009), so every balance here starts from a movement.
+"""
+from collections import deque
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CostLayer, ItemValuation, StockMovement
+
+CENTS = Decimal("0.01")
+COST_PLACES = Decimal("0.0001")
+ZERO = Decimal("0")
+
+# Arbitrary key for the PostgreSQL advisory lock serializing valuation runs
+LOCK_KEY = 7301
+
+
+class ItemState:
+    """Running valuation of one item while its movements are replayed"""
+
+    def __init__(self, item_id, valuation=None, layers=()):
+        self.item_id = item_id
+        self.valuation = valuation or ItemValuation(item_id=item_id)
+        self.quantity = self.valuation.quantity
+        self.average_cost = Decimal(self.valuation.average_unit_cost)
+        self.fifo_cogs = Decimal(self.valuation.fifo_cogs)
+        self.average_cogs = Decimal(self.valuation.average_cogs)
+        self.balances = {int(key): value for key, value in self.valuation.warehouse_balances.items()}
+        self.layers = deque(layers)
+        self.new_layers = []
+        self.changed_layers = set()
+
+    def apply(self, movement_id, movement_type, quantity, unit_cost, default_cost,
+              warehouse_id, destination_id, movement_date):
+        if movement_type == "transfer":
+            self.balances[warehouse_id] = self.balances.get(warehouse_id, 0) - quantity
+            self.balances[destination_id] = self.balances.get(destination_id, 0) + quantity
+            delta = 0
+        elif movement_type == "adjustment":
+            delta = quantity - self.balances.get(warehouse_id, 0)
+            self.balances[warehouse_id] = quantity
+        else:
+            delta = quantity if movement_type == "in" else -quantity
+            self.balances[warehouse_id] = self.balances.get(warehouse_id, 0) + delta
+
+        if delta > 0:
+            if movement_type == "in":
+                cost = unit_cost if unit_cost is not None else default_cost
+            else:
+                cost = self.average_cost if self.quantity > 0 else default_cost
+            self.receive(movement_id, movement_date, delta, cost)
+        elif delta < 0:
+            self.issue(-delta)
+
+        self.valuation.last_movement_date = movement_date
+        self.valuation.last_movement_id = movement_id
+
+    def receive(self, movement_id, received_at, quantity, cost):
+        if self.quantity > 0:
+            total = self.quantity * self.average_cost + quantity * cost
+            self.average_cost = (total / (self.quantity + quantity)).quantize(COST_PLACES)
+        else:
+            self.average_cost = Decimal(cost).quantize(COST_PLACES)
+        self.quantity += quantity
+        layer = CostLayer(
+            item_id=self.item_id, movement_id=movement_id, received_at=received_at,
+            unit_cost=cost, quantity=quantity, remaining_quantity=quantity,
+        )
+        self.layers.append(layer)
+        self.new_layers.append(layer)
+
+    def issue(self, quantity):
+        self.quantity -= quantity
+        self.average_cogs += quantity * self.average_cost
+        while quantity and self.layers:
+            layer = self.layers[0]
+            taken = min(quantity, layer.remaining_quantity)
+            layer.remaining_quantity -= taken
+            self.fifo_cogs += taken * layer.unit_cost
+            quantity -= taken
+            if layer.pk is not None:
+                self.changed_layers.add(layer)
+            if not layer.remaining_quantity:
+                self.layers.popleft()
+        # Issues beyond the open layers (negative stock) cost at the average
+        self.fifo_cogs += quantity * self.average_cost
+
+    def finish(self):
+        valuation = self.valuation
+        valuation.quantity = self.quantity
+        valuation.average_unit_cost = self.average_cost
+        valuation.fifo_value = sum(
+            (layer.remaining_quantity * layer.unit_cost for layer in self.layers), ZERO
+        ).quantize(CENTS)
+        valuation.average_value = (max(self.quantity, 0) * self.average_cost).quantize(CENTS)
+        valuation.fifo_cogs = self.fifo_cogs.quantize(CENTS)
+        valuation.average_cogs = self.average_cogs.quantize(CENTS)
+        valuation.warehouse_balances = {str(key): value for key, value in self.balances.items() if value}
+        valuation.updated_at = timezone.now()
+        return valuation
+
+
+class Valuator:
+    """Replays movements item by item and writes the results in batches"""
+
+    batch_size = 5000
+
+    def __init__(self):
+        self.valuations = []
+        self.new_layers = []
+        self.changed_layers = []
+        self.valued_ids = []
+        self.movements = 0
+        self.items = 0
+
+    def run(self, movements):
+        # All state for the touched items comes from two queries up front
+        touched = movements.values("item_id")
+        valuations = {v.item_id: v for v in ItemValuation.objects.filter(item_id__in=touched)}
+        open_layers = {}
+        for layer in CostLayer.objects.filter(item_id__in=touched, remaining_quantity__gt=0).order_by("item_id", "received_at", "id"):
+            open_layers.setdefault(layer.item_id, []).append(layer)
+
+        rows = movements.order_by("item_id", "movement_date", "id").values_list(
+            "id", "item_id", "movement_type", "quantity", "unit_cost", "item__unit_price",
+            Coalesce("warehouse_id", "item__warehouse_id"), "destination_warehouse_id",
+            "movement_date", "valued",
+        )
+        state = None
+        for pk, item_id, movement_type, quantity, unit_cost, default_cost, warehouse_id, destination_id, moved_at, valued in rows.iterator(chunk_size=self.batch_size):
+            if state is None or state.item_id != item_id:
+                if state is not None:
+                    self.finish(state)
+                state = ItemState(item_id, valuations.get(item_id), open_layers.get(item_id, ()))
+            state.apply(pk, movement_type, quantity, unit_cost, default_cost, warehouse_id, destination_id, moved_at)
+            self.movements += 1
+            if not valued:
+                self.valued_ids.append(pk)
+                # An item can have far more movements than a batch
+                if len(self.valued_ids) >= self.batch_size:
+                    self.mark_valued()
+        if state is not None:
+            self.finish(state)
+        self.flush()
+        return {"movements": self.movements, "items": self.items}
+
+    def finish(self, state):
+        self.valuations.append(state.finish())
+        self.new_layers.extend(state.new_layers)
+        self.changed_layers.extend(state.changed_layers)
+        self.items += 1
+        if max(len(self.valuations), len(self.new_layers)) >= self.batch_size:
+            self.flush()
+
+    def mark_valued(self):
+        StockMovement.objects.filter(pk__in=self.valued_ids).update(valued=True)
+        self.valued_ids = []
+
+    def flush(self):
+        fields = [
+            "quantity", "average_unit_cost", "fifo_value", "average_value", "fifo_cogs", "average_cogs",
+            "warehouse_balances", "last_movement_date", "last_movement_id", "updated_at",
+        ]
+        created = [v for v in self.valuations if v.pk is None]
+        updated = [v for v in self.valuations if v.pk is not None]
+        ItemValuation.objects.bulk_create(created, batch_size=self.batch_size)
+        ItemValuation.objects.bulk_update(updated, fields, batch_size=self.batch_size)
+        CostLayer.objects.bulk_create(self.new_layers, batch_size=self.batch_size)
+        CostLayer.objects.bulk_update(self.changed_layers, ["remaining_quantity"], batch_size=self.batch_size)
+        self.mark_valued()
+        self.valuations, self.new_layers, self.changed_layers = [], [], []
+
+
+def stale_items():
+    """Items with an uncosted movement dated before their last costed one"""
+    return set(
+        StockMovement.objects.filter(valued=False, item__valuation__isnull=False)
+        .filter(
+            Q(movement_date__lt=F("item__valuation__last_movement_date"))
+            | Q(movement_date=F("item__valuation__last_movement_date"), id__lt=F("item__valuation__last_movement_id"))
+        )
+        .values_list("item_id", flat=True)
+        .distinct()
+    )
+
+
+@transaction.atomic
+def value_inventory(rebuild=False):
+    """Cost pending movements, or every movement with ``rebuild``; returns run counts"""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [LOCK_KEY])
+
+    if rebuild:
+        CostLayer.objects.all().delete()
+        ItemValuation.objects.all().delete()
+        movements = StockMovement.objects.all()
+        rebuilt = None
+    else:
+        rebuilt = stale_items()
+        if rebuilt:
+            CostLayer.objects.filter(item_id__in=rebuilt).delete()
+            ItemValuation.objects.filter(item_id__in=rebuilt).delete()
+        movements = StockMovement.objects.filter(Q(valued=False) | Q(item_id__in=rebuilt))
+
+    stats = Valuator().run(movements)
+    stats["rebuilt_items"] = stats["items"] if rebuilt is None else len(rebuilt)
+    return stats
@@ -1,7 +1,17 @@
-from rest_framework import viewsets
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
-from .models import Warehouse, InventoryItem, Material, Stock, StockMovement
-from .serializers import WarehouseSerializer, InventoryItemSerializer, MaterialSerializer, StockSerializer, StockMovementSerializer
+from rest_framework.response import Response
+from core.mixins import BulkModelMixin
+from .ledger import post_movements, prepare_movements
+from .snapshots import end_of_day, stock_as_of
+from .valuation import value_inventory
+from .models import Warehouse, InventoryItem, ItemValuation, Material, Stock, StockMovement
+from .serializers import WarehouseSerializer, InventoryItemSerializer, ItemValuationSerializer, MaterialSerializer, StockSerializer, StockMovementSerializer
 
 class WarehouseViewSet(viewsets.ModelViewSet):
     queryset = Warehouse.objects.all()
@@ -13,6 +23,29 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
     serializer_class = InventoryItemSerializer
     permission_classes = [AllowAny]
 
+    @action(detail=False, methods=['get'])
+    def valuation(self, request):
+        """FIFO and weighted-average stock value per item, as of the last valuation run"""
+        valuations = ItemValuation.objects.select_related('item').order_by('item_id')
+        totals = valuations.aggregate(
+            quantity=Sum('quantity'),
+            fifo_value=Sum('fifo_value'),
+            average_value=Sum('average_value'),
+            fifo_cogs=Sum('fifo_cogs'),
+            average_cogs=Sum('average_cogs'),
+        )
+        page = self.paginate_queryset(valuations)
+        if page is not None:
+            response = self.get_paginated_response(ItemValuationSerializer(page, many=True).data)
+            response.data['totals'] = totals
+            return response
+        return Response({'totals': totals, 'results': ItemValuationSerializer(valuations, many=True).data})
+
+    @action(detail=False, methods=['post'], url_path='valuation/refresh')
+    def refresh_valuation(self, request):
+        """Cost movements recorded since the last run (the value_inventory command does the same from cron)"""
+        return Response(value_inventory())
+
 class MaterialViewSet(viewsets.ModelViewSet):
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
@@ -23,7 +56,79 @@ class StockViewSet(viewsets.ModelViewSet):
     serializer_class = StockSerializer
     permission_classes = [AllowAny]
 
-class StockMovementViewSet(viewsets.ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        """Current stock, or historic levels with ?as_of=YYYY-MM-DD or an ISO datetime"""
+        as_of = request.query_params.get('as_of')
+        if not as_of:
+            return super().list(request, *args, **kwargs)
+
+        # A bare date means the end of that day
+        try:
+            day = parse_date(as_of)
+            moment = end_of_day(day) if day else parse_datetime(as_of)
+        except ValueError:
+            moment = None
+        if moment is None:
+            return Response({'error': 'as_of must be a date or datetime'}, status=400)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+
+        filters = {}
+        for param in ('item', 'warehouse'):
+            value = request.query_params.get(param)
+            if value is not None:
+                if not value.isdigit():
+                    return Response({'error': f'{param} must be an id'}, status=400)
+                filters[f'{param}_id'] = int(value)
+
+        snapshot_date, balances = stock_as_of(moment, **filters)
+        return Response({
+            'as_of': moment,
+            'snapshot_date': snapshot_date,
+            'results': [
+                {'item': item_id, 'warehouse': warehouse_id, 'quantity': quantity}
+                for (item_id, warehouse_id), quantity in sorted(balances.items())
+            ],
+        })
+
+    @action(detail=False, methods=['get'])
+    def low(self, request):
+        """Stock at or below its reorder level, optionally for one ?warehouse="""
+        # Matches the predicate of the partial stock_reorder_candidate_idx index
+        stocks = Stock.objects.filter(quantity__lte=F('reorder_level')).order_by('warehouse_id', 'item_id')
+        warehouse = request.query_params.get('warehouse')
+        if warehouse is not None:
+            if not warehouse.isdigit():
+                return Response({'error': 'warehouse must be an id'}, status=400)
+            stocks = stocks.filter(warehouse_id=int(warehouse))
+        page = self.paginate_queryset(stocks)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(stocks, many=True).data)
+
+class StockMovementViewSet(BulkModelMixin, viewsets.ModelViewSet):
+    """
+    Stock movements post to Stock, InventoryItem and Warehouse totals when
+    created. Posted movements cannot be deleted or have their quantities edited.
+    """
     queryset = StockMovement.objects.all()
     serializer_class = StockMovementSerializer
-    permission_classes = [AllowAny]
\ No newline at end of file
+    permission_classes = [AllowAny]
+    cursor_ordering = ('-movement_date', '-id')
+    http_method_names = ['get', 'post', 'put', 'patch', 'head', 'options']
+
+    def perform_create(self, serializer):
+        try:
+            serializer.save()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'non_field_errors': e.messages})
+
+    def perform_bulk_create(self, serializer):
+        movements = [StockMovement(**attrs) for attrs in serializer.validated_data]
+        try:
+            prepare_movements(movements)
+            movements = StockMovement.objects.bulk_create(movements, batch_size=self.bulk_batch_size)
+            post_movements(movements)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'non_field_errors': e.messages})
+        return movements
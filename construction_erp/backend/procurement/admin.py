@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Supplier, PurchaseRequest, PurchaseOrder, PurchaseOrderItem
+from .models import Supplier, SupplierScorecard, PurchaseRequest, PurchaseOrder, PurchaseOrderItem
 
 
 @admin.register(Supplier)
@@ -10,8 +10,8 @@ class SupplierAdmin(admin.ModelAdmin):
 
 @admin.register(PurchaseRequest)
 class PurchaseRequestAdmin(admin.ModelAdmin):
-    list_display = ("id", "requester", "status")
-    list_filter = ("status",)
+    list_display = ("id", "requester", "item", "warehouse", "quantity", "status")
+    list_filter = ("status", "warehouse")
     search_fields = ("requester__username",)
 
 
@@ -31,3 +31,10 @@ class PurchaseOrderAdmin(admin.ModelAdmin):
 @admin.register(PurchaseOrderItem)
 class PurchaseOrderItemAdmin(admin.ModelAdmin):
     list_display = ("purchase_order", "quantity", "unit_price")
+
+
+@admin.register(SupplierScorecard)
+class SupplierScorecardAdmin(admin.ModelAdmin):
+    list_display = ("supplier", "order_count", "total_spend", "mean_lead_time_days", "p90_lead_time_days", "cancellation_rate")
+    search_fields = ("supplier__name",)
+    readonly_fields = ("updated_at",)
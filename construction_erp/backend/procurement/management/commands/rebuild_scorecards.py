@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from procurement.scorecards import rebuild_scorecards
+
+
+class Command(BaseCommand):
+    help = "Recompute every supplier scorecard from its purchase orders (backfill or repair)"
+
+    def handle(self, *args, **options):
+        suppliers = rebuild_scorecards()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt scorecards for {suppliers} suppliers"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from procurement.reorder import create_reorder_requests
+
+
+class Command(BaseCommand):
+    help = "Raise draft purchase requests for stock at or below its reorder level (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--warehouse", type=int, help="Only consider this warehouse id")
+
+    def handle(self, *args, **options):
+        created = create_reorder_requests(warehouse_id=options["warehouse"])
+        for warehouse_id, count in sorted(created.items()):
+            self.stdout.write(f"Warehouse {warehouse_id}: {count} draft requests")
+        self.stdout.write(self.style.SUCCESS(f"Created {sum(created.values())} draft purchase requests"))
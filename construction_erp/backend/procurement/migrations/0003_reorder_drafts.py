@@ -0,0 +1,36 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_stock_reorder_candidate_index'),
+        ('procurement', '0002_remove_purchaseorder_created_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaserequest',
+            name='item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purchase_requests', to='inventory.inventoryitem'),
+        ),
+        migrations.AddField(
+            model_name='purchaserequest',
+            name='warehouse',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='purchase_requests', to='inventory.warehouse'),
+        ),
+        migrations.AlterField(
+            model_name='purchaserequest',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='purchaserequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'draft')), fields=('item', 'warehouse'), name='purchaserequest_one_draft_per_stock'),
+        ),
+    ]
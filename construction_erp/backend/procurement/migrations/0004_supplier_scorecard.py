@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0003_reorder_drafts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierScorecard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+                ('total_spend', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('lead_time_count', models.PositiveIntegerField(default=0)),
+                ('lead_time_histogram', models.JSONField(default=dict)),
+                ('mean_lead_time_days', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('p90_lead_time_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('cancellation_rate', models.DecimalField(decimal_places=4, default=0, max_digits=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('supplier', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='scorecard', to='procurement.supplier')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['cancellation_rate', 'p90_lead_time_days'], name='scorecard_rank_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
 
@@ -19,6 +21,7 @@ class Supplier(models.Model):
 
 class PurchaseRequest(models.Model):
     STATUS_CHOICES = [
+        ("draft", "Draft"),
         ("pending", "Pending"),
         ("approved", "Approved"),
         ("rejected", "Rejected"),
@@ -28,11 +31,52 @@ class PurchaseRequest(models.Model):
     quantity = models.PositiveIntegerField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     request_date = models.DateField(auto_now_add=True)
+    # Set on requests raised automatically for low stock
+    item = models.ForeignKey("inventory.InventoryItem", on_delete=models.SET_NULL, null=True, blank=True, related_name="purchase_requests")
+    warehouse = models.ForeignKey("inventory.Warehouse", on_delete=models.SET_NULL, null=True, blank=True, related_name="purchase_requests")
+
+    class Meta:
+        constraints = [
+            # At most one open reorder draft per stock row, so the reorder job is idempotent
+            models.UniqueConstraint(
+                fields=["item", "warehouse"], condition=models.Q(status="draft"),
+                name="purchaserequest_one_draft_per_stock",
+            ),
+        ]
 
     def __str__(self):
         return f"Request {self.id} - {self.item_description}"
 
 
+class PurchaseOrderQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate ``total_amount`` from the order's lines, or the header when it has none"""
+        line_totals = (
+            PurchaseOrderItem.objects.filter(purchase_order=OuterRef("pk"))
+            .order_by()
+            .values("purchase_order")
+            .annotate(total=Sum(F("quantity") * F("unit_price")))
+            .values("total")
+        )
+        money = DecimalField(max_digits=16, decimal_places=2)
+        return self.annotate(
+            total_amount=Coalesce(
+                Subquery(line_totals, output_field=money), F("quantity") * F("unit_price"), output_field=money,
+            )
+        )
+
+    def with_quantities(self):
+        """Annotate ``total_quantity`` from the order's lines, or the header when it has none"""
+        line_quantities = (
+            PurchaseOrderItem.objects.filter(purchase_order=OuterRef("pk"))
+            .order_by()
+            .values("purchase_order")
+            .annotate(total=Sum("quantity"))
+            .values("total")
+        )
+        return self.annotate(total_quantity=Coalesce(Subquery(line_quantities), F("quantity")))
+
+
 class PurchaseOrder(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -53,12 +97,43 @@ class PurchaseOrder(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PurchaseOrderQuerySet.as_manager()
+
+    # Set by PurchaseOrderQuerySet.with_totals()
+    _total_amount = None
+
     def __str__(self):
         return f"{self.title} - {self.supplier.name if self.supplier else 'No Supplier'}"
 
+    # The scorecard signals lock the stored row before reading what it counted
+    # for (procurement.signals); the lock only holds inside a transaction
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+    @property
+    def reference(self):
+        """Reference quoted on receipts (StockMovement.reference) and supplier invoices"""
+        return f"PO-{self.pk}"
+
     @property
     def total_amount(self):
-        return self.quantity * self.unit_price
+        if self._total_amount is None:
+            if self.pk is None:
+                return self.quantity * self.unit_price
+            lines = self.items.aggregate(total=Sum(F("quantity") * F("unit_price")))["total"]
+            return lines if lines is not None else self.quantity * self.unit_price
+        return self._total_amount
+
+    @total_amount.setter
+    def total_amount(self, value):
+        self._total_amount = value
 
 
 class PurchaseOrderItem(models.Model):
@@ -70,3 +145,30 @@ class PurchaseOrderItem(models.Model):
     def __str__(self):
         return f"{self.description} ({self.quantity})"
 
+
+
+class SupplierScorecard(models.Model):
+    """
+    Running delivery and spend figures per supplier, kept current by
+    procurement.scorecards as orders change so reads never scan orders.
+    """
+    supplier = models.OneToOneField(Supplier, on_delete=models.CASCADE, related_name="scorecard")
+    order_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    # Spend on orders that were not cancelled
+    total_spend = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    # Lead times (order_date to delivery_date) of completed orders, in days
+    lead_time_count = models.PositiveIntegerField(default=0)
+    lead_time_histogram = models.JSONField(default=dict)
+    mean_lead_time_days = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    p90_lead_time_days = models.PositiveIntegerField(null=True, blank=True)
+    cancellation_rate = models.DecimalField(max_digits=5, decimal_places=4, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["cancellation_rate", "p90_lead_time_days"], name="scorecard_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"Scorecard {self.supplier.name}"
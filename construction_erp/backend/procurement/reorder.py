@@ -0,0 +1,78 @@
+"""
+Reorder drafts for low stock.
+
+Candidates are the Stock rows at or below their reorder level, read through
+the partial stock_reorder_candidate_idx index so a run costs O(candidates)
+rather than O(all stock). Each candidate without an open (draft or pending)
+request becomes one draft PurchaseRequest tagged with its item and warehouse.
+Approved and rejected requests are settled, so a row that runs low again after
+its last order was approved gets a new draft. The partial unique constraint on
+drafts makes re-runs idempotent; on PostgreSQL an advisory lock also runs
+concurrent jobs one at a time, so each counts only the drafts it inserted.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Exists, F, Max, OuterRef, Q
+
+from inventory.models import Stock
+
+from .models import PurchaseRequest
+
+OPEN_REQUEST_STATUSES = ("draft", "pending")
+# Arbitrary key for the PostgreSQL advisory lock serializing reorder runs
+LOCK_KEY = 7302
+
+
+def low_stock():
+    """Stock rows at or below their reorder level, in index order"""
+    return Stock.objects.filter(quantity__lte=F("reorder_level")).order_by("warehouse_id", "item_id")
+
+
+def reorder_quantity(stock):
+    """Restock to twice the reorder level"""
+    return max(stock.reorder_level * 2 - stock.quantity, 1)
+
+
+@transaction.atomic
+def create_reorder_requests(warehouse_id=None, batch_size=1000):
+    """Raise draft purchase requests for candidates with no open request; returns {warehouse_id: created}"""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [LOCK_KEY])
+
+    candidates = low_stock().select_related("item", "warehouse").exclude(
+        Exists(PurchaseRequest.objects.filter(
+            status__in=OPEN_REQUEST_STATUSES, item_id=OuterRef("item_id"), warehouse_id=OuterRef("warehouse_id"),
+        ))
+    )
+    if warehouse_id is not None:
+        candidates = candidates.filter(warehouse_id=warehouse_id)
+
+    created = Counter()
+    batch = []
+    for stock in candidates.iterator(chunk_size=batch_size):
+        batch.append(PurchaseRequest(
+            item_id=stock.item_id,
+            warehouse_id=stock.warehouse_id,
+            item_description=f"Reorder {stock.item.name} ({stock.item.sku}) for {stock.warehouse.name}",
+            quantity=reorder_quantity(stock),
+            status="draft",
+        ))
+        if len(batch) == batch_size:
+            created.update(insert_drafts(batch))
+            batch = []
+    if batch:
+        created.update(insert_drafts(batch))
+    return dict(created)
+
+
+def insert_drafts(batch):
+    """Insert a batch of drafts, skipping rows that already have one; returns Counter of inserted per warehouse"""
+    last_pk = PurchaseRequest.objects.aggregate(last=Max("pk"))["last"] or 0
+    PurchaseRequest.objects.bulk_create(batch, ignore_conflicts=True)
+    keys = Q()
+    for request in batch:
+        keys |= Q(item_id=request.item_id, warehouse_id=request.warehouse_id)
+    inserted = PurchaseRequest.objects.filter(keys, status="draft", pk__gt=last_pk)
+    return Counter(inserted.values_list("warehouse_id", flat=True))
@@ -0,0 +1,136 @@
+"""
+Supplier scorecards.
+
+Each purchase order contributes one order, its spend (unless cancelled), a
+cancellation and, once completed with a delivery date, one lead-time sample
+to its supplier's SupplierScorecard. When an order or its lines change, the
+order's old contribution is subtracted and the new one added under a row
+lock on the affected scorecards, so updates cost O(1) per change and reads
+never touch PurchaseOrder. The old contribution is read with the order row
+locked, in the transaction that changes it, so two concurrent changes to
+one order apply their deltas one after the other instead of both starting
+from the same old state. Lead times are kept as a days -> count histogram,
+which gives an exact p90 and can be decremented when an order changes.
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import PurchaseOrder, SupplierScorecard
+
+Contribution = namedtuple("Contribution", "supplier_id cancelled spend lead_time")
+
+ZERO = Decimal("0")
+
+
+def contribution_of(row):
+    """What one order row (with total_amount) adds to its supplier's scorecard"""
+    if row["supplier_id"] is None:
+        return None
+    cancelled = row["status"] == "cancelled"
+    lead_time = None
+    if row["status"] == "completed" and row["order_date"] and row["delivery_date"]:
+        lead_time = max((row["delivery_date"] - row["order_date"]).days, 0)
+    return Contribution(row["supplier_id"], cancelled, ZERO if cancelled else row["total_amount"], lead_time)
+
+
+def order_rows():
+    return PurchaseOrder.objects.with_totals().values(
+        "supplier_id", "status", "order_date", "delivery_date", "total_amount",
+    )
+
+
+def order_contribution(order_id):
+    row = order_rows().filter(pk=order_id).first()
+    return contribution_of(row) if row else None
+
+
+def locked_contribution(order_id):
+    """order_contribution, with the order row locked until the transaction ends"""
+    # Locked separately: FOR UPDATE can't be combined with the totals' aggregate
+    list(PurchaseOrder.objects.select_for_update().filter(pk=order_id).values_list("pk", flat=True))
+    return order_contribution(order_id)
+
+
+def add(card, contribution, sign):
+    card.order_count += sign
+    card.cancelled_count += sign * contribution.cancelled
+    card.total_spend += sign * contribution.spend
+    if contribution.lead_time is not None:
+        key = str(contribution.lead_time)
+        card.lead_time_histogram[key] = card.lead_time_histogram.get(key, 0) + sign
+        if not card.lead_time_histogram[key]:
+            del card.lead_time_histogram[key]
+        card.lead_time_count += sign
+
+
+def summarize(card):
+    """Recompute the derived columns the leaderboard sorts on"""
+    samples = sorted((int(days), count) for days, count in card.lead_time_histogram.items())
+    if card.lead_time_count:
+        total = sum(days * count for days, count in samples)
+        card.mean_lead_time_days = (Decimal(total) / card.lead_time_count).quantize(Decimal("0.01"))
+        target, seen = 0.9 * card.lead_time_count, 0
+        for days, count in samples:
+            seen += count
+            if seen >= target:
+                card.p90_lead_time_days = days
+                break
+    else:
+        card.mean_lead_time_days = card.p90_lead_time_days = None
+    card.cancellation_rate = (
+        (Decimal(card.cancelled_count) / card.order_count).quantize(Decimal("0.0001")) if card.order_count else ZERO
+    )
+
+
+@transaction.atomic
+def apply_change(before, after):
+    """Move a scorecard from an order's ``before`` contribution to its ``after`` one"""
+    if before == after:
+        return
+    changes = [(c, sign) for c, sign in ((before, -1), (after, 1)) if c is not None]
+    supplier_ids = sorted({c.supplier_id for c, _ in changes})
+    SupplierScorecard.objects.bulk_create(
+        [SupplierScorecard(supplier_id=supplier_id) for supplier_id in supplier_ids], ignore_conflicts=True,
+    )
+    # Locks are taken in supplier order so concurrent moves cannot deadlock
+    cards = {
+        card.supplier_id: card
+        for card in SupplierScorecard.objects.select_for_update().filter(supplier_id__in=supplier_ids).order_by("supplier_id")
+    }
+    for contribution, sign in changes:
+        add(cards[contribution.supplier_id], contribution, sign)
+    for card in cards.values():
+        summarize(card)
+        card.save()
+
+
+@contextmanager
+def tracking(order):
+    """Apply the scorecard delta of line writes made inside the block"""
+    if order.supplier_id is None:
+        yield
+        return
+    with transaction.atomic():
+        before = locked_contribution(order.pk)
+        yield
+        apply_change(before, order_contribution(order.pk))
+
+
+@transaction.atomic
+def rebuild_scorecards():
+    """Recompute every scorecard from the orders; returns the number of suppliers scored"""
+    cards = {}
+    for row in order_rows().filter(supplier__isnull=False).iterator(chunk_size=5000):
+        contribution = contribution_of(row)
+        card = cards.get(contribution.supplier_id)
+        if card is None:
+            card = cards[contribution.supplier_id] = SupplierScorecard(supplier_id=contribution.supplier_id)
+        add(card, contribution, 1)
+    for card in cards.values():
+        summarize(card)
+    SupplierScorecard.objects.all().delete()
+    SupplierScorecard.objects.bulk_create(cards.values(), batch_size=1000)
+    return len(cards)
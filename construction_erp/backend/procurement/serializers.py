@@ -1,5 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Supplier, PurchaseRequest, PurchaseOrder, PurchaseOrderItem
+from .models import Supplier, SupplierScorecard, PurchaseRequest, PurchaseOrder, PurchaseOrderItem
+from .scorecards import tracking
 
 
 class SupplierSerializer(serializers.ModelSerializer):
@@ -8,12 +10,21 @@ class SupplierSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class SupplierScorecardSerializer(serializers.ModelSerializer):
+    supplier_name = serializers.CharField(source="supplier.name", read_only=True)
+
+    class Meta:
+        model = SupplierScorecard
+        exclude = ("id", "lead_time_histogram")
+
+
 class PurchaseRequestSerializer(serializers.ModelSerializer):
     requester = serializers.StringRelatedField(read_only=True)
 
     class Meta:
         model = PurchaseRequest
         fields = "__all__"
+        select_related = ["requester"]
 
 
 class PurchaseOrderItemSerializer(serializers.ModelSerializer):
@@ -22,6 +33,15 @@ class PurchaseOrderItemSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class PurchaseOrderLineSerializer(serializers.ModelSerializer):
+    """A line written through its order; lines with an ``id`` update that row"""
+    id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = PurchaseOrderItem
+        fields = ("id", "description", "quantity", "unit_price")
+
+
 class PurchaseOrderSerializer(serializers.ModelSerializer):
     supplier = serializers.PrimaryKeyRelatedField(
         queryset=Supplier.objects.all(),
@@ -30,6 +50,12 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
     )
     order_date = serializers.DateField(required=False, allow_null=True)
     delivery_date = serializers.DateField(required=False, allow_null=True)
+    total_amount = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    reference = serializers.CharField(read_only=True)
+    items = PurchaseOrderLineSerializer(many=True, required=False)
+
+    # Line fields compared when diffing submitted lines against stored ones
+    line_fields = ("description", "quantity", "unit_price")
 
     class Meta:
         model = PurchaseOrder
@@ -38,3 +64,59 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
             "status": {"required": False},
             "notes": {"required": False, "allow_blank": True},
         }
+        prefetch_related = ["items"]
+
+    def validate_items(self, items):
+        ids = [line["id"] for line in items if "id" in line]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each line id may appear only once.")
+        return items
+
+    @transaction.atomic
+    def create(self, validated_data):
+        lines = validated_data.pop("items", [])
+        if any("id" in line for line in lines):
+            raise serializers.ValidationError({"items": "New orders cannot reference existing lines."})
+        order = super().create(validated_data)
+        if lines:
+            with tracking(order):
+                PurchaseOrderItem.objects.bulk_create([
+                    PurchaseOrderItem(purchase_order=order, **line) for line in lines
+                ])
+        return order
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        lines = validated_data.pop("items", None)
+        order = super().update(instance, validated_data)
+        if lines is not None:
+            with tracking(order):
+                self.sync_lines(order, lines)
+        # Drop the stale annotation; the property recomputes from the saved lines
+        order.total_amount = None
+        return order
+
+    def sync_lines(self, order, lines):
+        """Make the order's lines match ``lines``: one bulk insert, one bulk update, one delete"""
+        existing = {line.pk: line for line in order.items.all()}
+        unknown = [line["id"] for line in lines if line.get("id") not in existing and "id" in line]
+        if unknown:
+            raise serializers.ValidationError({"items": f"Lines {unknown} do not belong to this order."})
+
+        created, changed = [], []
+        for data in lines:
+            line = existing.pop(data.pop("id", None), None)
+            if line is None:
+                created.append(PurchaseOrderItem(purchase_order=order, **data))
+            elif any(getattr(line, name) != data.get(name, getattr(line, name)) for name in self.line_fields):
+                for name, value in data.items():
+                    setattr(line, name, value)
+                changed.append(line)
+
+        PurchaseOrderItem.objects.bulk_create(created)
+        PurchaseOrderItem.objects.bulk_update(changed, self.line_fields)
+        if existing:
+            PurchaseOrderItem.objects.filter(pk__in=existing).delete()
+        # Refresh the prefetched lines so the response reflects the write
+        if hasattr(order, "_prefetched_objects_cache"):
+            order._prefetched_objects_cache.pop("items", None)
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from .models import PurchaseOrder
+from .scorecards import apply_change, locked_contribution, order_contribution
+
+
+def remember_contribution(sender, instance, **kwargs):
+    """Capture what the stored order counts for before it is saved or deleted, locking it"""
+    instance._scorecard_before = locked_contribution(instance.pk) if instance.pk else None
+
+
+def update_scorecard(sender, instance, created=False, **kwargs):
+    before = getattr(instance, "_scorecard_before", None)
+    if before is None and instance.supplier_id is None:
+        return
+    apply_change(before, order_contribution(instance.pk))
+
+
+def remove_from_scorecard(sender, instance, **kwargs):
+    apply_change(getattr(instance, "_scorecard_before", None), None)
+
+
+pre_save.connect(remember_contribution, sender=PurchaseOrder, dispatch_uid="scorecard_pre_save")
+post_save.connect(update_scorecard, sender=PurchaseOrder, dispatch_uid="scorecard_post_save")
+pre_delete.connect(remember_contribution, sender=PurchaseOrder, dispatch_uid="scorecard_pre_delete")
+post_delete.connect(remove_from_scorecard, sender=PurchaseOrder, dispatch_uid="scorecard_post_delete")
@@ -1,3 +1,236 @@
-from django.test import TestCase
+import io
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from rest_framework.test import APIClient
+
+from inventory.models import InventoryItem, Stock, Warehouse
+
+from .models import PurchaseOrder, PurchaseOrderItem, PurchaseRequest, Supplier, SupplierScorecard
+from .reorder import create_reorder_requests, insert_drafts
+
+
+class ReorderRequestTests(TestCase):
+    def setUp(self):
+        self.main = Warehouse.objects.create(name="Main")
+        self.site = Warehouse.objects.create(name="Site")
+        self.cement = InventoryItem.objects.create(name="Cement", sku="CEM-1", warehouse=self.main)
+        self.sand = InventoryItem.objects.create(name="Sand", sku="SND-1", warehouse=self.main)
+        Stock.objects.create(item=self.cement, warehouse=self.main, quantity=4, reorder_level=10)
+        Stock.objects.create(item=self.sand, warehouse=self.main, quantity=50, reorder_level=10)
+        Stock.objects.create(item=self.sand, warehouse=self.site, quantity=10, reorder_level=10)
+
+    def test_drafts_per_candidate_grouped_by_warehouse(self):
+        self.assertEqual(create_reorder_requests(), {self.main.id: 1, self.site.id: 1})
+        draft = PurchaseRequest.objects.get(item=self.cement)
+        self.assertEqual((draft.status, draft.warehouse, draft.quantity), ("draft", self.main, 16))
+
+    def test_rerun_skips_open_requests(self):
+        create_reorder_requests()
+        self.assertEqual(create_reorder_requests(), {})
+        self.assertEqual(PurchaseRequest.objects.count(), 2)
+
+        # A pending request is still open
+        PurchaseRequest.objects.filter(item=self.cement).update(status="pending")
+        self.assertEqual(create_reorder_requests(warehouse_id=self.main.id), {})
+
+        # Once approved or rejected, the row is a candidate again
+        for status in ("approved", "rejected"):
+            PurchaseRequest.objects.filter(item=self.cement).exclude(status=status).update(status=status)
+            self.assertEqual(create_reorder_requests(warehouse_id=self.main.id), {self.main.id: 1})
+
+    def test_conflicting_drafts_are_not_counted(self):
+        # A draft raised by hand between the candidate query and the insert
+        PurchaseRequest.objects.create(item=self.cement, warehouse=self.main, item_description="Manual", quantity=1, status="draft")
+        self.assertEqual(insert_drafts([
+            PurchaseRequest(item=self.cement, warehouse=self.main, item_description="Reorder", quantity=6, status="draft"),
+            PurchaseRequest(item=self.sand, warehouse=self.site, item_description="Reorder", quantity=10, status="draft"),
+        ]), {self.site.id: 1})
+
+    def test_management_command(self):
+        out = io.StringIO()
+        call_command("reorder_low_stock", stdout=out)
+        self.assertIn("Created 2 draft purchase requests", out.getvalue())
+
+
+class PurchaseOrderTotalsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.acme = Supplier.objects.create(name="Acme")
+        self.bolt = Supplier.objects.create(name="Bolt")
+        # Header-only order: 2 x 50
+        self.header = PurchaseOrder.objects.create(title="Header", supplier=self.acme, quantity=2, unit_price=50)
+        # Line totals win over the header: 3 x 10 + 1 x 400
+        self.lines = PurchaseOrder.objects.create(title="Lines", supplier=self.acme, quantity=1, unit_price=1)
+        PurchaseOrderItem.objects.create(purchase_order=self.lines, description="Bolts", quantity=3, unit_price=10)
+        PurchaseOrderItem.objects.create(purchase_order=self.lines, description="Beam", quantity=1, unit_price=400)
+        self.other = PurchaseOrder.objects.create(
+            title="Other", supplier=self.bolt, quantity=1, unit_price=250, status="approved",
+        )
+
+    def test_annotation_matches_property(self):
+        totals = dict(PurchaseOrder.objects.with_totals().values_list("title", "total_amount"))
+        self.assertEqual(totals, {"Header": Decimal("100"), "Lines": Decimal("430"), "Other": Decimal("250")})
+        self.assertEqual(PurchaseOrder.objects.get(pk=self.lines.pk).total_amount, Decimal("430"))
+
+    def test_ordering_and_min_total(self):
+        data = self.client.get("/api/purchase-orders/", {"ordering": "-total_amount"}).json()
+        self.assertEqual([row["title"] for row in data["results"]], ["Lines", "Other", "Header"])
+        self.assertEqual(data["results"][0]["total_amount"], "430.00")
+
+        data = self.client.get("/api/purchase-orders/", {"min_total": "250"}).json()
+        self.assertEqual(sorted(row["title"] for row in data["results"]), ["Lines", "Other"])
+        self.assertEqual(self.client.get("/api/purchase-orders/", {"min_total": "lots"}).status_code, 400)
+
+    def test_totals_per_supplier_and_status(self):
+        rows = self.client.get("/api/purchase-orders/totals/").json()
+        self.assertEqual(
+            [(row["supplier_name"], row["status"], row["orders"], Decimal(str(row["total_amount"]))) for row in rows],
+            [("Acme", "pending", 2, Decimal("530")), ("Bolt", "approved", 1, Decimal("250"))],
+        )
+
+
+class PurchaseOrderNestedWriteTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_create_with_lines_in_one_request(self):
+        lines = [{"description": f"Line {n}", "quantity": 2, "unit_price": "5.00"} for n in range(200)]
+        # Order insert, one multi-row line insert, then the total and lines for the response
+        with self.assertNumQueries(6):
+            response = self.client.post("/api/purchase-orders/", {"title": "Big", "items": lines}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["total_amount"], "2000.00")
+        self.assertEqual(len(response.data["items"]), 200)
+
+    def test_update_diffs_lines(self):
+        order = PurchaseOrder.objects.create(title="Order")
+        keep = PurchaseOrderItem.objects.create(purchase_order=order, description="Keep", quantity=1, unit_price=10)
+        edit = PurchaseOrderItem.objects.create(purchase_order=order, description="Edit", quantity=1, unit_price=10)
+        drop = PurchaseOrderItem.objects.create(purchase_order=order, description="Drop", quantity=1, unit_price=10)
+
+        response = self.client.patch(f"/api/purchase-orders/{order.id}/", {"items": [
+            {"id": keep.id, "description": "Keep", "quantity": 1, "unit_price": "10.00"},
+            {"id": edit.id, "quantity": 5},
+            {"description": "New", "quantity": 2, "unit_price": "7.50"},
+        ]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_amount"], "75.00")
+        self.assertEqual(
+            sorted(order.items.values_list("description", "quantity")), [("Edit", 5), ("Keep", 1), ("New", 2)],
+        )
+        self.assertFalse(PurchaseOrderItem.objects.filter(pk=drop.pk).exists())
+
+        # Header-only changes leave the lines alone and still return a fresh total
+        response = self.client.patch(f"/api/purchase-orders/{order.id}/", {"title": "Renamed"}, format="json")
+        self.assertEqual((response.data["total_amount"], len(response.data["items"])), ("75.00", 3))
+
+    def test_lines_from_another_order_are_rejected(self):
+        order = PurchaseOrder.objects.create(title="Order")
+        other = PurchaseOrder.objects.create(title="Other")
+        foreign = PurchaseOrderItem.objects.create(purchase_order=other, description="X", quantity=1, unit_price=1)
+        response = self.client.patch(
+            f"/api/purchase-orders/{order.id}/", {"items": [{"id": foreign.id, "quantity": 3}]}, format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.quantity, 1)
+
+
+class SupplierScorecardTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.acme = Supplier.objects.create(name="Acme")
+        self.bolt = Supplier.objects.create(name="Bolt")
+
+    def order(self, supplier, days=None, **fields):
+        order = PurchaseOrder.objects.create(
+            supplier=supplier, order_date=date(2025, 1, 1), quantity=1, unit_price=100, **fields
+        )
+        if days is not None:
+            order.delivery_date = date(2025, 1, 1) + timedelta(days=days)
+            order.save()
+            self.client.post(f"/api/purchase-orders/{order.id}/complete/")
+        return order
+
+    def card(self, supplier):
+        return self.client.get(f"/api/suppliers/{supplier.id}/scorecard/").json()
+
+    def test_status_actions_update_the_scorecard(self):
+        for days in (2, 4, 6, 8, 30):
+            self.order(self.acme, days=days)
+        cancelled = self.order(self.acme)
+        self.client.post(f"/api/purchase-orders/{cancelled.id}/cancel/")
+
+        card = self.card(self.acme)
+        self.assertEqual((card["order_count"], card["total_spend"]), (6, "500.00"))
+        self.assertEqual((card["mean_lead_time_days"], card["p90_lead_time_days"]), ("10.00", 30))
+        self.assertEqual(card["cancellation_rate"], "0.1667")
+
+    def test_lines_supplier_moves_and_deletes(self):
+        order = self.order(self.acme)
+        self.client.patch(f"/api/purchase-orders/{order.id}/", {"items": [
+            {"description": "Steel", "quantity": 4, "unit_price": "25.50"},
+        ]}, format="json")
+        self.assertEqual(self.card(self.acme)["total_spend"], "102.00")
+
+        self.client.patch(f"/api/purchase-orders/{order.id}/", {"supplier": self.bolt.id}, format="json")
+        self.assertEqual((self.card(self.acme)["order_count"], self.card(self.bolt)["total_spend"]), (0, "102.00"))
+
+        order.delete()
+        self.assertEqual(self.card(self.bolt)["order_count"], 0)
+
+    def test_rebuild_matches_incremental_and_leaderboard(self):
+        self.order(self.acme, days=10)
+        self.order(self.bolt, days=3)
+        self.order(self.bolt, days=5)
+        incremental = [self.card(self.acme), self.card(self.bolt)]
+        call_command("rebuild_scorecards", stdout=io.StringIO())
+        rebuilt = [self.card(self.acme), self.card(self.bolt)]
+        for before, after in zip(incremental, rebuilt):
+            before.pop("updated_at"), after.pop("updated_at")
+            self.assertEqual(before, after)
+
+        names = [row["supplier_name"] for row in self.client.get("/api/suppliers/leaderboard/").json()["results"]]
+        self.assertEqual(names, ["Bolt", "Acme"])
+        names = [row["supplier_name"] for row in self.client.get("/api/suppliers/leaderboard/", {"sort": "spend"}).json()["results"]]
+        self.assertEqual(names, ["Bolt", "Acme"])
+        self.assertEqual(self.client.get("/api/suppliers/leaderboard/", {"sort": "x"}).status_code, 400)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class SupplierScorecardConcurrencyTests(TransactionTestCase):
+    threads = 4
+    actions_per_thread = 10
+
+    def test_concurrent_status_changes_keep_the_scorecard(self):
+        acme = Supplier.objects.create(name="Acme")
+        order = PurchaseOrder.objects.create(supplier=acme, order_date=date(2025, 1, 1), quantity=1, unit_price=100)
+        errors = []
+
+        def worker(index):
+            try:
+                client = APIClient()
+                for n in range(self.actions_per_thread):
+                    action = ("approve", "complete", "cancel")[(index + n) % 3]
+                    client.post(f"/api/purchase-orders/{order.id}/{action}/")
+            except Exception as e:  # surfaced in the main thread below
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        fields = ("order_count", "cancelled_count", "total_spend", "lead_time_count", "lead_time_histogram")
+        incremental = SupplierScorecard.objects.values(*fields).get(supplier=acme)
+        call_command("rebuild_scorecards", stdout=io.StringIO())
+        self.assertEqual(incremental, SupplierScorecard.objects.values(*fields).get(supplier=acme))
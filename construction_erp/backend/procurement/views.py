@@ -1,17 +1,25 @@
+from contextlib import ExitStack
+from decimal import Decimal, InvalidOperation
+
 from rest_framework import viewsets, status
 from rest_framework import serializers  # added for ValidationError handling
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action  # ADD THIS IMPORT
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Count, F, Sum
 from django.utils import timezone
-from .models import Supplier, PurchaseRequest, PurchaseOrder, PurchaseOrderItem
+from .models import Supplier, SupplierScorecard, PurchaseRequest, PurchaseOrder, PurchaseOrderItem
+from .scorecards import tracking
 from .serializers import (
     SupplierSerializer,
+    SupplierScorecardSerializer,
     PurchaseRequestSerializer,
     PurchaseOrderSerializer,
     PurchaseOrderItemSerializer,
 )
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from core.mixins import RelatedQuerysetMixin
 
 class SupplierViewSet(viewsets.ModelViewSet):
     """
@@ -21,6 +29,34 @@ class SupplierViewSet(viewsets.ModelViewSet):
     serializer_class = SupplierSerializer
     permission_classes = [AllowAny]
     
+    # Leaderboard sort keys; ties fall through to the next key
+    leaderboard_orderings = {
+        'reliability': (F('cancellation_rate').asc(), F('p90_lead_time_days').asc(nulls_last=True), '-total_spend'),
+        'lead_time': (F('p90_lead_time_days').asc(nulls_last=True), F('mean_lead_time_days').asc(nulls_last=True)),
+        'spend': ('-total_spend',),
+        'orders': ('-order_count',),
+    }
+
+    @action(detail=True, methods=['get'])
+    def scorecard(self, request, pk=None):
+        """Order count, spend, lead times and cancellation rate for one supplier"""
+        supplier = self.get_object()
+        card = SupplierScorecard.objects.filter(supplier=supplier).first() or SupplierScorecard(supplier=supplier)
+        return Response(SupplierScorecardSerializer(card).data)
+
+    @action(detail=False, methods=['get'])
+    def leaderboard(self, request):
+        """Suppliers ranked by ?sort=reliability (default), lead_time, spend or orders"""
+        sort = request.query_params.get('sort', 'reliability')
+        if sort not in self.leaderboard_orderings:
+            return Response({'error': f"sort must be one of {', '.join(self.leaderboard_orderings)}"}, status=400)
+        cards = SupplierScorecard.objects.select_related('supplier').filter(order_count__gt=0).order_by(
+            *self.leaderboard_orderings[sort], 'supplier_id'
+        )
+        page = self.paginate_queryset(cards)
+        rows = SupplierScorecardSerializer(page if page is not None else cards, many=True).data
+        return self.get_paginated_response(rows) if page is not None else Response(rows)
+
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
         """Activate supplier"""
@@ -37,19 +73,58 @@ class SupplierViewSet(viewsets.ModelViewSet):
         supplier.save()
         return Response({'status': 'supplier deactivated'})
 
-class PurchaseRequestViewSet(viewsets.ModelViewSet):
+class PurchaseRequestViewSet(RelatedQuerysetMixin, viewsets.ModelViewSet):
     queryset = PurchaseRequest.objects.all()
     serializer_class = PurchaseRequestSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
-class PurchaseOrderViewSet(viewsets.ModelViewSet):
+class PurchaseOrderViewSet(RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
-    CRUD operations for Purchase Orders
+    CRUD operations for Purchase Orders. Lines can be written in the same
+    request through a nested ``items`` list; on update the list replaces the
+    order's lines (entries with an ``id`` update that line).
     """
     queryset = PurchaseOrder.objects.all()
     serializer_class = PurchaseOrderSerializer
     permission_classes = [AllowAny]
+    ordering_fields = ['order_date', 'delivery_date', 'created_at', 'status', 'total_amount']
+
+    def get_queryset(self):
+        """Orders annotated with their line-item totals; ?min_total= filters on them"""
+        queryset = super().get_queryset().with_totals().order_by('-id')
+        min_total = self.request.query_params.get('min_total')
+        if min_total:
+            try:
+                minimum = Decimal(min_total)
+            except InvalidOperation:
+                minimum = None
+            if minimum is None or not minimum.is_finite():
+                raise serializers.ValidationError({'min_total': 'A valid number is required.'})
+            queryset = queryset.filter(total_amount__gte=minimum)
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def totals(self, request):
+        """Order count and total spend per supplier and status"""
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .prefetch_related(None)
+            .order_by()
+            .values('supplier', 'supplier__name', 'status')
+            .annotate(orders=Count('id'), total_amount=Sum('total_amount'))
+            .order_by('supplier__name', 'status')
+        )
+        return Response([
+            {
+                'supplier': row['supplier'],
+                'supplier_name': row['supplier__name'],
+                'status': row['status'],
+                'orders': row['orders'],
+                'total_amount': row['total_amount'],
+            }
+            for row in rows
+        ])
     
     def create(self, request, *args, **kwargs):
         """Create purchase order with defaults and clear error logging"""
@@ -65,9 +140,6 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
 
         # delivery_date can be omitted -- keep as None if not provided
 
-        # Debug log incoming payload
-        print(f"PurchaseOrder create data: {data}")
-
         serializer = self.get_serializer(data=data)
         try:
             serializer.is_valid(raise_exception=True)
@@ -75,32 +147,36 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
         except serializers.ValidationError as e:
-            # Log and return field-level validation errors in response
-            print(f"PurchaseOrder validation error: {e.detail}")
+            # Return field-level validation errors in response
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
     
+    def set_status(self, new_status):
+        """Change the order's status on a freshly locked copy, so concurrent actions queue"""
+        with transaction.atomic():
+            order = PurchaseOrder.objects.select_for_update().get(pk=self.get_object().pk)
+            order.status = new_status
+            if new_status == 'completed':
+                # Completion is the delivery unless a delivery date was recorded
+                order.delivery_date = order.delivery_date or timezone.now().date()
+            order.save()
+        return order
+
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Approve purchase order"""
-        order = self.get_object()
-        order.status = 'approved'
-        order.save()
+        self.set_status('approved')
         return Response({'status': 'purchase order approved'})
     
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         """Complete purchase order"""
-        order = self.get_object()
-        order.status = 'completed'
-        order.save()
+        self.set_status('completed')
         return Response({'status': 'purchase order completed'})
     
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """Cancel purchase order"""
-        order = self.get_object()
-        order.status = 'cancelled'
-        order.save()
+        self.set_status('cancelled')
         return Response({'status': 'purchase order cancelled'})
 
 
@@ -108,3 +184,19 @@ class PurchaseOrderItemViewSet(viewsets.ModelViewSet):
     queryset = PurchaseOrderItem.objects.all()
     serializer_class = PurchaseOrderItemSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+
+    # Line writes change their order's spend on the supplier scorecard
+    def perform_create(self, serializer):
+        with tracking(serializer.validated_data['purchase_order']):
+            serializer.save()
+
+    def perform_update(self, serializer):
+        orders = {serializer.instance.purchase_order, serializer.validated_data.get('purchase_order', serializer.instance.purchase_order)}
+        with ExitStack() as stack:
+            for order in orders:
+                stack.enter_context(tracking(order))
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with tracking(instance.purchase_order):
+            instance.delete()
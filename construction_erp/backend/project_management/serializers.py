@@ -29,6 +29,7 @@ class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = "__all__"
+        select_related = ["assigned_to"]
 
 
 class MilestoneSerializer(serializers.ModelSerializer):
@@ -50,3 +51,4 @@ class ProjectTeamSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProjectTeam
         fields = ['id', 'project', 'project_name', 'member', 'member_name', 'role']
+        select_related = ['project', 'member']
@@ -1,3 +1,28 @@
+from itertools import count
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import CustomUser
+from core.testing import QueryCountAssertionsMixin
+from .models import Project, ProjectTeam, Task
+
+
+class ListQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name="Bridge")
+        self.sequence = count()
+
+    def make_user(self):
+        return CustomUser.objects.create_user(email=f"user{next(self.sequence)}@example.com")
+
+    def test_tasks(self):
+        self.assertConstantListQueries(
+            "/api/tasks/",
+            lambda: Task.objects.create(project=self.project, assigned_to=self.make_user()),
+        )
+
+    def test_project_team(self):
+        self.assertConstantListQueries(
+            "/api/project-team/",
+            lambda: ProjectTeam.objects.create(project=self.project, member=self.make_user()),
+        )
@@ -15,6 +15,7 @@ from rest_framework.response import Response
 from accounts.models import CustomUser
 from accounts.serializers import UserSerializer
 from rest_framework import serializers  # ADD THIS IMPORT
+from core.mixins import BulkModelMixin, RelatedQuerysetMixin
 
 User = get_user_model()
 
@@ -47,7 +48,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def tasks(self, request, pk=None):
         """Get all tasks for a project"""
         project = self.get_object()
-        tasks = project.tasks.all()
+        tasks = project.tasks.select_related(*TaskSerializer.Meta.select_related)
         serializer = TaskSerializer(tasks, many=True)
         return Response(serializer.data)
     
@@ -59,7 +60,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project.save()
         return Response({'status': 'project marked as completed'})
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(BulkModelMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for Tasks
     """
@@ -67,19 +68,6 @@ class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [AllowAny]
     
-    def create(self, request, *args, **kwargs):
-        """Override create to add better error handling"""
-        print(f"Task create data: {request.data}")  # Debug log
-        serializer = self.get_serializer(data=request.data)
-        try:
-            serializer.is_valid(raise_exception=True)
-            self.perform_create(serializer)
-            headers = self.get_success_headers(serializer.data)
-            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
-        except serializers.ValidationError as e:
-            print(f"Validation error: {e.detail}")  # Debug log
-            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
-    
     @decorators.action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         """Mark task as completed"""
@@ -91,7 +79,7 @@ class TaskViewSet(viewsets.ModelViewSet):
     @decorators.action(detail=False, methods=['get'])
     def my_tasks(self, request):
         """Get tasks assigned to current user"""
-        tasks = Task.objects.filter(assigned_to=request.user)
+        tasks = self.get_queryset().filter(assigned_to=request.user)
         serializer = self.get_serializer(tasks, many=True)
         return Response(serializer.data)
 
@@ -111,7 +99,7 @@ class ProjectDocumentViewSet(viewsets.ModelViewSet):
     serializer_class = ProjectDocumentSerializer
     permission_classes = [AllowAny]
 
-class ProjectTeamViewSet(viewsets.ModelViewSet):
+class ProjectTeamViewSet(RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for Project Team
     """
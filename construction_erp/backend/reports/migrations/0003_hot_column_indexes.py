@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_alter_report_options_remove_report_content_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['-created_at'], name='report_created_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['report_type', '-created_at'], name='report_type_created_idx'),
+        ),
+    ]
@@ -24,6 +24,10 @@ class Report(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at"], name="report_created_desc_idx"),
+            models.Index(fields=["report_type", "-created_at"], name="report_type_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.report_type})"
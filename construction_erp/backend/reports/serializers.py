@@ -23,3 +23,4 @@ class KPISerializer(serializers.ModelSerializer):
             "project_name",
             "calculated_at",
         ]
+        select_related = ["project"]
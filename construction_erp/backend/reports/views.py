@@ -3,6 +3,7 @@ from rest_framework import serializers
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from core.mixins import RelatedQuerysetMixin
 from .models import Report, KPI
 from .serializers import ReportSerializer, KPISerializer
 
@@ -54,7 +55,7 @@ class ReportViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class KPIViewSet(viewsets.ModelViewSet):
+class KPIViewSet(RelatedQuerysetMixin, viewsets.ModelViewSet):
     queryset = KPI.objects.all().order_by("-calculated_at")
     serializer_class = KPISerializer
     permission_classes = [permissions.IsAuthenticated]
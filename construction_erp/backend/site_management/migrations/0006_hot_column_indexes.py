@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('site_management', '0005_alter_safetyrecord_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailylog',
+            index=models.Index(fields=['-date', '-id'], name='dailylog_date_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='safetyrecord',
+            index=models.Index(fields=['-date'], name='safety_date_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='safetyrecord',
+            index=models.Index(fields=['severity', '-date'], name='safety_severity_date_idx'),
+        ),
+    ]
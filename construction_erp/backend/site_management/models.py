@@ -36,6 +36,9 @@ class DailyLog(models.Model):
     class Meta:
         ordering = ['-date']
         unique_together = ['site', 'date']
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='dailylog_date_desc_idx'),
+        ]
 
     def __str__(self):
         return f"{self.site.name} - {self.date}"
@@ -75,6 +78,10 @@ class SafetyRecord(models.Model):
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['-date'], name='safety_date_desc_idx'),
+            models.Index(fields=['severity', '-date'], name='safety_severity_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.site.name} - {self.date} ({self.severity})"
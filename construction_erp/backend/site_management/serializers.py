@@ -18,6 +18,7 @@ class DailyLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = DailyLog
         fields = "__all__"
+        select_related = ["site"]
 
 
 class SiteInspectionSerializer(serializers.ModelSerializer):
@@ -27,6 +28,7 @@ class SiteInspectionSerializer(serializers.ModelSerializer):
     class Meta:
         model = SiteInspection
         fields = "__all__"
+        select_related = ["site", "inspector"]
 
 
 class SafetyRecordSerializer(serializers.ModelSerializer):
@@ -36,3 +38,4 @@ class SafetyRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = SafetyRecord
         fields = "__all__"
+        select_related = ["site"]
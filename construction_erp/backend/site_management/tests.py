@@ -1,3 +1,40 @@
+from datetime import date, timedelta
+from itertools import count
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import CustomUser
+from core.testing import QueryCountAssertionsMixin
+from .models import DailyLog, SafetyRecord, Site, SiteInspection
+
+
+class ListQueryCountTests(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        self.sequence = count()
+
+    def next_site_and_date(self):
+        n = next(self.sequence)
+        site = Site.objects.create(name=f"Site {n}", location="Nairobi")
+        return site, date(2025, 1, 1) + timedelta(days=n)
+
+    def test_daily_logs(self):
+        def create_log():
+            site, day = self.next_site_and_date()
+            DailyLog.objects.create(site=site, date=day)
+
+        self.assertConstantListQueries("/api/daily-logs/", create_log)
+
+    def test_safety_records(self):
+        def create_record():
+            site, day = self.next_site_and_date()
+            SafetyRecord.objects.create(site=site, date=day)
+
+        self.assertConstantListQueries("/api/safety-records/", create_record)
+
+    def test_site_inspections(self):
+        def create_inspection():
+            site, day = self.next_site_and_date()
+            inspector = CustomUser.objects.create_user(email=f"inspector{day.toordinal()}@example.com")
+            SiteInspection.objects.create(site=site, date=day, inspector=inspector, remarks="ok", status="pass")
+
+        self.assertConstantListQueries("/api/site-inspections/", create_inspection)
@@ -3,6 +3,7 @@ from rest_framework import serializers  # ADD THIS IMPORT
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from core.mixins import BulkModelMixin, RelatedQuerysetMixin
 from .models import Site, DailyLog, SiteInspection, SafetyRecord
 from .serializers import (
     SiteSerializer,
@@ -48,37 +49,25 @@ class SiteViewSet(viewsets.ModelViewSet):
         serializer = DailyLogSerializer(logs, many=True)
         return Response(serializer.data)
 
-class DailyLogViewSet(viewsets.ModelViewSet):
+class DailyLogViewSet(BulkModelMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for Daily Logs
     """
     queryset = DailyLog.objects.all()
     serializer_class = DailyLogSerializer
     permission_classes = [AllowAny]
-    
-    def create(self, request, *args, **kwargs):
-        """Override create to add better error handling"""
-        print(f"DailyLog create data: {request.data}")
-        serializer = self.get_serializer(data=request.data)
-        try:
-            serializer.is_valid(raise_exception=True)
-            self.perform_create(serializer)
-            headers = self.get_success_headers(serializer.data)
-            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
-        except serializers.ValidationError as e:
-            print(f"Validation error: {e.detail}")
-            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+    cursor_ordering = ('-date', '-id')
     
     @action(detail=False, methods=['get'])
     def today(self, request):
         """Get today's logs"""
         from django.utils import timezone
         today = timezone.now().date()
-        logs = DailyLog.objects.filter(date=today)
+        logs = self.get_queryset().filter(date=today)
         serializer = self.get_serializer(logs, many=True)
         return Response(serializer.data)
 
-class SiteInspectionViewSet(viewsets.ModelViewSet):
+class SiteInspectionViewSet(RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for Site Inspections
     """
@@ -94,7 +83,7 @@ class SiteInspectionViewSet(viewsets.ModelViewSet):
         inspection.save()
         return Response({'status': 'inspection approved'})
 
-class SafetyRecordViewSet(viewsets.ModelViewSet):
+class SafetyRecordViewSet(RelatedQuerysetMixin, viewsets.ModelViewSet):
     """
     CRUD operations for Safety Records
     """
@@ -118,6 +107,6 @@ class SafetyRecordViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def critical(self, request):
         """Get critical severity records"""
-        records = SafetyRecord.objects.filter(severity='critical')
+        records = self.get_queryset().filter(severity='critical')
         serializer = self.get_serializer(records, many=True)
         return Response(serializer.data)
@@ -10,7 +10,6 @@ export default function InvoiceCreate() {
   const [errorMessage, setErrorMessage] = useState("");
   const [fieldErrors, setFieldErrors] = useState({});
   const [formData, setFormData] = useState({
-    invoice_number: "",
     client: "",
     amount: 0,
     due_date: "",
@@ -26,7 +25,6 @@ export default function InvoiceCreate() {
 
   const validate = () => {
     const errs = {};
-    if (!formData.invoice_number?.trim()) errs.invoice_number = "Invoice number is required";
     if (!formData.client?.trim()) errs.client = "Client name is required";
     if (!formData.amount || formData.amount <= 0) errs.amount = "Amount must be greater than 0";
     return errs;
@@ -118,20 +116,6 @@ export default function InvoiceCreate() {
         
         <form onSubmit={handleSubmit} className="space-y-6">
           <div className="grid grid-cols-2 gap-4">
-            <div>
-              <label className="block text-sm font-bold text-gray-700 mb-2">Invoice Number *</label>
-              <input
-                type="text"
-                name="invoice_number"
-                value={formData.invoice_number}
-                onChange={handleChange}
-                placeholder="INV-001"
-                className={`w-full px-4 py-3 border-2 rounded-xl focus:outline-none ${fieldErrors.invoice_number ? 'border-red-500' : 'border-gray-300'}`}
-                required
-              />
-              {fieldErrors.invoice_number && <p className="text-sm text-red-600 mt-2">{fieldErrors.invoice_number}</p>}
-            </div>
-
             <div>
               <label className="block text-sm font-bold text-gray-700 mb-2">Client Name *</label>
               <input
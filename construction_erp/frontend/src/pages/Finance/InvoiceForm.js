@@ -3,7 +3,6 @@ import API from "../../api/axios";
 
 const InvoiceForm = ({ record, onClose }) => {
   const [formData, setFormData] = useState({
-    invoice_number: "",
     client: "",
     amount: "",
     date_issued: "",
@@ -43,22 +42,10 @@ const InvoiceForm = ({ record, onClose }) => {
     <div className="fixed inset-0 flex items-center justify-center bg-black bg-opacity-30">
       <div className="bg-white p-6 rounded-lg shadow-lg w-full max-w-lg">
         <h2 className="text-xl font-bold mb-4">
-          {record ? "Edit Invoice" : "Add Invoice"}
+          {record ? `Edit Invoice ${record.invoice_number}` : "Add Invoice"}
         </h2>
 
         <form onSubmit={handleSubmit} className="space-y-4">
-          <div>
-            <label className="block font-medium">Invoice Number</label>
-            <input
-              type="text"
-              name="invoice_number"
-              value={formData.invoice_number}
-              onChange={handleChange}
-              className="w-full border px-3 py-2 rounded"
-              required
-            />
-          </div>
-
           <div>
             <label className="block font-medium">Client</label>
             <input
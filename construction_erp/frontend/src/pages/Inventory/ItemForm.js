@@ -5,7 +5,6 @@ const ItemForm = ({ record, onClose }) => {
   const [formData, setFormData] = useState({
     name: "",
     category: "",
-    quantity: "",
     warehouse: "",
   });
   const [warehouses, setWarehouses] = useState([]);
@@ -82,18 +81,6 @@ const ItemForm = ({ record, onClose }) => {
             />
           </div>
 
-          <div>
-            <label className="block text-gray-700">Quantity</label>
-            <input
-              type="number"
-              name="quantity"
-              value={formData.quantity}
-              onChange={handleChange}
-              className="w-full border px-3 py-2 rounded"
-              required
-            />
-          </div>
-
           <div>
             <label className="block text-gray-700">Warehouse</label>
             <select
@@ -5,7 +5,6 @@ const StockForm = ({ record, onClose }) => {
   const [formData, setFormData] = useState({
     item: "",
     warehouse: "",
-    quantity: "",
     reorder_level: "",
   });
 
@@ -100,18 +99,6 @@ const StockForm = ({ record, onClose }) => {
             </select>
           </div>
 
-          <div>
-            <label className="block text-gray-700">Quantity</label>
-            <input
-              type="number"
-              name="quantity"
-              value={formData.quantity}
-              onChange={handleChange}
-              className="w-full border px-3 py-2 rounded"
-              required
-            />
-          </div>
-
           <div>
             <label className="block text-gray-700">Reorder Level</label>
             <input
@@ -13,8 +13,7 @@ export default function WarehouseCreate() {
   const [formData, setFormData] = useState({
     name: "",
     location: "",
-    capacity: 0,
-    current_stock: 0
+    capacity: 0
   });
 
   const handleChange = (e) => {
@@ -113,20 +112,6 @@ export default function WarehouseCreate() {
               />
               <p className="text-xs text-gray-500 mt-1">Maximum storage capacity</p>
             </div>
-
-            <div>
-              <label className="block text-sm font-bold text-gray-700 mb-2">Current Stock</label>
-              <input
-                type="number"
-                name="current_stock"
-                value={formData.current_stock}
-                onChange={handleChange}
-                placeholder="0"
-                min="0"
-                className="w-full px-4 py-3 border-2 border-gray-300 rounded-xl focus:border-purple-500 focus:outline-none"
-              />
-              <p className="text-xs text-gray-500 mt-1">Current inventory level</p>
-            </div>
           </div>
 
           <div className="flex gap-4 pt-6">
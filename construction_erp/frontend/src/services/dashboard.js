@@ -2,29 +2,18 @@ import api from "./api";
 
 export const fetchDashboardStats = async () => {
   try {
-    // Fetch real statistics from backend with error handling
-    const results = await Promise.allSettled([
-      api.get("/projects/"),
-      api.get("/employees/"),
-      api.get("/equipment/")
-    ]);
-
-    const [projectsRes, employeesRes, equipmentRes] = results;
+    // One aggregated call instead of fetching three full lists for their counts
+    const { data } = await api.get("/dashboard/summary/");
 
     return {
-      projects: projectsRes.status === 'fulfilled' 
-        ? (projectsRes.value.data.count || projectsRes.value.data.results?.length || projectsRes.value.data.length || 0)
-        : 0,
-      employees: employeesRes.status === 'fulfilled'
-        ? (employeesRes.value.data.count || employeesRes.value.data.results?.length || employeesRes.value.data.length || 0)
-        : 0,
-      equipments: equipmentRes.status === 'fulfilled'
-        ? (equipmentRes.value.data.count || equipmentRes.value.data.results?.length || equipmentRes.value.data.length || 0)
-        : 0
+      projects: data.projects?.total || 0,
+      employees: data.employees?.total || 0,
+      equipments: data.equipment?.total || 0,
+      summary: data
     };
   } catch (error) {
     console.error("Dashboard stats error:", error);
-    // Return zeros if all API calls fail
+    // Return zeros if the summary call fails
     return {
       projects: 0,
       employees: 0,